@@ -8,6 +8,7 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from instagram_downloader import download_instagram_reel  # Import new function
 from gmail_cleanup_new import authenticate_gmail, delete_emails
+from gmail_intake import fetch_messages, unread_message_ids
 
 load_dotenv()  # Load environment variables from .env file
 
@@ -48,50 +49,53 @@ def authenticate_gmail():
                 token.write(creds.to_json())
         return build('gmail', 'v1', credentials=creds)
 
-def check_email(service, sender_email):
-    """Check for new emails from a specific sender."""
-    results = service.users().messages().list(userId='me', q=f'from:{sender_email} is:unread').execute()
-    messages = results.get('messages', [])
-    if not messages:
-        print("No new emails.")
-        return None, None
-    else:
-        msg_id = messages[0]['id']
-        message = service.users().messages().get(userId='me', id=msg_id).execute()
-        payload = message['payload']
-        headers = payload['headers']
+def parse_message(message):
+    """Pull the subject and Instagram link out of a full Gmail message."""
+    payload = message['payload']
+    headers = payload['headers']
 
-        # Extract subject
-        subject = ""
-        for header in headers:
-            if header['name'] == 'Subject':
-                subject = header['value']
+    # Extract subject
+    subject = ""
+    for header in headers:
+        if header['name'] == 'Subject':
+            subject = header['value']
 
-        # Set default if subject is missing or empty
-        if title_club_mars or not subject:
-            subject = "#MilanaKateryna"
-            
-        # Extract body
-        body = ""
-        if 'data' in payload['body']:
-            body = base64.urlsafe_b64decode(payload['body']['data']).decode()
-        elif 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == "text/plain" and 'data' in part['body']:
-                    body = base64.urlsafe_b64decode(part['body']['data']).decode()
-                elif part['mimeType'] == "text/html" and 'data' in part['body']:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(base64.urlsafe_b64decode(part['body']['data']).decode(), 'html.parser')
-                    links = soup.find_all('a')
-                    for link in links:
-                        if 'instagram.com' in link.get('href', ''):
-                            body = link.get('href')
-                            break
+    # Set default if subject is missing or empty
+    if title_club_mars or not subject:
+        subject = "#MilanaKateryna"
 
-        # Mark as read
-        service.users().messages().modify(userId='me', id=msg_id, body={"removeLabelIds": ["UNREAD"]}).execute()
+    # Extract body
+    body = ""
+    if 'data' in payload['body']:
+        body = base64.urlsafe_b64decode(payload['body']['data']).decode()
+    elif 'parts' in payload:
+        for part in payload['parts']:
+            if part['mimeType'] == "text/plain" and 'data' in part['body']:
+                body = base64.urlsafe_b64decode(part['body']['data']).decode()
+            elif part['mimeType'] == "text/html" and 'data' in part['body']:
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(base64.urlsafe_b64decode(part['body']['data']).decode(), 'html.parser')
+                links = soup.find_all('a')
+                for link in links:
+                    if 'instagram.com' in link.get('href', ''):
+                        body = link.get('href')
+                        break
 
-        return subject, body
+    return subject, body
+
+def check_emails(service, sender_email):
+    """Fetch every unread email from the sender in one batch, oldest first.
+
+    Returns a list of (msg_id, subject, body); all of them are marked read with
+    a single batchModify. One that could not be fetched stays unread, so the
+    next check (the same unread query) picks it up again.
+    """
+    msg_ids = unread_message_ids(service, sender_email)
+    if not msg_ids:
+        print("No new emails.")
+        return []
+    messages, _ = fetch_messages(service, msg_ids)
+    return [(message['id'], *parse_message(message)) for message in messages]
 
 def process_email(subject, body, youtube):
     """Extract Instagram URL, download the video, and upload it to YouTube."""
@@ -166,10 +170,10 @@ def main():
     print("Monitoring for emails...")
 
     while True:
-        subject, body = check_email(gmail_service, sender_email)
-        if subject and body:
-            print(f"New Email Received - Subject: {subject}")
-            process_email(subject, body, youtube_service)
+        for msg_id, subject, body in check_emails(gmail_service, sender_email):
+            if subject and body:
+                print(f"New Email Received - Subject: {subject}")
+                process_email(subject, body, youtube_service)
         time.sleep(10)  # Check every 10 seconds
         
 if __name__ == '__main__':
@@ -1,18 +1,34 @@
 import os
 import time
 import base64
+import threading
 import subprocess
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
-from instagram_downloader import download_instagram_reel
+from channel_router import UploadRouter
+from description_cache import normalize_title
+from fingerprint import find_duplicate, fingerprint
+from gmail_intake import fetch_messages, mark_messages_read, poll_new_message_ids, write_history_id
+from instagram_downloader import download_instagram_reel, extract_shortcode
+from job_ledger import JobLedger, email_id, job_id, state_reached
+from pipeline import Pipeline, Stage
+from preflight import preflight
+from quota import get_meter, project_of, quota_day, unit_cost
+from review_queue import ReviewQueue, make_contact_sheet
+from scheduler import MIN_LEAD, UploadScheduler
 from YoutubeUpload import (
     upload_video,
+    add_to_playlist,
+    add_videos_to_playlist,
     authenticate_youtube,
-    generate_description,
+    generate_description_async,
+    generate_descriptions_async,
     read_last_upload_time,
     write_last_upload_time,
     calculate_next_upload_time,
@@ -24,6 +40,42 @@ load_dotenv()
 # Keep your same behavior defaults
 TITLE_VIRAL = True
 
+# Start a draft description from the email subject while the clip is still
+# being reviewed; it is used if the typed title ends up the same. Off by
+# default because with TITLE_VIRAL every subject is just "Viral".
+PREFETCH_FROM_SUBJECT = False
+DESCRIPTION_SUFFIX = "\n\nsubscribe! Midnightlockerroom"
+
+# Pipeline mode overlaps the download of the next clip and description writing
+# with the upload of the current one. False restores the one-at-a-time loop.
+USE_PIPELINE = True
+DOWNLOAD_WORKERS = 2
+DESCRIBE_WORKERS = 2
+UPLOAD_WORKERS = 2
+
+# Review queue mode (pipeline only): clips are downloaded ahead and turned into
+# contact sheets, and the operator titles them a batch at a time instead of
+# watching each one through before the next can move. False restores
+# play-then-title for every clip.
+REVIEW_QUEUE = True
+REVIEW_BATCH = 5  # clips per sitting
+REVIEW_MAX_WAIT_S = 180  # ...or fewer, once the oldest has waited this long
+SHEET_WORKERS = 2
+PREFLIGHT_WORKERS = 2
+
+# Uploads held for quota go back to the upload stage when the quota day turns
+# over, or after this long in case the meter was corrected by hand.
+QUOTA_RECHECK_S = 15 * 60
+
+# Playlist inserts for a channel are collected and sent as one batch request
+# once this many are waiting, or once the oldest has waited this long.
+PLAYLIST_BATCH = 10
+PLAYLIST_MAX_WAIT_S = 120
+
+DOWNLOADS_FOLDER = r"C:\Users\super\Downloads"
+TAGS = ["midnightlockerroom", "shorts", "culture", "college", "humor"]
+PLAYLIST_NAME = "college culture compilation 2026"
+
 # Gmail scope (same as your file)
 SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
 
@@ -65,28 +117,20 @@ def safe_delete_file(path: str):
     except Exception as e:
         print(f"⚠️ Could not delete file {path}: {e}")
 
-def check_email(service, sender_email):
-    """Check for new unread emails from a specific sender."""
-    results = service.users().messages().list(
-        userId="me",
-        q=f"from:{sender_email} is:unread"
-    ).execute()
+def message_header(message, name):
+    """A header's value as sent (before any TITLE_VIRAL rewriting), or ''."""
+    for header in message["payload"].get("headers", []):
+        if header.get("name") == name:
+            return header.get("value", "")
+    return ""
 
-    messages = results.get("messages", [])
-    if not messages:
-        print("No new emails.")
-        return None, None, None  # CHANGED
 
-    msg_id = messages[0]["id"]
-    message = service.users().messages().get(userId="me", id=msg_id).execute()
+def parse_message(message):
+    """Pull the subject and Instagram link out of a full Gmail message."""
     payload = message["payload"]
-    headers = payload.get("headers", [])
 
     # Extract subject
-    subject = ""
-    for header in headers:
-        if header.get("name") == "Subject":
-            subject = header.get("value", "")
+    subject = message_header(message, "Subject")
 
     if TITLE_VIRAL or not subject:
         subject = "Viral"
@@ -112,14 +156,54 @@ def check_email(service, sender_email):
                         body = href
                         break
 
-    # Mark as read
-    service.users().messages().modify(
-        userId="me",
-        id=msg_id,
-        body={"removeLabelIds": ["UNREAD"]}
-    ).execute()
+    return subject, body
 
-    return msg_id, subject, body  # CHANGED
+
+def check_new_emails(service, sender_email, ledger=None, router=None):
+    """
+    Every email from the sender that arrived since the last poll, oldest first,
+    as (msg_id, subject, body). Uses the Gmail history cursor, so an idle poll
+    costs one history.list call instead of a full search, and fetches the
+    messages through one batch request with a single batchModify to mark them
+    read.
+
+    With a ledger, each email is recorded as a job BEFORE it is marked read,
+    and the history cursor only moves past it after that, so a crash after
+    this point can no longer lose the clip. With a router too, it becomes one
+    job per channel its subject and sender route it to. An email Gmail hands
+    back again whose jobs are all in the ledger already is marked read but not
+    returned, so it isn't submitted a second time.
+    """
+    msg_ids, cursor = poll_new_message_ids(service, sender_email)
+    if not msg_ids:
+        print("No new emails.")
+        write_history_id(cursor)
+        return []
+
+    emails = []
+    messages, failed = fetch_messages(service, msg_ids, mark_read=False)
+    for message in messages:
+        subject, body = parse_message(message)
+        new = True
+        if ledger is not None:
+            channels = ["default"]
+            if router is not None:
+                channels = router.channels_for(message_header(message, "Subject"),
+                                               message_header(message, "From"))
+            added = [ledger.enqueue(job_id(message["id"], channel, len(channels) > 1), body, subject,
+                                    channel=channel, shortcode=extract_shortcode(body))
+                     for channel in channels]
+            new = any(added)
+        if new:
+            emails.append((message["id"], subject, body))
+    mark_messages_read(service, [message["id"] for message in messages])
+    if failed:
+        # Keep the old cursor: the next poll returns the failed ones again
+        # (the ones handled here are read now and drop out).
+        print(f"⚠️ {len(failed)} email(s) could not be fetched; retrying them next poll.")
+    else:
+        write_history_id(cursor)
+    return emails
 
 
 def play_video_then_wait(video_path: str):
@@ -134,18 +218,76 @@ def play_video_then_wait(video_path: str):
     input("Press ENTER after you close the video window...")
 
 
-def process_email(gmail_service, msg_id, subject, body, youtube):  # CHANGED
+def review_clip(video_path):
+    """Play the clip, then ask for its title. None means the operator said 'delete'."""
+    # play video first
+    play_video_then_wait(video_path)
+
+    # after exit, ask for name/title
+    return title_from_input(input("\nName the content (or type 'delete' to skip): "))
+
+
+def title_from_input(typed_title_raw):
+    """The title for what the operator typed; None for 'delete'."""
+    typed_title_raw = typed_title_raw.strip()
+    if typed_title_raw.lower() == "delete":
+        return None
+
+    typed_title = expand_emoji_tokens(typed_title_raw)
+    print(f"Title preview: {typed_title}")
+
+    if not typed_title:
+        print("❌ Title cannot be empty. Defaulting title to subscribe")
+        typed_title = "subscribe #midnightlockerroom"
+    return typed_title
+
+
+def prefetch_description(title, subject=None, draft=None):
+    """
+    Future for the description of `title`. A draft started from the subject
+    before review is reused when the operator typed that same title.
+    """
+    if draft is not None and subject is not None and normalize_title(subject) == normalize_title(title):
+        return draft
+    return generate_description_async(title)
+
+
+def schedule_next_slot(youtube, last_upload_time):
+    """Next slot after last_upload_time, in UTC, never less than 15 minutes out."""
+    next_upload_time = calculate_next_upload_time(youtube, last_upload_time, check_youtube_api=False)
+
+    # Ensure at least 15 minutes in the future
+    local_tz = datetime.now().astimezone().tzinfo
+    now_local = datetime.now(local_tz)
+    now_utc = now_local.astimezone(timezone.utc)
+
+    if next_upload_time <= now_utc + timedelta(minutes=15):
+        print(f"Warning: Calculated upload time {next_upload_time} is too soon. Adjusting...")
+        fallback_time = now_local + timedelta(minutes=20)
+        next_upload_time = fallback_time.astimezone(timezone.utc)
+        print(f"Using fallback time: {fallback_time}")
+
+    return next_upload_time
+
+
+def process_email(gmail_service, msg_id, subject, body, youtube, ledger=None):  # CHANGED
     """Extract Instagram URL, download the video, play it, then prompt for title and upload."""
     if not (body and body.startswith("https://www.instagram.com")):
         print("No valid Instagram URL found in the email body.")
         return
 
+    shortcode = extract_shortcode(body)
+    if ledger is not None and already_uploaded(ledger, shortcode):
+        trash_email(gmail_service, msg_id)
+        return
+
     print(f"Downloading video from: {body}")
 
-    downloads_folder = r"C:\Users\super\Downloads"
+    downloads_folder = DOWNLOADS_FOLDER
 
-    # Download with subject as filename (same as your logic)
-    downloaded_path = download_instagram_reel(body, downloads_folder, subject)
+    # Download with subject + shortcode as filename: the subject alone is
+    # usually "Viral", which made different reels collide on one file.
+    downloaded_path = download_instagram_reel(body, downloads_folder, f"{subject} {shortcode}")
 
     if not downloaded_path:
         print("Failed to download Instagram video.")
@@ -153,48 +295,38 @@ def process_email(gmail_service, msg_id, subject, body, youtube):  # CHANGED
 
     print(f"Downloaded video saved as: {downloaded_path}")
 
-    # play video first
-    play_video_then_wait(downloaded_path)
+    rejected = preflight_rejects(downloaded_path)
+    clip_fingerprint = fingerprint(downloaded_path) if not rejected else None
+    if rejected or (ledger is not None and near_duplicate(ledger, clip_fingerprint)):
+        safe_delete_file(downloaded_path)
+        trash_email(gmail_service, msg_id)
+        return
 
-    # after exit, ask for name/title
-    typed_title_raw = input("\nName the content (or type 'delete' to skip): ").strip()
+    draft = generate_description_async(subject) if PREFETCH_FROM_SUBJECT else None
+
+    typed_title = review_clip(downloaded_path)
 
     # If user wants to skip this clip entirely:
-    if typed_title_raw.lower() == "delete":
+    if typed_title is None:
         print("🗑️ Skipping: deleting video + trashing email...")
         safe_delete_file(downloaded_path)
         trash_email(gmail_service, msg_id)
         return  # move on to next email
 
-    typed_title = expand_emoji_tokens(typed_title_raw)
-    print(f"Title preview: {typed_title}")
+    # The description is written while the slot is worked out; we only
+    # wait on it right before the upload needs it.
+    description_future = prefetch_description(typed_title, subject, draft)
 
-    if not typed_title:
-        print("❌ Title cannot be empty. Defaulting title to subscribe")
-        typed_title = "subscribe #midnightlockerroom"
-
-
-    description = generate_description(typed_title) + "\n\nsubscribe! Midnightlockerroom"
-
-    tags = ["midnightlockerroom", "shorts", "culture", "college", "humor"]
-    playlist_name = "college culture compilation 2026"
+    tags = TAGS
+    playlist_name = PLAYLIST_NAME
 
     # Read last upload time from file
     last_upload_time = read_last_upload_time()
 
     # Schedule next upload time using ONLY the file data
-    next_upload_time = calculate_next_upload_time(youtube, last_upload_time, check_youtube_api=False)
+    next_upload_time = schedule_next_slot(youtube, last_upload_time)
 
-    # Ensure at least 15 minutes in the future
-    local_tz = datetime.now().astimezone().tzinfo
-    now_local = datetime.now(local_tz)
-    now_utc = now_local.astimezone(timezone.utc)
-
-    if next_upload_time <= now_utc + timedelta(minutes=15):
-        print(f"Warning: Calculated upload time {next_upload_time} is too soon. Adjusting...")
-        fallback_time = now_local + timedelta(minutes=20)
-        next_upload_time = fallback_time.astimezone(timezone.utc)
-        print(f"Using fallback time: {fallback_time}")
+    description = description_future.result() + DESCRIPTION_SUFFIX
 
     # Upload video to YouTube using the typed title
     response = upload_video(  # CHANGED (capture response)
@@ -211,7 +343,12 @@ def process_email(gmail_service, msg_id, subject, body, youtube):  # CHANGED
         print("❌ Upload failed. Not deleting email.")
         return
 
+    if ledger is not None:
+        ledger.record_upload(shortcode, response["id"])
+        record_fingerprint(ledger, clip_fingerprint, response["id"], shortcode=shortcode)
+
     # Update the last upload time (store in local time for readability)
+    local_tz = datetime.now().astimezone().tzinfo
     next_local_time = next_upload_time.astimezone(local_tz)
     write_last_upload_time(next_local_time)
 
@@ -224,6 +361,470 @@ def process_email(gmail_service, msg_id, subject, body, youtube):  # CHANGED
     print("Video uploaded successfully!")
 
 
+def preflight_rejects(path):
+    """Why this file can't go up as a Short, or None. Fixable files are fixed in place."""
+    result = preflight(path)
+    if not result.ok:
+        reason = "; ".join(result.reasons)
+        print(f"🚫 Preflight rejected {path}: {reason}")
+        return reason
+    if result.remuxed:
+        print(f"🔧 Remuxed {path} for fast start")
+    return None
+
+
+def near_duplicate(ledger, fp, channel="default"):
+    """Why this clip's content is already on the channel, or None."""
+    match = find_duplicate(ledger, fp, channel)
+    if match is None:
+        return None
+    reason = f"near-duplicate of video {match['video_id']} (uploaded {match['created_at']})"
+    print(f"⏭️ Clip is a {reason}; skipping.")
+    return reason
+
+
+def record_fingerprint(ledger, fp, video_id, channel="default", shortcode=None):
+    if fp is not None:
+        ledger.record_fingerprint(video_id, channel, fp.length, fp.frames_hex(), shortcode)
+
+
+def already_uploaded(ledger, shortcode, msg_id=None, channel="default"):
+    """
+    Why this reel should not be processed again, or None. Checked against the
+    local ledger only, before any Instagram or YouTube call.
+    """
+    earlier = ledger.find_upload(shortcode, channel)
+    own = ledger.get(msg_id) if msg_id is not None else None
+    if earlier and own and own["video_id"] == earlier["video_id"]:
+        earlier = None  # the job's own upload, seen again on a resume
+    if earlier:
+        reason = f"duplicate of video {earlier['video_id']} (uploaded {earlier['uploaded_at']})"
+    elif msg_id is not None and ledger.earlier_job_for(msg_id, shortcode, channel):
+        reason = "duplicate of a clip already in the queue"
+    else:
+        return None
+    print(f"⏭️ Reel {shortcode} is a {reason}; skipping.")
+    return reason
+
+
+@dataclass
+class ClipJob:
+    """One emailed reel on its way through the pipeline (a row of the job ledger)."""
+    msg_id: str
+    url: str
+    subject: str
+    state: str = "queued"
+    channel: str = "default"
+    shortcode: str = ""
+    path: str = ""
+    title: str = ""
+    description: str = ""
+    slot: datetime = None
+    video_id: str = ""
+    # Not stored in the ledger: the in-flight description, the contact sheet
+    # and the content fingerprint (both made again if the job is resumed).
+    description_future: Future = field(default=None, repr=False, compare=False)
+    sheet: str = ""
+    fingerprint: object = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            msg_id=row["msg_id"],
+            url=row["url"],
+            subject=row["subject"],
+            state=row["state"],
+            channel=row["channel"],
+            shortcode=row["shortcode"] or "",
+            path=row["path"] or "",
+            title=row["title"] or "",
+            description=row["description"] or "",
+            slot=datetime.fromisoformat(row["slot"]) if row["slot"] else None,
+            video_id=row["video_id"] or "",
+        )
+
+    @property
+    def email_id(self):
+        """The Gmail message behind this job (msg_id is per channel when an email fans out)."""
+        return email_id(self.msg_id)
+
+
+class SlotClock:
+    """
+    Hands out upload slots in review order. Each slot is reserved in the
+    channel's high-water-mark file as it is handed out, so another process
+    sharing the channel can't hand out the same one; the mark never moves
+    backwards, since uploads can finish out of order.
+    """
+
+    def __init__(self, scheduler=None, ledger=None, channel="default"):
+        self.scheduler = scheduler or UploadScheduler()
+        self.lock = threading.Lock()
+        self.last = self.scheduler.high_water_mark()
+        # Slots handed to jobs that haven't uploaded yet are only in the ledger.
+        pending = ledger.latest_slot(channel) if ledger is not None else None
+        if pending is not None and (self.last is None or pending > self.last):
+            self.last = pending
+
+    def next(self):
+        with self.lock:
+            slot = self.scheduler.reserve(after=self.last)
+            self.last = slot
+            return slot
+
+    def commit(self, slot):
+        with self.lock:
+            self.scheduler.commit([slot])
+
+
+class QuotaHold:
+    """
+    Uploads waiting for the daily quota to reset. Without this a held job
+    sat in the ledger until the process restarted; now the main loop hands
+    due() back to the upload stage, which holds them again if the quota is
+    still spent.
+    """
+
+    def __init__(self, recheck_s=QUOTA_RECHECK_S):
+        self.recheck_s = recheck_s
+        self._jobs = []
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        with self._lock:
+            self._jobs.append((job, quota_day(), time.monotonic()))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def due(self):
+        """Held jobs whose quota day has ended, or that have waited recheck_s."""
+        today, now = quota_day(), time.monotonic()
+        with self._lock:
+            ready = [entry for entry in self._jobs
+                     if entry[1] != today or now - entry[2] >= self.recheck_s]
+            self._jobs = [entry for entry in self._jobs if entry not in ready]
+        return [job for job, _, _ in ready]
+
+
+class PlaylistBatch:
+    """
+    Uploaded jobs waiting to go into the playlist, per channel. One playlist
+    insert per clip meant one HTTP round trip each; the main loop takes due()
+    batches and sends each as one batch request (flush_playlist).
+    """
+
+    def __init__(self, size=PLAYLIST_BATCH, max_wait_s=PLAYLIST_MAX_WAIT_S):
+        self.size = size
+        self.max_wait_s = max_wait_s
+        self._waiting = {}  # channel -> [(job, added at)]
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        with self._lock:
+            self._waiting.setdefault(job.channel, []).append((job, time.monotonic()))
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._waiting.values())
+
+    def due(self, force=False):
+        """Each channel's jobs, for channels with a full batch or one that has waited too long."""
+        now = time.monotonic()
+        with self._lock:
+            ready = [channel for channel, entries in self._waiting.items()
+                     if force or len(entries) >= self.size or now - entries[0][1] >= self.max_wait_s]
+            return [[job for job, _ in self._waiting.pop(channel)] for channel in ready]
+
+
+def flush_playlist(router, ledger, jobs):
+    """Add one channel's jobs to the playlist in one batch; returns the ones now playlisted."""
+    service = router.lane(jobs[0].channel).client.service()
+    try:
+        added = set(add_videos_to_playlist(service, PLAYLIST_NAME, [job.video_id for job in jobs]))
+    except Exception as e:
+        # Only the lookup or the batch itself failing lands here; a single
+        # insert failing just leaves that id out of the result. Either way
+        # the ones not added stay 'uploaded' and are retried on restart.
+        print(f"⚠️ Playlist insert failed for {len(jobs)} video(s): {e}")
+        added = set()
+    done = []
+    for job in jobs:
+        if job.video_id in added:
+            _advance(ledger, job, "playlisted")
+            done.append(job)
+        else:
+            ledger.fail(job.msg_id, "playlist insert failed")
+    return done
+
+
+_local = threading.local()
+
+
+def _thread_gmail():
+    if not hasattr(_local, "gmail"):
+        _local.gmail = authenticate_gmail()
+    return _local.gmail
+
+
+def _advance(ledger, job, state, **fields):
+    ledger.advance(job.msg_id, state, **fields)
+    job.state = state
+
+
+def _drop_email(ledger, job):
+    # An email that fanned out to several channels goes once the last of
+    # its jobs is done with it.
+    if ledger.email_settled(job.email_id):
+        trash_email(_thread_gmail(), job.email_id)
+
+
+def _approve(router, ledger, job, title, draft=None, describe=True):
+    """
+    Give a reviewed clip its title, start its description (unless the caller
+    describes a batch itself), and take its slot.
+    """
+    job.title = title
+    # Writing starts the moment the title exists, not when a describe
+    # worker gets to this job.
+    if describe:
+        job.description_future = prefetch_description(title, job.subject, draft)
+    job.slot = router.lane(job.channel).slots.next()
+    ledger.update(job.msg_id, title=job.title, slot=job.slot.isoformat())
+
+
+def _reject(ledger, job):
+    print("🗑️ Skipping: deleting video + trashing email...")
+    safe_delete_file(job.path)
+    safe_delete_file(job.sheet)
+    _advance(ledger, job, "skipped")
+    _drop_email(ledger, job)
+
+
+def review_batch(review_queue, pipeline, router, ledger):
+    """
+    Title every clip waiting in the review queue in one sitting, then send the
+    approved ones straight on to the describe stage. Slots are taken in the
+    order clips are approved, as in one-at-a-time review. The sitting's
+    titles are described by one packed model request, not one each.
+    """
+    jobs = review_queue.take()
+    if not jobs:
+        return
+    print(f"\n🗂️ {len(jobs)} clip(s) ready for review. Opening their contact sheets...")
+    approved = []
+    for job in jobs:
+        if job.sheet:
+            subprocess.run(["cmd", "/c", "start", "", job.sheet], shell=True)
+    for n, job in enumerate(jobs, 1):
+        print(f"\n[{n}/{len(jobs)}] {job.subject} — {job.url}")
+        print(f"    sheet: {job.sheet or '(none; type play to watch)'}")
+        while True:
+            typed = input("Name the content ('play' to watch, 'delete' to skip): ")
+            if typed.strip().lower() != "play":
+                break
+            play_video_then_wait(job.path)
+        title = title_from_input(typed)
+        if title is None:
+            _reject(ledger, job)
+            continue
+        _approve(router, ledger, job, title, describe=False)
+        safe_delete_file(job.sheet)
+        approved.append(job)
+    futures = generate_descriptions_async([job.title for job in approved])
+    for job, future in zip(approved, futures):
+        job.description_future = future
+        pipeline.submit(job, stage="describe")
+
+
+def build_pipeline(router, ledger, review_queue=None, quota_hold=None, playlist_batch=None):
+    """
+    download -> preflight -> review -> describe -> upload -> playlist ->
+    cleanup, each with its own pool. Every stage records its result in the
+    ledger, and skips work a resumed job already finished before the restart.
+
+    Upload and playlist run a separate pool per channel, on that channel's
+    own service (googleapiclient services are not thread-safe, so each worker
+    thread gets its own), and slots come from the channel's own schedule.
+
+    With a review_queue, a contact-sheet stage follows download, and review
+    only parks clips in the queue: the operator titles them in batches with
+    review_batch(), which feeds them back in at describe.
+
+    With a quota_hold, uploads that would overrun the daily quota are parked
+    there, to be submitted at "upload" again once it resets.
+
+    With a playlist_batch, the playlist stage only collects uploaded jobs;
+    flush_playlist() adds each channel's batch at once and the caller submits
+    the results at "cleanup".
+    """
+
+    def advance(job, state, **fields):
+        _advance(ledger, job, state, **fields)
+
+    def youtube(job):
+        return router.lane(job.channel).client.service()
+
+    def drop_email(job):
+        _drop_email(ledger, job)
+
+    def download(job):
+        # Past upload the file isn't needed again (check/describe/upload all
+        # pass it through), and cleanup may already have deleted it.
+        if state_reached(job.state, "uploaded"):
+            return job
+        if state_reached(job.state, "downloaded") and job.path and os.path.exists(job.path):
+            return job
+        if not (job.url and job.url.startswith("https://www.instagram.com")):
+            print("No valid Instagram URL found in the email body.")
+            advance(job, "skipped", error="no Instagram URL in email")
+            return None
+        duplicate = already_uploaded(ledger, job.shortcode, job.msg_id, job.channel)
+        if duplicate:
+            advance(job, "skipped", error=duplicate)
+            drop_email(job)
+            return None
+        print(f"Downloading video from: {job.url}")
+        # Several downloads run at once and the subject is usually just "Viral",
+        # so the message id keeps their files apart.
+        job.path = download_instagram_reel(job.url, DOWNLOADS_FOLDER, f"{job.subject} {job.msg_id}")
+        if not job.path:
+            print("Failed to download Instagram video.")
+            ledger.fail(job.msg_id, "download failed")
+            return None
+        print(f"Downloaded video saved as: {job.path}")
+        if not state_reached(job.state, "downloaded"):
+            advance(job, "downloaded", path=job.path, shortcode=extract_shortcode(job.url))
+        else:
+            ledger.update(job.msg_id, path=job.path)
+        return job
+
+    def check(job):
+        if state_reached(job.state, "uploaded"):
+            return job
+        rejected = preflight_rejects(job.path)
+        if rejected:
+            safe_delete_file(job.path)
+            advance(job, "skipped", error=f"preflight: {rejected}"[:500])
+            drop_email(job)
+            return None
+        # The same clip from a different post has a new shortcode; its
+        # content is what gives it away.
+        job.fingerprint = fingerprint(job.path)
+        duplicate = near_duplicate(ledger, job.fingerprint, job.channel)
+        if duplicate:
+            safe_delete_file(job.path)
+            advance(job, "skipped", error=duplicate)
+            drop_email(job)
+            return None
+        return job
+
+    def contact_sheet(job):
+        if not job.title:
+            job.sheet = make_contact_sheet(job.path) or ""
+        return job
+
+    def review(job):
+        # One worker: there is one operator and one terminal. The slot is taken
+        # here so slots follow the order clips were approved in.
+        if job.title:
+            return job
+        if review_queue is not None:
+            review_queue.add(job)
+            return None
+        draft = generate_description_async(job.subject) if PREFETCH_FROM_SUBJECT else None
+        title = review_clip(job.path)
+        if title is None:
+            _reject(ledger, job)
+            return None
+        _approve(router, ledger, job, title, draft)
+        return job
+
+    def describe(job):
+        if state_reached(job.state, "described"):
+            return job
+        future = job.description_future or generate_description_async(job.title)
+        job.description = future.result() + DESCRIPTION_SUFFIX
+        advance(job, "described", description=job.description)
+        return job
+
+    def upload(job):
+        if state_reached(job.state, "uploaded"):
+            return job
+        service = youtube(job)
+        if not get_meter().affordable(unit_cost("youtube.videos.insert"), project=project_of(service)):
+            # It would only come back quotaExceeded. The job waits in the hold
+            # (and in the ledger, for a restart) until the daily reset.
+            print(f"⏸️ Daily YouTube quota spent; holding '{job.title}' until it resets.")
+            ledger.fail(job.msg_id, "daily quota spent")
+            if quota_hold is not None:
+                quota_hold.add(job)
+            return None
+        if job.slot < datetime.now(timezone.utc) + MIN_LEAD:
+            # Held past the quota reset (or left over from before a restart),
+            # the slot taken at review has gone by; publishAt must be ahead.
+            job.slot = router.lane(job.channel).slots.next()
+            ledger.update(job.msg_id, slot=job.slot.isoformat())
+        response = upload_video(
+            service,
+            job.path,
+            job.title,
+            job.description,
+            TAGS,
+            job.slot,
+            None,
+            delete_after_upload=False,
+        )
+        if not response:
+            print(f"❌ Upload failed for '{job.title}'. Not deleting email.")
+            ledger.fail(job.msg_id, "upload failed")
+            return None
+        job.video_id = response["id"]
+        advance(job, "uploaded", video_id=job.video_id)
+        ledger.record_upload(job.shortcode, job.video_id, job.channel)
+        record_fingerprint(ledger, job.fingerprint, job.video_id, job.channel, job.shortcode)
+        router.lane(job.channel).slots.commit(job.slot)
+        return job
+
+    def playlist(job):
+        if state_reached(job.state, "playlisted"):
+            return job
+        if playlist_batch is not None:
+            # flush_playlist adds it with others and hands it to cleanup.
+            playlist_batch.add(job)
+            return None
+        add_to_playlist(youtube(job), PLAYLIST_NAME, job.video_id)
+        advance(job, "playlisted")
+        return job
+
+    def cleanup(job):
+        safe_delete_file(job.path)
+        # ✅ Delete email only after upload succeeded AND the file is gone
+        if not os.path.exists(job.path):
+            advance(job, "cleaned")
+            drop_email(job)
+        else:
+            print("⚠️ Upload succeeded but file still exists, so email was NOT deleted.")
+        print(f"Video uploaded successfully! ({job.title})")
+        return None
+
+    stages = [
+        Stage("download", download, workers=DOWNLOAD_WORKERS),
+        # Before review, so the operator never titles a clip that can't go up.
+        Stage("preflight", check, workers=PREFLIGHT_WORKERS),
+    ]
+    if review_queue is not None:
+        stages.append(Stage("sheet", contact_sheet, workers=SHEET_WORKERS))
+    return Pipeline(stages + [
+        Stage("review", review, workers=1),
+        Stage("describe", describe, workers=DESCRIBE_WORKERS),
+        Stage("upload", upload, workers=UPLOAD_WORKERS, key=lambda job: job.channel),
+        Stage("playlist", playlist, workers=1, key=lambda job: job.channel),
+        Stage("cleanup", cleanup, workers=1),
+    ])
+
+
 def main():
     sender_email = os.getenv("SENDER_EMAIL")
     if not sender_email:
@@ -241,11 +842,59 @@ def main():
 
     print("Monitoring for emails...")
 
+    ledger = JobLedger()
+    if USE_PIPELINE:
+        router = UploadRouter.from_file(
+            workers=UPLOAD_WORKERS,
+            make_slots=lambda slug, scheduler: SlotClock(scheduler, ledger, slug),
+        )
+        review_queue = ReviewQueue() if REVIEW_QUEUE else None
+        quota_hold = QuotaHold()
+        playlist_batch = PlaylistBatch()
+        pipeline = build_pipeline(router, ledger, review_queue, quota_hold, playlist_batch).start()
+
+        # Anything a previous run didn't finish goes back in first, picking up
+        # at whatever stage it reached.
+        unfinished = ledger.unfinished()
+        if unfinished:
+            print(f"Resuming {len(unfinished)} unfinished job(s) from the ledger...")
+        for row in unfinished:
+            pipeline.submit(ClipJob.from_row(row))
+
+        try:
+            while True:
+                for msg_id, subject, body in check_new_emails(gmail_service, sender_email, ledger, router):
+                    print(f"New Email Received - Subject: {subject}")
+                    # Only the rows this poll created; older ones were resumed
+                    # above or are already done.
+                    for row in ledger.jobs_for_email(msg_id):
+                        if row["state"] == "queued":
+                            pipeline.submit(ClipJob.from_row(row))
+                # Review runs here, on the main thread that owns the terminal,
+                # between polls.
+                if review_queue is not None and review_queue.ready(REVIEW_BATCH, REVIEW_MAX_WAIT_S):
+                    review_batch(review_queue, pipeline, router, ledger)
+                for job in quota_hold.due():
+                    pipeline.submit(job, stage="upload")
+                for jobs in playlist_batch.due():
+                    for job in flush_playlist(router, ledger, jobs):
+                        pipeline.submit(job, stage="cleanup")
+                time.sleep(10)
+        except KeyboardInterrupt:
+            print("Finishing clips already in flight...")
+            pipeline.close()
+            # What reached the playlist stage on the way out goes in now; the
+            # next run's resume cleans those up.
+            for jobs in playlist_batch.due(force=True):
+                flush_playlist(router, ledger, jobs)
+            router.close()
+        return
+
     while True:
-        msg_id, subject, body = check_email(gmail_service, sender_email)  # CHANGED
-        if msg_id and subject and body:
-            print(f"New Email Received - Subject: {subject}")
-            process_email(gmail_service, msg_id, subject, body, youtube_service)  # CHANGED
+        for msg_id, subject, body in check_new_emails(gmail_service, sender_email):
+            if subject and body:
+                print(f"New Email Received - Subject: {subject}")
+                process_email(gmail_service, msg_id, subject, body, youtube_service, ledger)  # CHANGED
         time.sleep(10)
 
 
@@ -1,14 +1,30 @@
 import os
+import json
+import hashlib
 import time
+import random
+import socket
+import threading
+import httplib2
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from google.auth.transport.requests import Request
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from category_normalizer import ENTERTAINMENT, normalize_categories
+from channel_inventory import iter_upload_ids
+from comment_sweeper import DEFERRED, pin_comment, sweep_pinned_comments
+from description_cache import DescriptionCache, cache_key
+from quota import get_meter, project_of
+from scheduler import LAST_UPLOAD_FILE, PREFERRED_HOURS
+from state_store import advance_timestamp, read_timestamp, update
+
 # Load environment variables
 load_dotenv()
 
@@ -31,7 +47,18 @@ SCOPES = [
     "https://www.googleapis.com/auth/youtube.upload",
     "https://www.googleapis.com/auth/youtube"
 ]
-LAST_UPLOAD_FILE = "last_upload_time.txt"  # File to store the last upload time
+UPLOAD_SESSIONS_FILE = "upload_sessions.json"  # In-flight resumable upload URIs
+PLAYLIST_CACHE_FILE = "playlist_cache.json"  # channel id -> {playlist title: playlist id}
+
+# Bytes per PUT. Must be a multiple of 256 KiB. Bigger chunks mean fewer round
+# trips, smaller ones lose less on a dropped connection; tune with the
+# per-chunk MB/s that upload_video prints.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_MB", "8")) * 1024 * 1024
+MAX_UPLOAD_RETRIES = 8
+RETRIABLE_STATUS_CODES = {500, 502, 503, 504}
+# Transport failures only. socket.error is OSError, which would also retry a
+# missing or locked file eight times over.
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, ConnectionError, TimeoutError, socket.timeout)
 
 
 def authenticate_youtube():
@@ -131,16 +158,28 @@ def expand_emoji_tokens(text: str) -> str:
 
     return TOKEN_BLOCK_RE.sub(repl, text)
 
-def generate_description(video_title: str) -> str:
-    """
-    Midnight Locker Room description generator:
-    - Gen-Z, late-night locker-room vibe
-    - punchy, scroll-optimized
-    - assumes viewer gets it (no explaining)
-    - boosts retention + shares
-    - ends with 5–10 lowercase hashtags (no underscores)
-    """
-    prompt = f"""
+# Bump whenever the prompt below changes, so cached descriptions written for
+# the old prompt stop matching.
+DESCRIPTION_PROMPT_VERSION = "1"
+# The packed prompt in _batch_prompt() has its own version: its outputs are
+# cached apart from single-title ones, so the two prompts' answers never mix.
+DESCRIPTION_BATCH_PROMPT_VERSION = "batch-1"
+DESCRIPTION_VOICE = "midnightlockerroom"
+
+_description_cache = None
+_description_cache_lock = threading.Lock()
+
+
+def get_description_cache():
+    """The process-wide description cache, opened on first use."""
+    global _description_cache
+    with _description_cache_lock:
+        if _description_cache is None:
+            _description_cache = DescriptionCache()
+        return _description_cache
+
+
+DESCRIPTION_BRIEF = """
 You are the copywriter for a YouTube Shorts channel called **Midnight Locker Room**.
 
 CHANNEL DNA (do not restate this in the output):
@@ -163,32 +202,28 @@ OUTPUT FORMAT (exact):
 Line 1: hook (max 90 characters)
 Line 2: punchy follow-up / CTA (max 120 characters)
 Line 3: hashtags only
-
-VIDEO TITLE:
-{video_title}
 """.strip()
 
-    try:
-        response = client.chat.completions.create(
-            # axon/deep = Claude Opus, axon/fast = Sonnet. This call sends no
-            # response_format or tools, so it reaches the Claude leg intact.
-            model=os.getenv("SHORTS_DESC_MODEL", "axon/deep"),
-            messages=[
-                {"role": "system", "content": "You write viral, high-retention YouTube Shorts descriptions in a specific channel voice. Follow the format exactly."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.85,
-        )
-    except Exception as e:
-        # By the time we get here the video is downloaded and the source email
-        # is already marked read, so crashing loses the upload. A plain
-        # description is a far better outcome than an aborted run.
-        print(f"[desc] description model unavailable ({e}); using a static description")
-        return "subscribe for more\n\n#midnightlockerroom #shorts #fyp"
+STATIC_DESCRIPTION = "subscribe for more\n\n#midnightlockerroom #shorts #fyp"
+
+
+def _write_descriptions(prompt: str, model: str) -> str:
+    """One chat completion in the channel voice; returns the raw text."""
+    response = client.chat.completions.create(
+        # axon/deep = Claude Opus, axon/fast = Sonnet. This call sends no
+        # response_format or tools, so it reaches the Claude leg intact.
+        model=model,
+        messages=[
+            {"role": "system", "content": "You write viral, high-retention YouTube Shorts descriptions in a specific channel voice. Follow the format exactly."},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.85,
+    )
+    return response.choices[0].message.content.strip()
 
-    text = response.choices[0].message.content.strip()
 
-    # Optional cleanup: ensure hashtags are on last line and are lowercase/no underscores
+def _clean_description(text: str) -> str:
+    """Optional cleanup: ensure hashtags are on last line and are lowercase/no underscores."""
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     if len(lines) < 3:
         return text  # keep as-is if model didn’t comply fully
@@ -199,42 +234,260 @@ VIDEO TITLE:
     return "\n".join(lines[:2] + [lines[-1]])
 
 
+def generate_description(video_title: str, use_cache: bool = True) -> str:
+    """
+    Midnight Locker Room description generator:
+    - Gen-Z, late-night locker-room vibe
+    - punchy, scroll-optimized
+    - assumes viewer gets it (no explaining)
+    - boosts retention + shares
+    - ends with 5–10 lowercase hashtags (no underscores)
+    Retries and re-uploads of the same title come from the on-disk cache.
+    """
+    model = os.getenv("SHORTS_DESC_MODEL", "axon/deep")
+    key = cache_key(video_title, DESCRIPTION_PROMPT_VERSION, model, DESCRIPTION_VOICE)
+    if use_cache:
+        cache = get_description_cache()
+        cached = cache.get(key)
+        stats = cache.stats()
+        if cached is not None:
+            print(f"[desc] cache hit ({stats['hits']}/{stats['hits'] + stats['misses']} this run)")
+            return cached
+
+    prompt = f"{DESCRIPTION_BRIEF}\n\nVIDEO TITLE:\n{video_title}"
+
+    try:
+        text = _write_descriptions(prompt, model)
+    except Exception as e:
+        # By the time we get here the video is downloaded and the source email
+        # is already marked read, so crashing loses the upload. A plain
+        # description is a far better outcome than an aborted run.
+        print(f"[desc] description model unavailable ({e}); using a static description")
+        return STATIC_DESCRIPTION
+
+    description = _clean_description(text)
 
-def add_to_playlist(youtube, playlist_name, video_id):
-    """Add a video to a specific playlist."""
-    # Get the playlist ID for the given playlist name
-    playlists_response = youtube.playlists().list(
-        part="snippet",
-        mine=True,
-        maxResults=50
-    ).execute()
-
-    playlist_id = None
-    for playlist in playlists_response["items"]:
-        if playlist["snippet"]["title"] == playlist_name:
-            playlist_id = playlist["id"]
-            break
-
-    if not playlist_id:
-        # Create the playlist if it doesn't exist
-        playlist_request = {
-            "snippet": {
-                "title": playlist_name,
-                "description": f"Auto-generated playlist for {playlist_name} videos"
-            },
-            "status": {
-                "privacyStatus": "public"
+    # Only model output is cached; the static fallback above is not.
+    if use_cache:
+        get_description_cache().put(key, video_title, description)
+    return description
+
+
+
+_description_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="desc")
+
+
+def generate_description_async(video_title: str):
+    """
+    Start generate_description() in the background and return its Future, so
+    the model call overlaps with whatever comes next. Call .result() only at
+    the point the description is actually needed.
+    """
+    return _description_pool.submit(generate_description, video_title)
+
+
+# Titles per packed request, and packed requests in flight at once.
+DESCRIPTION_BATCH_SIZE = 15
+DESCRIPTION_BATCH_CONCURRENCY = 3
+
+_BATCH_MARKER_RE = re.compile(r"^\s*===\s*(\d+)\s*===\s*$", re.MULTILINE)
+
+
+def _batch_prompt(titles):
+    numbered = "\n".join(f"{i}. {title}" for i, title in enumerate(titles, 1))
+    return (
+        f"{DESCRIPTION_BRIEF}\n\n"
+        "You are given several numbered video titles. Write one description per "
+        "title in the format above. Before each one put a line containing only "
+        "=== N === where N is that title's number, and write nothing else.\n\n"
+        f"VIDEO TITLES:\n{numbered}"
+    )
+
+
+def _split_batch_output(text, count):
+    """{index: raw description} for every well-formed === N === section."""
+    parts = _BATCH_MARKER_RE.split(text)
+    out = {}
+    # parts = [preamble, n1, body1, n2, body2, ...]
+    for number, body in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        if 0 <= index < count and body.strip():
+            out[index] = body.strip()
+    return out
+
+
+def generate_descriptions(titles, use_cache=True):
+    """
+    Descriptions for a backlog of titles, in the same order.
+
+    Cached titles are answered locally. The rest are packed
+    DESCRIPTION_BATCH_SIZE to a request, with up to
+    DESCRIPTION_BATCH_CONCURRENCY requests in flight, so a 30-clip backlog is
+    one or two round trips instead of 30. Each answer goes through the same
+    cleanup as generate_description(); a title the model skipped or whose
+    request failed gets the static description.
+    """
+    model = os.getenv("SHORTS_DESC_MODEL", "axon/deep")
+    keys = [cache_key(t, DESCRIPTION_BATCH_PROMPT_VERSION, model, DESCRIPTION_VOICE) for t in titles]
+    results = [None] * len(titles)
+
+    pending = []
+    for i, key in enumerate(keys):
+        cached = get_description_cache().get(key) if use_cache else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+    if use_cache and len(pending) < len(titles):
+        print(f"[desc] {len(titles) - len(pending)}/{len(titles)} descriptions from cache")
+
+    chunks = [pending[i:i + DESCRIPTION_BATCH_SIZE]
+              for i in range(0, len(pending), DESCRIPTION_BATCH_SIZE)]
+
+    def run(chunk):
+        try:
+            text = _write_descriptions(_batch_prompt([titles[i] for i in chunk]), model)
+        except Exception as e:
+            print(f"[desc] batch of {len(chunk)} failed ({e}); using static descriptions")
+            return chunk, {}
+        return chunk, _split_batch_output(text, len(chunk))
+
+    with ThreadPoolExecutor(max_workers=DESCRIPTION_BATCH_CONCURRENCY) as pool:
+        for chunk, answers in pool.map(run, chunks):
+            for position, i in enumerate(chunk):
+                if position in answers:
+                    results[i] = _clean_description(answers[position])
+                    if use_cache:
+                        get_description_cache().put(keys[i], titles[i], results[i])
+                else:
+                    print(f"[desc] no description came back for {titles[i]!r}; using a static one")
+                    results[i] = STATIC_DESCRIPTION
+    return results
+
+
+def generate_descriptions_async(titles):
+    """
+    One Future per title, all answered by a single generate_descriptions()
+    call in the background, for titles that were reviewed together.
+    """
+    futures = [Future() for _ in titles]
+
+    def run():
+        try:
+            results = generate_descriptions(titles)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, description in zip(futures, results):
+            future.set_result(description)
+
+    if titles:
+        _description_pool.submit(run)
+    return futures
+
+
+_playlist_lock = threading.Lock()
+
+
+def _channel_id(youtube):
+    """The authenticated channel's id, looked up once per service object."""
+    if not getattr(youtube, "_channel_id", None):
+        items = youtube.channels().list(part="id", mine=True).execute().get("items", [])
+        if not items:
+            # Caching under a placeholder would mix every such account's
+            # playlists into one entry.
+            raise RuntimeError("the authorized account has no YouTube channel")
+        youtube._channel_id = items[0]["id"]
+    return youtube._channel_id
+
+
+def _load_playlist_cache():
+    if os.path.exists(PLAYLIST_CACHE_FILE):
+        try:
+            with open(PLAYLIST_CACHE_FILE, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable {PLAYLIST_CACHE_FILE}: {e}")
+    return {}
+
+
+def _update_json_file(path, change):
+    """
+    Apply change(data) to a JSON state file: read-modify-write under the file
+    lock and written atomically, so another process's entries aren't lost and
+    a crash can't leave the file truncated.
+    """
+    def apply(text):
+        try:
+            data = json.loads(text) if text else {}
+        except ValueError as e:
+            print(f"Warning: ignoring unreadable {path}: {e}")
+            data = {}
+        change(data)
+        return json.dumps(data, indent=2)
+
+    update(path, apply)
+
+
+def _save_playlist_cache(channel_id, playlists):
+    """Replace one channel's entry, keeping whatever other channels have stored."""
+    _update_json_file(PLAYLIST_CACHE_FILE, lambda cache: cache.update({channel_id: playlists}))
+
+
+def _list_all_playlists(youtube):
+    """Every playlist on the channel as {title: id}, following every page."""
+    playlists = {}
+    request = youtube.playlists().list(part="snippet", mine=True, maxResults=50)
+    while request:
+        response = request.execute()
+        for playlist in response.get("items", []):
+            # Keep the first (oldest listed) one if a title is duplicated.
+            playlists.setdefault(playlist["snippet"]["title"], playlist["id"])
+        request = youtube.playlists().list_next(request, response)
+    return playlists
+
+
+def resolve_playlist_id(youtube, playlist_name, refresh=False):
+    """
+    Playlist id for a title on this channel, from the on-disk cache when
+    possible. On a miss the full playlist list is re-read (all pages, not just
+    the first 50), and only if the title is still missing is a playlist created.
+    """
+    channel_id = _channel_id(youtube)
+    with _playlist_lock:
+        cache = _load_playlist_cache()
+        channel_cache = cache.setdefault(channel_id, {})
+        if not refresh and playlist_name in channel_cache:
+            return channel_cache[playlist_name]
+
+        channel_cache.clear()
+        channel_cache.update(_list_all_playlists(youtube))
+
+        if playlist_name not in channel_cache:
+            # Create the playlist if it doesn't exist
+            playlist_request = {
+                "snippet": {
+                    "title": playlist_name,
+                    "description": f"Auto-generated playlist for {playlist_name} videos"
+                },
+                "status": {
+                    "privacyStatus": "public"
+                }
             }
-        }
-        playlist_response = youtube.playlists().insert(
-            part="snippet,status",
-            body=playlist_request
-        ).execute()
-        playlist_id = playlist_response["id"]
-        print(f"Created new playlist: {playlist_name}")
+            playlist_response = youtube.playlists().insert(
+                part="snippet,status",
+                body=playlist_request
+            ).execute()
+            channel_cache[playlist_name] = playlist_response["id"]
+            print(f"Created new playlist: {playlist_name}")
 
-    # Add the video to the playlist
-    request_body = {
+        _save_playlist_cache(channel_id, channel_cache)
+        return channel_cache[playlist_name]
+
+
+def _playlist_item(playlist_id, video_id):
+    return {
         "snippet": {
             "playlistId": playlist_id,
             "resourceId": {
@@ -244,16 +497,247 @@ def add_to_playlist(youtube, playlist_name, video_id):
         }
     }
 
-    youtube.playlistItems().insert(
-        part="snippet",
-        body=request_body
-    ).execute()
 
-    print(f"Video added to playlist: {playlist_name}")
+def _playlist_missing(exception):
+    """True for the 404 YouTube gives when the playlist id no longer exists."""
+    if not isinstance(exception, HttpError):
+        return False
+    return exception.resp.status == 404 or b"playlistNotFound" in (exception.content or b"")
+
+
+def add_videos_to_playlist(youtube, playlist_name, video_ids):
+    """
+    Add several videos to one playlist: one id lookup, then every insert in a
+    single batch request. Returns the ids that were added.
+
+    A 404 means the cached playlist was deleted on YouTube; the cache entry is
+    refreshed and those inserts are retried once, one at a time. Any other
+    failure is reported and left out of the result, so the caller can retry
+    just those ids without re-adding the rest.
+    """
+    if not video_ids:
+        return []
+    playlist_id = resolve_playlist_id(youtube, playlist_name)
+
+    added, stale = [], []
+
+    def on_insert(request_id, response, exception):
+        if exception is None:
+            added.append(request_id)
+        elif _playlist_missing(exception):
+            stale.append(request_id)
+        else:
+            print(f"Could not add {request_id} to playlist '{playlist_name}': {exception}")
+
+    if len(video_ids) == 1:
+        try:
+            youtube.playlistItems().insert(
+                part="snippet", body=_playlist_item(playlist_id, video_ids[0])
+            ).execute()
+            on_insert(video_ids[0], {}, None)
+        except HttpError as e:
+            on_insert(video_ids[0], None, e)
+    else:
+        # Batched calls skip MeteredRequest.execute(), so charge them here.
+        get_meter().charge("youtube.playlistItems.insert", len(video_ids), project_of(youtube))
+        batch = youtube.new_batch_http_request(callback=on_insert)
+        for video_id in video_ids:
+            batch.add(
+                youtube.playlistItems().insert(
+                    part="snippet", body=_playlist_item(playlist_id, video_id)
+                ),
+                request_id=video_id,
+            )
+        batch.execute()
+
+    if stale:
+        print(f"Playlist '{playlist_name}' not found under its cached id; refreshing.")
+        try:
+            playlist_id = resolve_playlist_id(youtube, playlist_name, refresh=True)
+        except Exception as e:
+            print(f"Could not refresh playlist '{playlist_name}': {e}")
+            stale = []
+        for video_id in stale:
+            try:
+                youtube.playlistItems().insert(
+                    part="snippet", body=_playlist_item(playlist_id, video_id)
+                ).execute()
+                added.append(video_id)
+            except Exception as e:
+                print(f"Could not add {video_id} to playlist '{playlist_name}': {e}")
+
+    print(f"{len(added)} video(s) added to playlist: {playlist_name}")
+    return added
+
+
+def add_to_playlist(youtube, playlist_name, video_id):
+    """Add a video to a specific playlist."""
+    if not add_videos_to_playlist(youtube, playlist_name, [video_id]):
+        raise RuntimeError(f"could not add {video_id} to playlist '{playlist_name}'")
+
+
+_sessions_lock = threading.Lock()
+
+
+def _session_key(file_path, metadata=""):
+    """
+    Same path, size, mtime and request body -> same upload. A re-downloaded
+    file starts over, and so does one being sent with a different title,
+    description or publishAt: a resumed session keeps the metadata it was
+    opened with.
+    """
+    st = os.stat(file_path)
+    digest = hashlib.sha256((metadata or "").encode("utf-8")).hexdigest()[:16]
+    return f"{os.path.abspath(file_path)}|{st.st_size}|{int(st.st_mtime)}|{digest}"
+
+
+def _load_sessions():
+    if os.path.exists(UPLOAD_SESSIONS_FILE):
+        try:
+            with open(UPLOAD_SESSIONS_FILE, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable {UPLOAD_SESSIONS_FILE}: {e}")
+    return {}
+
+
+def _update_session(key, uri):
+    """Record (or with uri=None, forget) the session URI for one file."""
+    def change(sessions):
+        if uri:
+            sessions[key] = {"uri": uri, "saved_at": datetime.now(timezone.utc).isoformat()}
+        else:
+            sessions.pop(key, None)
+
+    with _sessions_lock:
+        _update_json_file(UPLOAD_SESSIONS_FILE, change)
+
+
+def _drop_other_sessions(key):
+    """Forget saved sessions for the same file opened with other metadata."""
+    file_part = key.rsplit("|", 1)[0] + "|"
+    stale = [k for k in _load_sessions() if k.startswith(file_part) and k != key]
+    for k in stale:
+        print("⚠️ Saved upload session for this file had a different title or schedule; "
+              "starting a new upload.")
+        _update_session(k, None)
+
+
+def _session_status(request):
+    """
+    Ask the server how much of the session at request.resumable_uri it has:
+    the resumable protocol's empty PUT with "Content-Range: bytes */<size>".
+    Returns the API response if the upload had in fact completed; otherwise
+    moves request.resumable_progress to the first byte the server is missing
+    and returns None.
+    """
+    size = request.resumable.size()
+    headers = {"Content-Range": f"bytes */{'*' if size is None else size}", "Content-Length": "0"}
+    resp, content = request.http.request(request.resumable_uri, method="PUT", headers=headers)
+    if resp.status in (200, 201):
+        return request.postproc(resp, content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=request.resumable_uri)
+    confirmed = resp.get("range")  # "bytes=0-<last byte received>", absent if none
+    request.resumable_progress = int(confirmed.rsplit("-", 1)[1]) + 1 if confirmed else 0
+    return None
+
+
+def resumable_upload(request, file_path, on_chunk=None, metadata=None):
+    """
+    Drive a resumable videos.insert request chunk by chunk.
+
+    - 5xx responses and socket errors are retried with exponential backoff and
+      the upload carries on from the last byte the server confirmed.
+    - The session URI is saved to UPLOAD_SESSIONS_FILE as soon as it exists, so
+      a process killed mid-upload resumes the same session on the next run
+      instead of re-sending the whole file.
+    - on_chunk(bytes_sent, total_bytes, seconds) is called after every chunk.
+    Returns the API response once the upload completes.
+
+    With file_path=None (media still being downloaded) nothing is saved.
+    metadata: the request body as a string, part of the session key; defaults
+    to the body the request carries.
+    """
+    if metadata is None:
+        metadata = getattr(request, "body", None) or ""
+    key = _session_key(file_path, metadata) if file_path else None
+    saved = _load_sessions().get(key) if key else None
+    if key and not saved:
+        _drop_other_sessions(key)
+    if saved:
+        print(f"Resuming interrupted upload session for {file_path}")
+        request.resumable_uri = saved["uri"]
+    # Ask the server how far a resumed session got before sending any bytes.
+    probe = bool(saved)
 
+    response = None
+    retry = 0
+    while response is None:
+        sent_before = request.resumable_progress
+        started = time.monotonic()
+        try:
+            if probe:
+                status, response = None, _session_status(request)
+                probe = False
+            else:
+                status, response = request.next_chunk()
+        except HttpError as e:
+            if saved and e.resp.status in (404, 410):
+                # Sessions expire after about a week; start a fresh one.
+                print("Saved upload session has expired; starting over.")
+                _update_session(key, None)
+                saved = None
+                probe = False
+                request.resumable_uri = None
+                request.resumable_progress = 0
+                continue
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                # The server refused the upload itself; resuming it won't help.
+                if saved:
+                    _update_session(key, None)
+                raise
+            error = f"HTTP {e.resp.status}"
+        except RETRIABLE_EXCEPTIONS as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            error = None
+            retry = 0
+            if key and not saved and request.resumable_uri:
+                _update_session(key, request.resumable_uri)
+                saved = {"uri": request.resumable_uri}
+            if status:
+                elapsed = time.monotonic() - started
+                sent = status.resumable_progress - sent_before
+                rate = sent / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+                print(f"  upload {int(status.progress() * 100)}% "
+                      f"({sent / (1024 * 1024):.1f} MB in {elapsed:.1f}s, {rate:.1f} MB/s)")
+                if on_chunk:
+                    on_chunk(status.resumable_progress, status.total_size, elapsed)
+
+        if error:
+            retry += 1
+            if retry > MAX_UPLOAD_RETRIES:
+                raise RuntimeError(f"Upload gave up after {MAX_UPLOAD_RETRIES} retries ({error})")
+            delay = min(2 ** retry, 64) + random.random()
+            print(f"  upload error ({error}); retry {retry}/{MAX_UPLOAD_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+
+    if key:
+        _update_session(key, None)
+    return response
 
-def upload_video(youtube, file_path, title, description, tags, scheduled_time, playlist_name):
-    """Upload video to YouTube and add it to a playlist."""
+
+def upload_video(youtube, file_path, title, description, tags, scheduled_time, playlist_name,
+                 delete_after_upload=True, chunk_size=UPLOAD_CHUNK_SIZE, on_chunk=None,
+                 media_body=None):
+    """
+    Upload video to YouTube and add it to a playlist.
+    Pass delete_after_upload=False when a later step owns removing the file.
+    The upload is chunked and resumable; see resumable_upload().
+    media_body: upload from this instead of reading file_path, e.g. a
+    GrowingFileUpload fed by a download still in progress.
+    """
     # Make sure the scheduled_time is in UTC and properly formatted for YouTube API
     if isinstance(scheduled_time, datetime):
         scheduled_time = scheduled_time.isoformat().replace("+00:00", "Z")
@@ -261,13 +745,13 @@ def upload_video(youtube, file_path, title, description, tags, scheduled_time, p
     print(f"Debug: Attempting to schedule video at {scheduled_time}")  # Debugging scheduled time
 
     # Verify the file exists before attempting upload
-    if not os.path.exists(file_path):
+    if media_body is None and not os.path.exists(file_path):
         print(f"Error: File does not exist: {file_path}")
         return None
         
-    # Check if it's a valid video file by extension
+    # Check if it's a valid video file by extension (a media_body may have no file_path)
     valid_video_extensions = ['.mp4', '.mov', '.avi', '.wmv', '.flv', '.mkv']
-    if not any(file_path.lower().endswith(ext) for ext in valid_video_extensions):
+    if media_body is None and not any(file_path.lower().endswith(ext) for ext in valid_video_extensions):
         print(f"Warning: File may not be a video file: {file_path}")
     
     request_body = {
@@ -291,19 +775,23 @@ def upload_video(youtube, file_path, title, description, tags, scheduled_time, p
     media_file = None
     try:
         print(f"Starting upload of file: {file_path}")
-        media_file = MediaFileUpload(file_path, chunksize=-1, resumable=True)
+        media_file = media_body or MediaFileUpload(file_path, chunksize=chunk_size, resumable=True)
         
-        response = youtube.videos().insert(
+        insert_request = youtube.videos().insert(
             part="snippet,status",
             body=request_body,
             media_body=media_file
-        ).execute()
+        )
+        # A still-growing download has no stable size/mtime to key a saved session on.
+        response = resumable_upload(insert_request, None if media_body else file_path, on_chunk,
+                                    metadata=json.dumps(request_body, sort_keys=True))
 
         print(f"Video uploaded successfully. Video ID: {response['id']}")
         upload_successful = True
 
-        # Add the video to the specified playlist
-        add_to_playlist(youtube, playlist_name, response["id"])
+        # Add the video to the specified playlist (None leaves it to the caller)
+        if playlist_name:
+            add_to_playlist(youtube, playlist_name, response["id"])
         
     except Exception as e:
         print(f"Error uploading video: {e}")
@@ -321,7 +809,7 @@ def upload_video(youtube, file_path, title, description, tags, scheduled_time, p
                 print(f"Error closing media file: {e}")
         
         # Only delete if upload was successful
-        if upload_successful:
+        if upload_successful and delete_after_upload and file_path:
             # Add a short delay to ensure file handles are fully released
             import time
             time.sleep(7)
@@ -350,18 +838,16 @@ def upload_video(youtube, file_path, title, description, tags, scheduled_time, p
 
 def read_last_upload_time():
     """Read the last upload time from the file."""
-    if os.path.exists(LAST_UPLOAD_FILE):
-        with open(LAST_UPLOAD_FILE, "r") as file:
-            timestamp = file.read().strip()
-            if timestamp:
-                return datetime.fromisoformat(timestamp)
-    return None
+    return read_timestamp(LAST_UPLOAD_FILE)
 
 
 def write_last_upload_time(upload_time):
-    """Write the last upload time to the file."""
-    with open(LAST_UPLOAD_FILE, "w") as file:
-        file.write(upload_time.isoformat())
+    """
+    Write the last upload time to the file: atomically, and only forward, so
+    another instance that already scheduled a later slot isn't overwritten.
+    """
+    if not advance_timestamp(LAST_UPLOAD_FILE, upload_time):
+        print(f"Last upload time already at or past {upload_time}; left as is.")
 
 
 def calculate_next_upload_time(youtube, last_upload_time=None, check_youtube_api=False):
@@ -370,7 +856,7 @@ def calculate_next_upload_time(youtube, last_upload_time=None, check_youtube_api
     Uses last_upload_time.txt as the source of truth.
     """
     # Define preferred upload times in local time (every 3 hours throughout the day)
-    preferred_hours = [0, 3, 6, 9, 12, 15, 18, 21]  # 12am, 3am, 6am, 9am, 12pm, 3pm, 6pm, 9pm
+    preferred_hours = PREFERRED_HOURS  # 12am, 3am, 6am, 9am, 12pm, 3pm, 6pm, 9pm
     #preferred_hours = [9, 12, 15, 18, 21]  #9am, 12pm, 3pm, 6pm, 9pm
     #preferred_hours = [9, 13, 17, 21]  #9am, 1pm, 5pm, 9pm
     # Get current time in local timezone
@@ -513,127 +999,47 @@ def calculate_next_upload_time(youtube, last_upload_time=None, check_youtube_api
     
     return next_slot_utc
 
-def update_all_video_categories_to_entertainment(youtube):
-    """Update the category of all uploaded videos to 'Entertainment'."""
-    # Use the search.list() method to retrieve uploaded videos
-    request = youtube.search().list(
-        part="id",
-        forMine=True,
-        type="video",
-        maxResults=500  # Fetch up to 50 videos per request
-    )
-
-    response = request.execute()
-
-    for item in response.get("items", []):
-        video_id = item["id"]["videoId"]
-
-        # Retrieve the full snippet for the video
-        video_request = youtube.videos().list(
-            part="snippet",
-            id=video_id
-        )
-        video_response = video_request.execute()
-
-        if video_response["items"]:
-            video = video_response["items"][0]
-            snippet = video["snippet"]
-            current_category = snippet.get("categoryId")
+def update_all_video_categories_to_entertainment(youtube, client=None, dry_run=False):
+    """Update the category of all uploaded videos to 'Entertainment'.
 
-            if current_category != "24":
-                print(f"Updating video '{snippet['title']}' (ID: {video_id}) to category 'Entertainment'.")
-                
-                snippet["categoryId"] = "24"  # Set to Entertainment
-
-                youtube.videos().update(
-                    part="snippet",
-                    body={
-                        "id": video_id,
-                        "snippet": snippet
-                    }
-                ).execute()
-
-                print(f"Video '{snippet['title']}' updated successfully.")
-            else:
-                print(f"Video '{snippet['title']}' is already in the 'Entertainment' category.")
-
-    print("All videos processed.")
+    See category_normalizer.normalize_categories(): snippets are read 50 at a
+    time, only videos in another category are updated (concurrently when a
+    youtube_client.YouTubeClient is given), and progress is checkpointed.
+    """
+    return normalize_categories(youtube, ENTERTAINMENT, client=client, dry_run=dry_run)
 
 def get_all_uploaded_videos(youtube):
-    """Retrieve all uploaded videos for the authenticated user's channel."""
-    videos = []
-    request = youtube.search().list(
-        part="id",
-        forMine=True,
-        type="video",
-        maxResults=50
-    )
-    while request:
-        response = request.execute()
-        for item in response.get("items", []):
-            video_id = item["id"]["videoId"]
-            videos.append(video_id)
-        request = youtube.search().list_next(request, response)
-    return videos
+    """Retrieve all uploaded videos for the authenticated user's channel, newest first.
+
+    Read from the channel's uploads playlist: 1 quota unit per 50 videos, where
+    search.list cost 100 a page and could leave videos out. For repeated runs,
+    channel_inventory.sync_inventory() keeps the list locally and only reads
+    what is new.
+    """
+    return list(iter_upload_ids(youtube))
 
 
 def comment_and_pin_on_video(youtube, video_id, comment_text="Like and subscribe for more!"):
     """Comment on a video and pin the comment only if there isn't already a pinned comment."""
     try:
-        # Step 1: Check if there's already a pinned comment
-        comment_threads_response = youtube.commentThreads().list(
-            part="snippet",
-            videoId=video_id,
-            maxResults=100  # Fetch up to 100 comments
-        ).execute()
-
-        for comment_thread in comment_threads_response.get("items", []):
-            # Check if the comment is pinned
-            comment_snippet = comment_thread["snippet"]["topLevelComment"]["snippet"]
-            if comment_snippet.get("isPinned", False):
-                print(f"A pinned comment already exists for video {video_id}: {comment_snippet['textDisplay']}")
-                return
-
-        # Step 2: No pinned comment exists; post and pin a new comment
-        print(f"No pinned comment found for video {video_id}. Posting a new comment...")
-        comment_request_body = {
-            "snippet": {
-                "videoId": video_id,
-                "topLevelComment": {
-                    "snippet": {
-                        "textOriginal": comment_text
-                    }
-                }
-            }
-        }
-
-        comment_response = youtube.commentThreads().insert(
-            part="snippet",
-            body=comment_request_body
-        ).execute()
-
-        comment_id = comment_response["id"]
-        print(f"Comment posted successfully for video {video_id}. Comment ID: {comment_id}")
-
-        # Step 3: Pin the new comment
-        youtube.comments().setModerationStatus(
-            id=comment_id,
-            moderationStatus="published",
-            banAuthor=False
-        ).execute()
-        print(f"Comment pinned successfully for video {video_id}")
-
+        status = pin_comment(youtube, video_id, comment_text)
     except Exception as e:
         print(f"Error processing comments for video {video_id}: {e}")
+        return
+    if status == DEFERRED:
+        print(f"Quota reserved for uploads; deferring the pinned comment on {video_id}.")
+    else:
+        print(f"Video {video_id}: {status}")
 
 
-def process_all_videos_and_comment(youtube, comment_text="Like and subscribe for more!"):
-    """Retrieve all videos and add a pinned comment if none exists."""
-    videos = get_all_uploaded_videos(youtube)
-    print(f"Retrieved {len(videos)} videos from the channel.")
-    for video_id in videos:
-        comment_and_pin_on_video(youtube, video_id, comment_text)
-    print("Processed all videos.")
+def process_all_videos_and_comment(youtube, comment_text="Like and subscribe for more!", client=None):
+    """Add a pinned comment to every video that doesn't have one yet.
+
+    See comment_sweeper.sweep_pinned_comments(): only videos not settled on an
+    earlier run are visited, concurrently when a youtube_client.YouTubeClient
+    is given, and the result is printed as one summary.
+    """
+    return sweep_pinned_comments(youtube, comment_text, client=client)
 
 def main():
     youtube = authenticate_youtube()
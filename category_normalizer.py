@@ -0,0 +1,143 @@
+"""Set every video on a channel to one category, in bulk.
+
+The old sweep did a videos.list and a videos.update per video, one after the
+other, and updated videos that were already right. This lists the channel
+from its uploads playlist, reads snippets 50 ids per videos.list call, and
+only updates the videos whose categoryId differs, several at a time through a
+YouTubeClient. A checkpoint file remembers which videos are settled, so a run
+cut short by the quota reserve or Ctrl+C picks up where it stopped.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+from channel_inventory import PAGE_SIZE, fetch_videos, iter_upload_ids, uploads_playlist_id
+from quota import LOW, get_meter, project_of, unit_cost
+from state_store import update
+
+CATEGORY_CHECKPOINT_FILE = "category_checkpoint.json"
+ENTERTAINMENT = "24"
+
+
+def _load_checkpoint(path: str, key: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return set(json.load(file).get(key, []))
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable {path}: {e}")
+        return set()
+
+
+def _save_checkpoint(path: str, key: str, done: set[str]) -> None:
+    """Replace this channel's entry under the file lock, keeping other runs' progress."""
+    def merge(text):
+        try:
+            data = json.loads(text) if text else {}
+        except ValueError:
+            data = {}
+        return json.dumps({**data, key: sorted(done)})
+
+    update(path, merge)
+
+
+def _set_category(youtube, video, category_id):
+    snippet = dict(video["snippet"])
+    snippet["categoryId"] = category_id
+    # videos.update rejects the read-only parts videos.list hands back.
+    snippet.pop("localized", None)
+    snippet.pop("thumbnails", None)
+    youtube.videos().update(part="snippet", body={"id": video["id"], "snippet": snippet}).execute()
+    return video["id"]
+
+
+def normalize_categories(youtube, category_id: str = ENTERTAINMENT, client=None,
+                         dry_run: bool = False,
+                         checkpoint: str = CATEGORY_CHECKPOINT_FILE) -> dict:
+    """
+    Put every upload on the channel in `category_id`. Returns a summary.
+
+    Args:
+        youtube: service used for the listing and the batched reads.
+        client: a youtube_client.YouTubeClient for the channel; the updates run
+            concurrently on its workers. Without one they run one at a time.
+        dry_run: report what would change without updating anything or
+            touching the checkpoint.
+        checkpoint: file of videos already in the category, per channel.
+
+    Low priority: stops once the day's quota is down to the upload reserve,
+    and doesn't start listing the channel without room for a batch after the
+    walk; the videos it didn't get to are left for the next run.
+    """
+    channel_id, _ = uploads_playlist_id(youtube)
+    key = f"{channel_id}:{category_id}"
+    done = _load_checkpoint(checkpoint, key)
+    summary = {"checked": 0, "changed": 0, "updated": 0, "failed": 0, "deferred": 0}
+    project = project_of(youtube)
+    update_cost = unit_cost("youtube.videos.update")
+
+    # The walk lists every settled video again, a unit per page, before the
+    # first read; don't spend that unless there is room for a batch after it.
+    walk_cost = unit_cost("youtube.playlistItems.list") * (len(done) // PAGE_SIZE + 1)
+    first_batch = unit_cost("youtube.videos.list") + (0 if dry_run else update_cost)
+    if not get_meter().affordable(walk_cost + first_batch, LOW, project):
+        print("Quota reserved for uploads; not starting the category sweep.")
+        return summary
+
+    pending = [v for v in iter_upload_ids(youtube) if v not in done]
+
+    for i in range(0, len(pending), PAGE_SIZE):
+        chunk = pending[i:i + PAGE_SIZE]
+        if not get_meter().affordable(unit_cost("youtube.videos.list"), LOW, project):
+            summary["deferred"] += len(pending) - i
+            break
+        videos = fetch_videos(youtube, chunk, part="snippet")
+        summary["checked"] += len(videos)
+        wrong = [v for v in videos if v["snippet"].get("categoryId") != category_id]
+        summary["changed"] += len(wrong)
+        settled = {v["id"] for v in videos} - {v["id"] for v in wrong}
+
+        if dry_run:
+            for v in wrong:
+                print(f"[dry run] '{v['snippet']['title']}' ({v['id']}): "
+                      f"category {v['snippet'].get('categoryId')} -> {category_id}")
+            continue
+
+        affordable = []
+        for v in wrong:
+            if get_meter().affordable(update_cost * (len(affordable) + 1), LOW, project):
+                affordable.append(v)
+        summary["deferred"] += len(wrong) - len(affordable)
+
+        if client is None:
+            results = []
+            for v in affordable:
+                try:
+                    results.append(_set_category(youtube, v, category_id))
+                except Exception as e:
+                    results.append(e)
+        else:
+            results = client.map(lambda yt, v: _set_category(yt, v, category_id),
+                                 affordable, return_exceptions=True)
+
+        for v, result in zip(affordable, results):
+            if isinstance(result, Exception):
+                summary["failed"] += 1
+                print(f"Could not update '{v['snippet']['title']}' ({v['id']}): {result}")
+            else:
+                summary["updated"] += 1
+                settled.add(v["id"])
+
+        done |= settled
+        _save_checkpoint(checkpoint, key, done)
+        if len(affordable) < len(wrong):
+            summary["deferred"] += len(pending) - i - len(chunk)
+            break
+
+    print(f"Categories: {summary['checked']} checked, {summary['changed']} "
+          f"{'would change' if dry_run else 'needed a change'}, {summary['updated']} updated, "
+          f"{summary['failed']} failed, {summary['deferred']} deferred for quota")
+    return summary
@@ -8,6 +8,7 @@ needs `.\` before a relative executable:
     .\.venv\Scripts\python.exe channel_auth.py add       # authorize one channel
     .\.venv\Scripts\python.exe channel_auth.py list      # channels + token health
     .\.venv\Scripts\python.exe channel_auth.py refresh   # keep every token warm
+    .\.venv\Scripts\python.exe channel_auth.py list --json   # same, for other tools
     .\.venv\Scripts\python.exe channel_auth.py remove <slug>
 
 Why one token per channel
@@ -63,13 +64,17 @@ import argparse
 import json
 import re
 import sys
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+
+from state_store import locked_write
+from token_manager import cached_service
 
 REPO = Path(__file__).resolve().parent
 TOKEN_DIR = REPO / "tokens"
@@ -84,6 +89,13 @@ SCOPES = [
 # Google drops a refresh token after 6 months unused. Warn well before that.
 STALE_AFTER_DAYS = 120
 
+# `list` / `refresh` check this many tokens at once, give each this long, and
+# leave an access token alone while it still has this much life in it.
+HEALTH_WORKERS = 8
+HEALTH_TIMEOUT_S = 20
+NOT_CHECKED = "not checked"
+REFRESH_MARGIN_MIN = 10
+
 
 def slugify(name: str) -> str:
     s = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
@@ -96,7 +108,7 @@ def token_path(slug: str) -> Path:
 
 def _identify(creds: Credentials) -> dict:
     """Which channel did we actually just get? Ask, never assume."""
-    yt = build("youtube", "v3", credentials=creds)
+    yt = cached_service("youtube", "v3", creds, "channel_auth")
     items = yt.channels().list(part="snippet,statistics", mine=True).execute().get("items", [])
     if not items:
         raise RuntimeError(
@@ -120,7 +132,8 @@ def _write(slug: str, creds: Credentials, info: dict) -> Path:
     # The channel this token is for, carried alongside the credentials so
     # nothing downstream has to guess or hit the API to find out.
     data["_channel"] = {**info, "slug": slug, "authorized_at": _now_iso()}
-    p.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    # `refresh` may run while an upload is reading this token.
+    locked_write(str(p), json.dumps(data, indent=2))
     return p
 
 
@@ -136,23 +149,43 @@ def load(slug: str) -> tuple[Credentials, dict]:
     return Credentials.from_authorized_user_info(raw, SCOPES), raw.get("_channel", {})
 
 
-def health(slug: str) -> dict:
-    """Is this token usable right now? Refreshes if it can, reports honestly."""
+class _TimedRequest(Request):
+    """google-auth transport whose every call gives up after `timeout` seconds."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self._timeout = timeout
+
+    def __call__(self, *args, **kwargs):
+        kwargs["timeout"] = self._timeout
+        return super().__call__(*args, **kwargs)
+
+
+def health(slug: str, margin_min: float = REFRESH_MARGIN_MIN,
+           http_timeout: float | None = None) -> dict:
+    """Is this token usable right now? Refreshes if it can, reports honestly.
+
+    An access token with more than `margin_min` minutes left is reported as
+    valid without a refresh round trip or a file rewrite. `http_timeout`
+    bounds the refresh request.
+    """
     try:
         creds, meta = load(slug)
     except Exception as e:
         return {"slug": slug, "ok": False, "state": "missing", "detail": str(e)}
 
     out = {"slug": slug, "ok": False, "state": "unknown", **meta}
-    if creds.valid:
+    if creds.valid and _minutes_left(creds) > margin_min:
         out.update(ok=True, state="valid")
     elif creds.refresh_token:
         try:
-            creds.refresh(Request())
+            creds.refresh(_TimedRequest(http_timeout) if http_timeout else Request())
             _write(slug, creds, meta)
             out.update(ok=True, state="refreshed")
         except Exception as e:
             out.update(ok=False, state="expired", detail=f"{type(e).__name__}: {e}"[:200])
+    elif creds.valid:
+        out.update(ok=True, state="valid")
     else:
         out.update(state="no refresh token")
 
@@ -169,6 +202,83 @@ def health(slug: str) -> dict:
     return out
 
 
+def _minutes_left(creds: Credentials) -> float:
+    if creds.expiry is None:
+        return float("inf")
+    # google-auth keeps expiry as naive UTC.
+    return (creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds() / 60
+
+
+def health_all(slugs: list[str], workers: int = HEALTH_WORKERS,
+               timeout: float = HEALTH_TIMEOUT_S,
+               margin_min: float = REFRESH_MARGIN_MIN) -> list[dict]:
+    """health() for every slug at once, in slug order.
+
+    Each token gets `timeout` seconds from when its own check starts; one
+    that hangs on Google's token endpoint is reported as `timeout` rather
+    than holding up the rest. If every worker is stuck on a hung token, the
+    tokens still waiting behind them are reported as `not checked`, not as
+    dead. Workers are daemon threads and each refresh carries an HTTP
+    timeout, so the command returns on time even with a request in flight.
+    """
+    if not slugs:
+        return []
+    waiting = list(reversed(slugs))
+    rows = {}
+    current = {}  # worker number -> (slug, started) while it checks one
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def work(n):
+        while not stop.is_set():
+            with lock:
+                if not waiting:
+                    return
+                slug = waiting.pop()
+                current[n] = (slug, time.monotonic())
+            try:
+                row = health(slug, margin_min, http_timeout=timeout)
+            except Exception as e:
+                row = {"slug": slug, "ok": False, "state": "error",
+                       "detail": f"{type(e).__name__}: {e}"[:200]}
+            with lock:
+                rows.setdefault(slug, row)
+                del current[n]
+
+    count = max(1, min(workers, len(slugs)))
+    threads = [threading.Thread(target=work, args=(n,), name=f"health-{n}", daemon=True)
+               for n in range(count)]
+    for t in threads:
+        t.start()
+    while True:
+        with lock:
+            now = time.monotonic()
+            for slug, at in current.values():
+                if slug not in rows and now - at >= timeout:
+                    rows[slug] = {"slug": slug, "ok": False, "state": "timeout",
+                                  "detail": f"no answer within {timeout:g}s"}
+            stuck = sum(1 for slug, _ in current.values() if rows.get(slug, {}).get("state") == "timeout")
+            if len(rows) == len(slugs) or stuck == count:
+                break
+        time.sleep(0.02)
+    stop.set()
+    return [rows.get(s) or {"slug": s, "ok": False, "state": NOT_CHECKED,
+                            "detail": "not checked: every worker was stuck on a hung token"}
+            for s in slugs]
+
+
+def _all_slugs() -> list[str]:
+    if not TOKEN_DIR.is_dir():
+        return []
+    # Dotfiles are temp files from an interrupted write, not channels.
+    return sorted(p.stem for p in TOKEN_DIR.glob("*.json") if not p.name.startswith("."))
+
+
+def _check(args) -> list[dict]:
+    return health_all(_all_slugs(), workers=args.workers, timeout=args.timeout,
+                      margin_min=args.margin)
+
+
 def cmd_add(args) -> int:
     if not CREDENTIALS.exists():
         print(f"missing {CREDENTIALS} — download the OAuth client (Desktop app) "
@@ -236,15 +346,17 @@ def cmd_add(args) -> int:
 
 def cmd_list(args) -> int:
     _migrate_legacy()
-    slugs = sorted(p.stem for p in TOKEN_DIR.glob("*.json")) if TOKEN_DIR.is_dir() else []
-    if not slugs:
+    rows = _check(args)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0 if all(r["ok"] for r in rows) else 1
+    if not rows:
         print("no channels authorized yet — double-click authorize-channel.cmd")
         return 0
 
-    rows = [health(s) for s in slugs]
     width = max(len(r["slug"]) for r in rows)
     for r in rows:
-        mark = "ok " if r["ok"] else "DEAD"
+        mark = "ok " if r["ok"] else "?   " if _unknown(r) else "DEAD"
         extra = ""
         if r.get("stale"):
             extra = f"  (unused {r['age_days']}d — refresh it, 180d kills it)"
@@ -256,19 +368,27 @@ def cmd_list(args) -> int:
     return 0 if all(r["ok"] for r in rows) else 1
 
 
+def _unknown(row: dict) -> bool:
+    """No verdict: the check hung or never ran. Not a reason to re-authorize."""
+    return row["state"] in ("timeout", NOT_CHECKED)
+
+
 def cmd_refresh(args) -> int:
     _migrate_legacy()
-    slugs = sorted(p.stem for p in TOKEN_DIR.glob("*.json")) if TOKEN_DIR.is_dir() else []
-    bad = []
-    for s in slugs:
-        r = health(s)
-        print(f"  {s}: {r['state']}")
-        if not r["ok"]:
-            bad.append(s)
+    rows = _check(args)
+    bad = [r["slug"] for r in rows if not r["ok"] and not _unknown(r)]
+    unknown = [r["slug"] for r in rows if _unknown(r)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 1 if bad or unknown else 0
+    for r in rows:
+        print(f"  {r['slug']}: {r['state']}")
     if bad:
         print(f"\nneeds re-authorizing: {', '.join(bad)}")
         print("  double-click authorize-channel.cmd")
-    return 1 if bad else 0
+    if unknown:
+        print(f"\nno answer, try again: {', '.join(unknown)}")
+    return 1 if bad or unknown else 0
 
 
 def cmd_rename(args) -> int:
@@ -342,8 +462,20 @@ def main() -> int:
                         "this just pre-selects, so still read the result.")
     a.set_defaults(fn=cmd_add)
 
-    sub.add_parser("list", help="channels and token health").set_defaults(fn=cmd_list)
-    sub.add_parser("refresh", help="keep every token warm").set_defaults(fn=cmd_refresh)
+    for name, fn, text in [("list", cmd_list, "channels and token health"),
+                           ("refresh", cmd_refresh, "keep every token warm")]:
+        c = sub.add_parser(name, help=text)
+        c.add_argument("--json", action="store_true",
+                       help="print the health rows as JSON for other tools")
+        c.add_argument("--workers", type=int, default=HEALTH_WORKERS,
+                       help=f"tokens checked at once (default {HEALTH_WORKERS})")
+        c.add_argument("--timeout", type=float, default=HEALTH_TIMEOUT_S,
+                       help=f"seconds before a token is reported as timeout "
+                            f"(default {HEALTH_TIMEOUT_S})")
+        c.add_argument("--margin", type=float, default=REFRESH_MARGIN_MIN,
+                       help=f"skip the refresh while the access token has more than "
+                            f"this many minutes left (default {REFRESH_MARGIN_MIN})")
+        c.set_defaults(fn=fn)
 
     n = sub.add_parser("rename", help="file a channel under a different slug")
     n.add_argument("old")
@@ -0,0 +1,157 @@
+"""Local inventory of a channel's uploads.
+
+search.list(forMine=True) costs 100 units a page and its results are capped
+and not guaranteed complete. Every channel has an "uploads" playlist
+(contentDetails.relatedPlaylists.uploads) holding every video it ever
+uploaded, newest first; reading it with playlistItems.list costs 1 unit per
+page of 50, and videos.list fills in the details for 50 ids per call, also
+at 1 unit.
+
+The inventory keeps what it has seen in SQLite, so a sync only walks the
+playlist until the first video it already knows: after the first full pass,
+keeping up with a day's uploads is a single page.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from sqlite_store import transaction
+
+INVENTORY_FILE = "inventory.sqlite3"
+PAGE_SIZE = 50  # the API maximum for both playlistItems.list and videos.list
+VIDEO_PARTS = "snippet,status,contentDetails"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    channel_id   TEXT NOT NULL,
+    video_id     TEXT NOT NULL,
+    title        TEXT,
+    category_id  TEXT,
+    privacy      TEXT,
+    published_at TEXT,
+    data         TEXT NOT NULL,
+    synced_at    TEXT NOT NULL,
+    PRIMARY KEY (channel_id, video_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS videos_published ON videos (channel_id, published_at);
+"""
+
+
+def uploads_playlist_id(youtube) -> tuple[str, str]:
+    """(channel id, uploads playlist id) of the authenticated channel, looked up once per service."""
+    if not getattr(youtube, "_uploads_playlist", None):
+        items = youtube.channels().list(part="contentDetails", mine=True).execute().get("items", [])
+        if not items:
+            raise RuntimeError("the authenticated account has no YouTube channel")
+        channel = items[0]
+        youtube._uploads_playlist = (channel["id"],
+                                     channel["contentDetails"]["relatedPlaylists"]["uploads"])
+    return youtube._uploads_playlist
+
+
+def iter_upload_ids(youtube, known=frozenset()):
+    """Video ids from the uploads playlist, newest first, stopping at the first one in `known`."""
+    _, playlist_id = uploads_playlist_id(youtube)
+    request = youtube.playlistItems().list(
+        part="contentDetails", playlistId=playlist_id, maxResults=PAGE_SIZE
+    )
+    while request:
+        response = request.execute()
+        for item in response.get("items", []):
+            video_id = item["contentDetails"]["videoId"]
+            if video_id in known:
+                return
+            yield video_id
+        request = youtube.playlistItems().list_next(request, response)
+
+
+def fetch_videos(youtube, video_ids, part: str = VIDEO_PARTS) -> list[dict]:
+    """videos.list resources for the ids, PAGE_SIZE ids per call, in the order given."""
+    video_ids = list(video_ids)
+    found = {}
+    for i in range(0, len(video_ids), PAGE_SIZE):
+        chunk = video_ids[i:i + PAGE_SIZE]
+        response = youtube.videos().list(part=part, id=",".join(chunk), maxResults=PAGE_SIZE).execute()
+        for video in response.get("items", []):
+            found[video["id"]] = video
+    # Deleted or rejected videos linger in the playlist but videos.list drops them.
+    return [found[v] for v in video_ids if v in found]
+
+
+class ChannelInventory:
+    def __init__(self, path: str = INVENTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return transaction(self.path, row_factory=sqlite3.Row)
+
+    def known_ids(self, channel_id: str) -> set[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT video_id FROM videos WHERE channel_id = ?", (channel_id,))
+            return {r["video_id"] for r in rows}
+
+    def video_ids(self, channel_id: str) -> list[str]:
+        """Stored video ids for the channel, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT video_id FROM videos WHERE channel_id = ? ORDER BY published_at DESC",
+                (channel_id,),
+            ).fetchall()
+        return [r["video_id"] for r in rows]
+
+    def upsert(self, channel_id: str, videos: list[dict]) -> None:
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [
+            (
+                channel_id,
+                v["id"],
+                v.get("snippet", {}).get("title"),
+                v.get("snippet", {}).get("categoryId"),
+                v.get("status", {}).get("privacyStatus"),
+                v.get("snippet", {}).get("publishedAt"),
+                json.dumps(v),
+                now,
+            )
+            for v in videos
+        ]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO videos (channel_id, video_id, title, category_id,"
+                " privacy, published_at, data, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def videos(self, channel_id: str) -> list[dict]:
+        """Every stored video resource for the channel, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM videos WHERE channel_id = ? ORDER BY published_at DESC",
+                (channel_id,),
+            ).fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+
+def sync_inventory(youtube, inventory: ChannelInventory | None = None, full: bool = False) -> list[dict]:
+    """
+    Bring the inventory up to date with the channel. Returns the videos that
+    were new to it, newest first.
+
+    Incremental by default: the playlist walk stops at the first video already
+    stored. `full` re-reads the whole playlist and refreshes every stored row,
+    e.g. after titles or categories were edited in Studio.
+    """
+    inventory = inventory or ChannelInventory()
+    channel_id, _ = uploads_playlist_id(youtube)
+    known = set() if full else inventory.known_ids(channel_id)
+    ids = list(iter_upload_ids(youtube, known))
+    videos = fetch_videos(youtube, ids)
+    inventory.upsert(channel_id, videos)
+    print(f"[inventory] {channel_id}: {len(videos)} video(s) {'synced' if full else 'new'}")
+    return videos
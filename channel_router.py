@@ -0,0 +1,152 @@
+"""Send each emailed clip to the channel (or channels) it is meant for.
+
+channel_auth.py keeps one token per channel under tokens/<slug>.json, but the
+upload path only ever knew youtube_token.json. The router picks channels for
+an email from routing rules, and gives every channel its own lane: a
+YouTubeClient built on that channel's token (its own worker pool and
+connections) and its own slot schedule, so channels fill their grids
+independently and one channel's backlog never delays another's uploads.
+
+Rules live in channel_routes.json:
+
+    {
+      "default": "default",
+      "routes": [
+        {"subject": "^carousel", "channels": ["carousel"]},
+        {"sender": "friend@example.com", "channels": ["midnightlockerroom", "carousel"]}
+      ]
+    }
+
+`subject` is a case-insensitive regex searched in the raw subject, `sender` a
+case-insensitive substring of the From header; a rule with both needs both.
+Every matching rule adds its channels, so one email can fan out to several.
+No match, or no file at all, means the default channel. The channel named
+"default" is the legacy setup: youtube_token.json and last_upload_time.txt.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+import channel_auth
+from scheduler import UploadScheduler
+from token_manager import get_youtube_credentials
+from youtube_client import YouTubeClient
+
+ROUTES_FILE = "channel_routes.json"
+LEGACY_CHANNEL = "default"
+# Uploads in flight per channel.
+CHANNEL_WORKERS = 2
+
+
+@dataclass
+class Route:
+    channels: list[str]
+    subject: str | None = None
+    sender: str | None = None
+    _subject_re: re.Pattern | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.channels:
+            raise ValueError("a route needs at least one channel")
+        if self.subject is None and self.sender is None:
+            raise ValueError("a route needs a subject pattern or a sender")
+        if self.subject is not None:
+            self._subject_re = re.compile(self.subject, re.IGNORECASE)
+
+    def matches(self, subject: str, sender: str) -> bool:
+        if self._subject_re is not None and not self._subject_re.search(subject or ""):
+            return False
+        if self.sender is not None and self.sender.lower() not in (sender or "").lower():
+            return False
+        return True
+
+
+def load_routes(path: str = ROUTES_FILE) -> tuple[str, list[Route]]:
+    """(default channel, rules) from the routes file; the legacy channel if there is none."""
+    if not os.path.exists(path):
+        return LEGACY_CHANNEL, []
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    routes = [Route(channels=list(r["channels"]), subject=r.get("subject"), sender=r.get("sender"))
+              for r in data.get("routes", [])]
+    return data.get("default", LEGACY_CHANNEL), routes
+
+
+def _channel_credentials(slug: str):
+    if slug == LEGACY_CHANNEL:
+        return get_youtube_credentials()
+    return channel_auth.load(slug)[0]
+
+
+def _channel_scheduler(slug: str) -> UploadScheduler:
+    return UploadScheduler() if slug == LEGACY_CHANNEL else UploadScheduler.for_channel(slug)
+
+
+@dataclass
+class ChannelLane:
+    slug: str
+    client: YouTubeClient
+    scheduler: UploadScheduler
+    # Whatever the caller hands out slots with (UploadVideo.SlotClock).
+    slots: object = None
+
+
+class UploadRouter:
+    def __init__(self, default: str = LEGACY_CHANNEL, routes: list[Route] | None = None,
+                 workers: int = CHANNEL_WORKERS, make_slots=None, make_client=None):
+        """
+        Args:
+            default: channel for an email no rule matches.
+            routes: routing rules, checked in order.
+            workers: uploads in flight per channel.
+            make_slots: (slug, scheduler) -> slot source for that channel.
+            make_client: slug -> YouTubeClient; defaults to one on the
+                channel's stored token.
+        """
+        self.default = default
+        self.routes = routes or []
+        self.workers = workers
+        self._make_slots = make_slots
+        self._make_client = make_client or (
+            lambda slug: YouTubeClient(_channel_credentials(slug), workers=workers)
+        )
+        self._lanes: dict[str, ChannelLane] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str = ROUTES_FILE, **kwargs) -> "UploadRouter":
+        default, routes = load_routes(path)
+        return cls(default, routes, **kwargs)
+
+    def channels_for(self, subject: str, sender: str = "") -> list[str]:
+        """Every channel this email goes to, in rule order, without repeats."""
+        picked = []
+        for route in self.routes:
+            if not route.matches(subject, sender):
+                continue
+            for channel in route.channels:
+                if channel not in picked:
+                    picked.append(channel)
+        return picked or [self.default]
+
+    def lane(self, slug: str) -> ChannelLane:
+        """The channel's client and schedule, set up on first use."""
+        with self._lock:
+            lane = self._lanes.get(slug)
+            if lane is None:
+                scheduler = _channel_scheduler(slug)
+                lane = ChannelLane(slug, self._make_client(slug), scheduler)
+                if self._make_slots is not None:
+                    lane.slots = self._make_slots(slug, scheduler)
+                self._lanes[slug] = lane
+            return lane
+
+    def close(self):
+        with self._lock:
+            for lane in self._lanes.values():
+                lane.client.close()
@@ -0,0 +1,159 @@
+"""Make sure every video on the channel has a pinned comment.
+
+The old loop walked every video on every run, one at a time, and read up to
+100 comment threads per video just to look for one that was pinned. Nearly
+all of them had been handled the run before. The sweeper syncs the channel
+inventory, keeps a record of the videos it has already settled, and only
+visits the rest; the check/post/pin calls for those run concurrently through
+a YouTubeClient, and the outcome is one summary at the end instead of a wall
+of interleaved prints.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from channel_inventory import ChannelInventory, sync_inventory, uploads_playlist_id
+from quota import LOW, get_meter, project_of, unit_cost
+from state_store import atomic_write
+
+PINNED_RECORD_FILE = "pinned_comments.json"
+DEFAULT_COMMENT = "Like and subscribe for more!"
+# The record is written every this many videos, so an interrupted sweep keeps its progress.
+SAVE_EVERY = 50
+
+PINNED = "pinned"
+ALREADY_PINNED = "already pinned"
+DEFERRED = "deferred"
+ERROR = "error"
+_SETTLED = {PINNED, ALREADY_PINNED}
+
+PIN_COST = sum(unit_cost(m) for m in ("youtube.commentThreads.list",
+                                      "youtube.commentThreads.insert",
+                                      "youtube.comments.setModerationStatus"))
+
+
+def pin_comment(youtube, video_id: str, comment_text: str = DEFAULT_COMMENT) -> str:
+    """
+    Post and pin `comment_text` unless the video already has a pinned comment.
+    Returns PINNED, ALREADY_PINNED, or DEFERRED when the quota is being kept
+    for uploads. API errors are raised.
+    """
+    if not get_meter().affordable(PIN_COST, LOW, project_of(youtube)):
+        return DEFERRED
+
+    threads = youtube.commentThreads().list(
+        part="snippet", videoId=video_id, maxResults=100
+    ).execute()
+    for thread in threads.get("items", []):
+        if thread["snippet"]["topLevelComment"]["snippet"].get("isPinned", False):
+            return ALREADY_PINNED
+
+    posted = youtube.commentThreads().insert(
+        part="snippet",
+        body={"snippet": {"videoId": video_id,
+                          "topLevelComment": {"snippet": {"textOriginal": comment_text}}}},
+    ).execute()
+    youtube.comments().setModerationStatus(
+        id=posted["id"], moderationStatus="published", banAuthor=False
+    ).execute()
+    return PINNED
+
+
+def _load_record(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable {path}: {e}")
+        return {}
+
+
+def _visit(youtube, video_id, comment_text):
+    start = time.monotonic()
+    try:
+        status, error = pin_comment(youtube, video_id, comment_text), None
+    except Exception as e:
+        status, error = ERROR, f"{type(e).__name__}: {e}"[:200]
+    return {"video_id": video_id, "status": status, "seconds": time.monotonic() - start,
+            "error": error}
+
+
+def sweep_pinned_comments(youtube, comment_text: str = DEFAULT_COMMENT, client=None,
+                          inventory: ChannelInventory | None = None,
+                          record: str = PINNED_RECORD_FILE) -> dict:
+    """
+    Pin `comment_text` on every video not yet settled. Returns the summary.
+
+    Args:
+        youtube: service for the inventory sync.
+        client: a youtube_client.YouTubeClient for the channel, to visit
+            videos concurrently; without one they are visited in turn.
+        inventory: where the channel's video list is kept.
+        record: file of videos already pinned, per channel. Errors and
+            deferred videos are not recorded, so the next run retries them.
+    """
+    inventory = inventory or ChannelInventory()
+    sync_inventory(youtube, inventory)
+    channel_id, _ = uploads_playlist_id(youtube)
+    data = _load_record(record)
+    settled = data.setdefault(channel_id, {})
+    todo = [v for v in inventory.video_ids(channel_id) if v not in settled]
+
+    results = []
+    for i in range(0, len(todo), SAVE_EVERY):
+        chunk = todo[i:i + SAVE_EVERY]
+        if client is None:
+            batch = [_visit(youtube, v, comment_text) for v in chunk]
+        else:
+            batch = client.map(lambda yt, v: _visit(yt, v, comment_text), chunk)
+        results.extend(batch)
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        for r in batch:
+            if r["status"] in _SETTLED:
+                settled[r["video_id"]] = {"status": r["status"], "at": now}
+        atomic_write(record, json.dumps(data, indent=2))
+        if any(r["status"] == DEFERRED for r in batch):
+            break
+
+    summary = summarize(results, skipped=len(settled) - sum(r["status"] in _SETTLED for r in results))
+    print_summary(summary)
+    return summary
+
+
+def summarize(results: list[dict], skipped: int = 0) -> dict:
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    seconds = sorted(r["seconds"] for r in results if r["status"] != DEFERRED)
+    latency = {}
+    if seconds:
+        latency = {
+            "mean": sum(seconds) / len(seconds),
+            "p95": seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))],
+            "max": seconds[-1],
+        }
+    return {
+        "visited": len(results),
+        "skipped": skipped,
+        "counts": counts,
+        "latency": latency,
+        "errors": [{"video_id": r["video_id"], "error": r["error"]}
+                   for r in results if r["status"] == ERROR],
+    }
+
+
+def print_summary(summary: dict) -> None:
+    counts = ", ".join(f"{n} {status}" for status, n in sorted(summary["counts"].items())) or "nothing new"
+    print(f"Pinned comments: {summary['visited']} visited ({counts}), "
+          f"{summary['skipped']} already settled earlier")
+    if summary["latency"]:
+        lat = summary["latency"]
+        print(f"  per video: mean {lat['mean']:.2f}s, p95 {lat['p95']:.2f}s, max {lat['max']:.2f}s")
+    for e in summary["errors"]:
+        print(f"  {e['video_id']}: {e['error']}")
@@ -0,0 +1,98 @@
+"""On-disk cache of generated Shorts descriptions.
+
+A retried upload, or the same clip cross-posted under the same title, used to
+make a fresh description call each time — seconds of model latency on the
+upload's critical path for text we already had. Entries are keyed by the
+normalized title plus everything else that shapes the output (prompt version,
+model, channel voice), expire after a TTL, and the least recently used ones
+are evicted once the cache is over its size limit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+
+from sqlite_store import transaction
+
+DESCRIPTION_CACHE_FILE = "description_cache.sqlite3"
+CACHE_TTL_DAYS = float(os.getenv("DESC_CACHE_TTL_DAYS", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("DESC_CACHE_MAX_ENTRIES", "2000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS descriptions (
+    key         TEXT PRIMARY KEY,
+    title       TEXT NOT NULL,
+    description TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    used_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS descriptions_used ON descriptions (used_at);
+"""
+
+
+def normalize_title(title: str) -> str:
+    """Case, width and spacing differences don't make a different clip."""
+    return " ".join(unicodedata.normalize("NFKC", title).casefold().split())
+
+
+def cache_key(title: str, prompt_version: str, model: str, voice: str) -> str:
+    raw = "\x1f".join([normalize_title(title), str(prompt_version), model, voice])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DescriptionCache:
+    def __init__(self, path: str = DESCRIPTION_CACHE_FILE,
+                 ttl_days: float = CACHE_TTL_DAYS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return transaction(self.path)
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT description, created_at FROM descriptions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl:
+                conn.execute("UPDATE descriptions SET used_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM descriptions WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, title: str, description: str) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO descriptions (key, title, description, created_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, title, description, now, now),
+            )
+            conn.execute("DELETE FROM descriptions WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM descriptions WHERE key IN ("
+                " SELECT key FROM descriptions ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,119 @@
+"""Content fingerprints, to catch the same clip arriving from a different post.
+
+The shortcode index only knows Instagram posts. The same clip re-shared by
+another account, re-encoded, or trimmed by a frame has a new shortcode and
+different bytes, and went straight through. A fingerprint is what survives
+that: a 64-bit difference hash (dHash) of frames sampled at fixed fractions
+of the clip, plus its length. Length comes from the audio track where there
+is one, since re-encodes keep the soundtrack's length even when they drop
+or duplicate a video frame at either end.
+
+Fingerprints of uploaded clips are kept in the job ledger next to the upload
+index. A lookup first narrows to clips of about the same length (an index
+range scan) and only compares frame hashes against those, so it stays fast
+however many uploads there are.
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+from dataclasses import dataclass
+
+from preflight import probe
+
+FRAME_SAMPLES = 8
+# Mean differing bits per frame (of 64) at or below which two clips match.
+MAX_FRAME_DISTANCE = 10
+LENGTH_TOLERANCE_S = 0.5
+FRAME_TIMEOUT_S = 20
+
+_W, _H = 9, 8  # dHash compares horizontal neighbours: 8 per row, 8 rows
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    length: float
+    frames: tuple[int, ...]
+
+    def distance(self, other: "Fingerprint") -> float:
+        """Mean Hamming distance between frames at the same positions."""
+        pairs = list(zip(self.frames, other.frames))
+        if not pairs:
+            return 64.0
+        return sum(bin(a ^ b).count("1") for a, b in pairs) / len(pairs)
+
+    def matches(self, other: "Fingerprint") -> bool:
+        return (abs(self.length - other.length) <= LENGTH_TOLERANCE_S
+                and self.distance(other) <= MAX_FRAME_DISTANCE)
+
+    def frames_hex(self) -> str:
+        return ",".join(f"{f:016x}" for f in self.frames)
+
+    @classmethod
+    def from_row(cls, length: float, frames_hex: str) -> "Fingerprint":
+        return cls(length, tuple(int(f, 16) for f in frames_hex.split(",") if f))
+
+
+def dhash(pixels: bytes) -> int:
+    """64-bit difference hash of a 9x8 grayscale frame."""
+    value = 0
+    for row in range(_H):
+        line = pixels[row * _W:(row + 1) * _W]
+        for col in range(_W - 1):
+            value = (value << 1) | (line[col] < line[col + 1])
+    return value
+
+
+def _frame_at(ffmpeg: str, path: str, seconds: float) -> bytes | None:
+    # -ss before -i seeks on the container, so each sample decodes from the
+    # nearest keyframe instead of from the start.
+    out = subprocess.run(
+        [ffmpeg, "-v", "error", "-ss", f"{seconds:.3f}", "-i", path, "-frames:v", "1",
+         "-vf", f"scale={_W}:{_H},format=gray", "-f", "rawvideo", "-"],
+        capture_output=True, timeout=FRAME_TIMEOUT_S,
+    )
+    return out.stdout if len(out.stdout) == _W * _H else None
+
+
+def fingerprint(path: str, samples: int = FRAME_SAMPLES) -> Fingerprint | None:
+    """The clip's fingerprint, or None without ffmpeg/ffprobe or on an unreadable file."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    try:
+        info = probe(path)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    if not info:
+        return None
+    duration = float(info.get("format", {}).get("duration", 0) or 0)
+    if duration <= 0:
+        return None
+    audio = next((s for s in info.get("streams", []) if s.get("codec_type") == "audio"), None)
+    length = float((audio or {}).get("duration", 0) or 0) or duration
+
+    frames = []
+    for i in range(samples):
+        try:
+            pixels = _frame_at(ffmpeg, path, duration * (i + 0.5) / samples)
+        except (OSError, subprocess.SubprocessError):
+            pixels = None
+        if pixels is None:
+            return None
+        frames.append(dhash(pixels))
+    return Fingerprint(round(length, 3), tuple(frames))
+
+
+def find_duplicate(ledger, fp: Fingerprint | None, channel: str | None = None) -> dict | None:
+    """An uploaded clip (on `channel`, or any channel for None) that `fp` matches."""
+    if fp is None:
+        return None
+    best, best_distance = None, None
+    for row in ledger.fingerprints_near(fp.length, LENGTH_TOLERANCE_S, channel):
+        other = Fingerprint.from_row(row["length"], row["frames"])
+        if fp.matches(other):
+            distance = fp.distance(other)
+            if best is None or distance < best_distance:
+                best, best_distance = row, distance
+    return best
@@ -2,40 +2,174 @@ import instaloader
 import os
 import re
 import time
+import queue
 import random
 import shutil
+import threading
 
-def download_instagram_reel(url, output_dir=None, custom_filename=None):
+import requests
+from googleapiclient.http import MediaUpload
+
+def extract_shortcode(url):
+    """The post shortcode from a /p/, /reel/ or /tv/ URL, or None."""
+    shortcode_match = re.search(r'/(p|reel|tv)/([^/?]+)', url or "")
+    return shortcode_match.group(2) if shortcode_match else None
+
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+# Request budget for Instagram: a burst of RATE_BURST, refilling at
+# RATE_PER_MINUTE. Replaces the blind 2-5s sleep before every reel.
+RATE_PER_MINUTE = float(os.getenv("INSTAGRAM_RATE_PER_MINUTE", "12"))
+RATE_BURST = int(os.getenv("INSTAGRAM_RATE_BURST", "3"))
+
+# Comma-separated Instagram usernames whose Instaloader session files
+# (`instaloader --login USER` writes them) should be loaded into the pool.
+SESSION_USERS = [u.strip() for u in os.getenv("INSTAGRAM_SESSIONS", "").split(",") if u.strip()]
+
+
+# Fetch post.video_url straight into the destination file rather than letting
+# Instaloader write a temp directory that then gets searched, moved and removed.
+STREAM_DOWNLOADS = True
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_RETRIES = 4
+# How long a GrowingFileUpload read waits for bytes the download has announced.
+TEE_READ_TIMEOUT_S = 60
+
+
+class TokenBucket:
+    """Blocks only when the recent request rate actually exceeds the budget."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping just long enough for it to refill if needed.
+        Returns the seconds waited."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            # A little jitter so pooled workers don't wake in lockstep.
+            wait += random.uniform(0, 0.5)
+            print(f"⏳ Rate limit: waiting {wait:.1f}s...")
+            time.sleep(wait)
+        return wait
+
+
+class GrowingFileUpload(MediaUpload):
     """
-    Download Instagram reel video using instaloader library
+    Upload media that reads a video while it is still being downloaded.
+
+    Pass one as `tee` to ReelDownloader.download() and as `media_body` to
+    upload_video(), running the two in parallel: each upload chunk waits only
+    until the download has got that far, so the upload starts with the first
+    megabytes instead of after the last one. The size is reported as unknown
+    until the download finishes, which the resumable protocol allows.
+
+    The file is reopened for every chunk rather than held open, so the .part
+    file can still be renamed into place on Windows.
+
+    Nothing in the pipeline uses this yet: there the upload waits for review,
+    which needs the whole clip. It is for callers that upload without review.
     """
-    # Set default output directory if not provided
-    if not output_dir:
-        output_dir = os.path.join(os.path.expanduser("~"), "Downloads")
 
-    os.makedirs(output_dir, exist_ok=True)
+    def __init__(self, chunksize=8 * 1024 * 1024, mimetype="video/mp4"):
+        super().__init__()
+        self._chunksize = chunksize
+        self._mimetype = mimetype
+        self._cond = threading.Condition()
+        self._path = None
+        self._available = 0
+        self._size = None
+        self._error = None
+
+    # Download side
+    def start(self, path):
+        with self._cond:
+            self._path = path
+            self._cond.notify_all()
+
+    def grew(self, nbytes):
+        with self._cond:
+            self._available = nbytes
+            self._cond.notify_all()
+
+    def finish(self, path):
+        with self._cond:
+            self._path = path
+            self._size = self._available = os.path.getsize(path)
+            self._cond.notify_all()
+
+    def fail(self, error):
+        with self._cond:
+            self._error = error
+            self._cond.notify_all()
 
-    # Extract shortcode from URL
-    shortcode_match = re.search(r'/(p|reel|tv)/([^/?]+)', url)
-    if not shortcode_match:
-        print(f"❌ Invalid Instagram URL: {url}")
-        return None
+    # MediaUpload interface
+    def chunksize(self):
+        return self._chunksize
 
-    shortcode = shortcode_match.group(2)
-    print(f"📋 Extracted shortcode: {shortcode}")
+    def mimetype(self):
+        return self._mimetype
 
-    # Custom filename logic
-    final_output_path = None
-    if custom_filename:
-        if not custom_filename.endswith('.mp4'):
-            custom_filename += '.mp4'
-        final_output_path = os.path.join(output_dir, custom_filename)
+    def size(self):
+        return self._size
 
-        if os.path.exists(final_output_path) and os.path.getsize(final_output_path) > 0:
-            print(f"✅ File already exists: {final_output_path}")
-            return final_output_path
+    def resumable(self):
+        return True
 
-    # Initialize Instaloader
+    def has_stream(self):
+        return False
+
+    def getbytes(self, begin, length):
+        """
+        The bytes at [begin, begin + length), waiting for the download to
+        write them. A short read is only returned at the real end of the
+        file: the resumable upload takes a short read as the end of the media
+        and would finalize a truncated video.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._error is not None
+                or self._size is not None
+                or (self._path is not None and self._available >= begin + length)
+            )
+            self._raise_if_failed()
+            path, size = self._path, self._size
+        want = length if size is None else max(0, min(length, size - begin))
+        data = b""
+        deadline = time.monotonic() + TEE_READ_TIMEOUT_S
+        while len(data) < want:
+            try:
+                with open(path, "rb") as f:
+                    f.seek(begin + len(data))
+                    data += f.read(want - len(data))
+            except FileNotFoundError:
+                pass  # the .part was renamed into place between our look and the open
+            if len(data) < want:
+                if time.monotonic() >= deadline:
+                    raise IOError(f"only {len(data)} of {want} bytes at offset {begin} "
+                                  f"appeared in {path}")
+                with self._cond:
+                    self._cond.wait(timeout=0.05)
+                    self._raise_if_failed()
+                    path = self._path
+        return data
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise IOError(f"download feeding the upload failed: {self._error}")
+
+
+def _new_loader(username=None):
     L = instaloader.Instaloader(
         download_videos=True,
         download_video_thumbnails=False,
@@ -44,67 +178,211 @@ def download_instagram_reel(url, output_dir=None, custom_filename=None):
         save_metadata=False,
         compress_json=False,
         post_metadata_txt_pattern="",
-        dirname_pattern=output_dir,
         quiet=False,
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+        user_agent=USER_AGENT
     )
+    if username:
+        try:
+            L.load_session_from_file(username)
+            print(f"🔑 Loaded Instagram session for {username}")
+        except FileNotFoundError:
+            print(f"⚠️ No saved Instagram session for {username}; using it logged out")
+    return L
 
-    try:
-        # Anti-rate-limit delay
-        delay = random.uniform(2, 5)
-        print(f"⏳ Waiting {delay:.1f}s...")
-        time.sleep(delay)
 
-        # Fetch post
-        print(f"⏱️ Downloading reel: {shortcode}")
-        post = instaloader.Post.from_shortcode(L.context, shortcode)
+class ReelDownloader:
+    """
+    Long-lived pool of Instaloader instances.
+
+    Each instance keeps its HTTP session (keep-alive connections, cookies, any
+    login) across downloads instead of being rebuilt per reel. With
+    INSTAGRAM_SESSIONS set, one pooled instance is created per logged-in
+    account; otherwise `size` anonymous ones. All of them share one rate limit.
+    """
+
+    def __init__(self, size=2, session_users=None, limiter=None):
+        users = list(session_users if session_users is not None else SESSION_USERS)
+        self.pool = queue.Queue()
+        for username in users or [None] * size:
+            self.pool.put(_new_loader(username))
+        self.limiter = limiter or TokenBucket(RATE_PER_MINUTE, RATE_BURST)
+
+    def download(self, url, output_dir=None, custom_filename=None, tee=None):
+        """
+        Download one reel; same contract as download_instagram_reel().
+        tee: a GrowingFileUpload to feed while the bytes arrive.
+        """
+        # Set default output directory if not provided
+        if not output_dir:
+            output_dir = os.path.join(os.path.expanduser("~"), "Downloads")
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Extract shortcode from URL
+        shortcode = extract_shortcode(url)
+        if not shortcode:
+            print(f"❌ Invalid Instagram URL: {url}")
+            return None
+
+        print(f"📋 Extracted shortcode: {shortcode}")
+
+        # Custom filename logic
+        final_output_path = None
+        if custom_filename:
+            if not custom_filename.endswith('.mp4'):
+                custom_filename += '.mp4'
+            final_output_path = os.path.join(output_dir, custom_filename)
 
-        # Temp directory
-        temp_dir = os.path.join(output_dir, f"temp_{shortcode}_{int(time.time())}")
-        os.makedirs(temp_dir, exist_ok=True)
+            if os.path.exists(final_output_path) and os.path.getsize(final_output_path) > 0:
+                print(f"✅ File already exists: {final_output_path}")
+                if tee:
+                    tee.start(final_output_path)
+                    tee.finish(final_output_path)
+                return final_output_path
 
-        L.dirname_pattern = temp_dir
-        L.download_post(post, target=shortcode)
+        output = final_output_path or os.path.join(output_dir, f"instagram_{shortcode}.mp4")
+        L = self.pool.get()
+        try:
+            if STREAM_DOWNLOADS or tee:
+                try:
+                    return self._stream_with(L, shortcode, output, tee)
+                except Exception as e:
+                    if tee:
+                        tee.fail(e)
+                        print(f"❌ Streaming download failed: {e}")
+                        return None
+                    print(f"⚠️ Streaming download failed ({e}); falling back to Instaloader")
+            return self._download_with(L, shortcode, output_dir, final_output_path)
+        finally:
+            self.pool.put(L)
 
-        # Find temp .mp4
-        temp_video_path = None
-        for f in os.listdir(temp_dir):
-            if f.endswith(".mp4"):
-                temp_video_path = os.path.join(temp_dir, f)
+    def _stream_with(self, L, shortcode, output, tee=None):
+        """
+        Stream post.video_url into `output`.part, then rename it into place.
+        A dropped connection picks up where it stopped with a Range request,
+        and so does a .part left behind by an earlier run.
+        """
+        self.limiter.acquire()
+        print(f"⏱️ Streaming reel: {shortcode}")
+        post = instaloader.Post.from_shortcode(L.context, shortcode)
+        if not post.is_video or not post.video_url:
+            raise ValueError(f"post {shortcode} has no video")
+
+        part = output + ".part"
+        done = os.path.getsize(part) if os.path.exists(part) else 0
+        if tee:
+            tee.start(part)
+            tee.grew(done)
+
+        # Instaloader's own session: same cookies, login and kept-alive connections.
+        session = L.context._session
+        for attempt in range(STREAM_RETRIES + 1):
+            headers = {"Range": f"bytes={done}-"} if done else {}
+            try:
+                with session.get(post.video_url, stream=True, headers=headers, timeout=30) as r:
+                    if r.status_code == 416:
+                        break  # the .part already holds the whole file
+                    r.raise_for_status()
+                    if done and r.status_code != 206:
+                        done = 0  # server ignored the Range header; start over
+                        if tee:
+                            tee.grew(0)
+                    expected = int(r.headers.get("Content-Length", 0)) or None
+                    received = 0
+                    with open(part, "ab" if done else "wb") as f:
+                        for chunk in r.iter_content(STREAM_CHUNK_SIZE):
+                            f.write(chunk)
+                            received += len(chunk)
+                            done += len(chunk)
+                            if tee:
+                                # The upload reads through its own handle;
+                                # announce only bytes that have left our buffer.
+                                f.flush()
+                                os.fsync(f.fileno())
+                                tee.grew(done)
+                    if expected is not None and received < expected:
+                        raise requests.exceptions.ChunkedEncodingError(
+                            f"connection closed after {received} of {expected} bytes"
+                        )
                 break
+            except (requests.exceptions.RequestException, OSError) as e:
+                if attempt == STREAM_RETRIES:
+                    raise
+                delay = 2 ** attempt + random.random()
+                print(f"⚠️ Stream interrupted at {done} bytes ({e}); resuming in {delay:.1f}s")
+                time.sleep(delay)
+
+        os.replace(part, output)
+        if tee:
+            tee.finish(output)
+        print(f"✅ Saved as: {output}")
+        return output
+
+    def _download_with(self, L, shortcode, output_dir, final_output_path):
+        temp_dir = None
+        try:
+            self.limiter.acquire()
+
+            # Fetch post
+            print(f"⏱️ Downloading reel: {shortcode}")
+            post = instaloader.Post.from_shortcode(L.context, shortcode)
+
+            # Temp directory
+            temp_dir = os.path.join(output_dir, f"temp_{shortcode}_{int(time.time())}")
+            os.makedirs(temp_dir, exist_ok=True)
 
-        if not temp_video_path:
-            print("⚠️ No video file found after download")
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            L.dirname_pattern = temp_dir
+            L.download_post(post, target=shortcode)
+
+            # Find temp .mp4
+            temp_video_path = None
+            for f in os.listdir(temp_dir):
+                if f.endswith(".mp4"):
+                    temp_video_path = os.path.join(temp_dir, f)
+                    break
+
+            if not temp_video_path:
+                print("⚠️ No video file found after download")
+                return None
+
+            # Move to final path
+            output = final_output_path or os.path.join(output_dir, f"instagram_{shortcode}.mp4")
+            if os.path.exists(output):
+                os.remove(output)
+            shutil.move(temp_video_path, output)
+            print(f"✅ Saved as: {output}")
+            return output
+
+        except instaloader.exceptions.InstaloaderException as e:
+            print(f"❌ Instaloader error: {e}")
             return None
+        except Exception as e:
+            print(f"❌ Unexpected error: {e}")
+            return None
+        finally:
+            # Cleanup
+            if temp_dir and os.path.exists(temp_dir):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+_default_downloader = None
+_default_lock = threading.Lock()
 
-        # Move to final path
-        if final_output_path:
-            if os.path.exists(final_output_path):
-                os.remove(final_output_path)
-            shutil.move(temp_video_path, final_output_path)
-            print(f"✅ Saved as: {final_output_path}")
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return final_output_path
-        else:
-            default_output = os.path.join(output_dir, f"instagram_{shortcode}.mp4")
-            if os.path.exists(default_output):
-                os.remove(default_output)
-            shutil.move(temp_video_path, default_output)
-            print(f"✅ Saved as: {default_output}")
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return default_output
-
-    except instaloader.exceptions.InstaloaderException as e:
-        print(f"❌ Instaloader error: {e}")
-        return None
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return None
-    finally:
-        # Cleanup
-        if 'temp_dir' in locals() and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
+
+def get_downloader():
+    """The process-wide ReelDownloader, created on first use."""
+    global _default_downloader
+    with _default_lock:
+        if _default_downloader is None:
+            _default_downloader = ReelDownloader()
+        return _default_downloader
+
+
+def download_instagram_reel(url, output_dir=None, custom_filename=None):
+    """
+    Download Instagram reel video using instaloader library
+    """
+    return get_downloader().download(url, output_dir, custom_filename)
 
 
 # ----------------------------------------------------------
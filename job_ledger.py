@@ -0,0 +1,257 @@
+"""Durable job ledger: one SQLite row per emailed clip.
+
+It also keeps the index of reels already uploaded, by Instagram shortcode and
+channel, so a reel that gets emailed twice is turned away before any download,
+and the content fingerprints of uploaded clips (see fingerprint.py).
+
+Before this, the only state was last_upload_time.txt and Gmail's UNREAD label,
+and the email was marked read before the download even started — a crash
+anywhere mid-pipeline silently lost the clip. Now the job is written here
+first, each stage records how far it got, and on startup every job that has
+not reached a terminal state is picked up again where it stopped.
+
+WAL mode lets the pipeline's worker threads (and a second process) write
+concurrently with readers; each thread gets its own connection.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+LEDGER_FILE = "jobs.sqlite3"
+
+# In pipeline order. A job only ever moves forward through these.
+STATES = ["queued", "downloaded", "described", "uploaded", "playlisted", "cleaned"]
+# Finished one way or another; never resumed.
+TERMINAL_STATES = {"cleaned", "skipped"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    msg_id      TEXT NOT NULL UNIQUE,
+    shortcode   TEXT,
+    channel     TEXT NOT NULL DEFAULT 'default',
+    state       TEXT NOT NULL DEFAULT 'queued',
+    url         TEXT,
+    subject     TEXT,
+    path        TEXT,
+    title       TEXT,
+    description TEXT,
+    slot        TEXT,
+    video_id    TEXT,
+    error       TEXT,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE INDEX IF NOT EXISTS jobs_channel_state ON jobs (channel, state, id);
+CREATE INDEX IF NOT EXISTS jobs_shortcode ON jobs (shortcode);
+
+CREATE TABLE IF NOT EXISTS uploads (
+    shortcode   TEXT NOT NULL,
+    channel     TEXT NOT NULL,
+    video_id    TEXT NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    PRIMARY KEY (shortcode, channel)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fingerprints (
+    video_id    TEXT PRIMARY KEY,
+    channel     TEXT NOT NULL,
+    shortcode   TEXT,
+    length      REAL NOT NULL,
+    frames      TEXT NOT NULL,
+    created_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_length ON fingerprints (length);
+"""
+
+# Columns a caller may set through advance()/update().
+_FIELDS = {"shortcode", "channel", "url", "subject", "path", "title",
+           "description", "slot", "video_id", "error"}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def job_id(msg_id: str, channel: str, fan_out: bool) -> str:
+    """Ledger key for one email's job on one channel.
+
+    An email going to a single channel keeps its Gmail id as the key; one that
+    fans out gets a job per channel, as "<msg_id>@<channel>".
+    """
+    return f"{msg_id}@{channel}" if fan_out else msg_id
+
+
+def email_id(job_key: str) -> str:
+    """The Gmail message id behind a job key."""
+    return job_key.split("@", 1)[0]
+
+
+def state_reached(current: str, wanted: str) -> bool:
+    """Has a job in `current` already got at least as far as `wanted`?"""
+    if current in TERMINAL_STATES:
+        return True
+    return STATES.index(current) >= STATES.index(wanted)
+
+
+class JobLedger:
+    def __init__(self, path: str = LEDGER_FILE):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, msg_id: str, url: str, subject: str, channel: str = "default",
+                shortcode: str | None = None) -> bool:
+        """Record a new job. False if this email is already in the ledger."""
+        now = _now_iso()
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO jobs"
+                " (msg_id, url, subject, channel, shortcode, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (msg_id, url, subject, channel, shortcode, now, now),
+            )
+        return cur.rowcount == 1
+
+    def update(self, msg_id: str, **fields) -> None:
+        """Set columns without changing state."""
+        unknown = set(fields) - _FIELDS
+        if unknown:
+            raise ValueError(f"unknown job fields: {sorted(unknown)}")
+        if fields:
+            self._set(msg_id, fields)
+
+    def advance(self, msg_id: str, state: str, **fields) -> None:
+        """Move a job to `state`, setting any columns that came with it."""
+        if state not in STATES and state not in TERMINAL_STATES:
+            raise ValueError(f"unknown job state: {state!r}")
+        unknown = set(fields) - _FIELDS
+        if unknown:
+            raise ValueError(f"unknown job fields: {sorted(unknown)}")
+        fields.setdefault("error", None)
+        # One statement: a crash can't leave the new fields under the old state.
+        self._set(msg_id, {**fields, "state": state})
+
+    def _set(self, msg_id: str, columns: dict) -> None:
+        cols = ", ".join(f"{k} = ?" for k in columns)
+        with self._conn() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {cols}, updated_at = ? WHERE msg_id = ?",
+                (*columns.values(), _now_iso(), msg_id),
+            )
+
+    def fail(self, msg_id: str, error: str) -> None:
+        """Note why a job stopped; it stays in its state and is retried on restart."""
+        self.update(msg_id, error=error[:500])
+
+    def get(self, msg_id: str) -> dict | None:
+        row = self._conn().execute("SELECT * FROM jobs WHERE msg_id = ?", (msg_id,)).fetchone()
+        return dict(row) if row else None
+
+    def unfinished(self, channel: str | None = None) -> list[dict]:
+        """Every job not yet in a terminal state, oldest first."""
+        marks = ", ".join("?" for _ in TERMINAL_STATES)
+        sql = f"SELECT * FROM jobs WHERE state NOT IN ({marks})"
+        args = list(TERMINAL_STATES)
+        if channel is not None:
+            sql += " AND channel = ?"
+            args.append(channel)
+        rows = self._conn().execute(sql + " ORDER BY id", args).fetchall()
+        return [dict(r) for r in rows]
+
+    def jobs_for_email(self, msg_id: str) -> list[dict]:
+        """Every job an email produced (one per channel it was routed to)."""
+        rows = self._conn().execute(
+            "SELECT * FROM jobs WHERE msg_id = ? OR msg_id LIKE ? ORDER BY id",
+            (msg_id, msg_id + "@%"),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def email_settled(self, msg_id: str) -> bool:
+        """Has every job from this email reached a terminal state (so it can be trashed)?"""
+        return all(j["state"] in TERMINAL_STATES for j in self.jobs_for_email(msg_id))
+
+    def record_upload(self, shortcode: str, video_id: str, channel: str = "default") -> None:
+        """Remember that this reel is on this channel, so a resend is caught up front."""
+        if not shortcode:
+            return
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads (shortcode, channel, video_id, uploaded_at)"
+                " VALUES (?, ?, ?, ?)",
+                (shortcode, channel, video_id, _now_iso()),
+            )
+
+    def find_upload(self, shortcode: str, channel: str = "default") -> dict | None:
+        """The earlier upload of this reel to this channel, if there was one.
+
+        A primary-key lookup on local disk — no Instagram or YouTube traffic.
+        The same reel going to a different channel is not a duplicate.
+        """
+        if not shortcode:
+            return None
+        row = self._conn().execute(
+            "SELECT * FROM uploads WHERE shortcode = ? AND channel = ?", (shortcode, channel)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def record_fingerprint(self, video_id: str, channel: str, length: float, frames: str,
+                           shortcode: str | None = None) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints"
+                " (video_id, channel, shortcode, length, frames, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, channel, shortcode, length, frames, _now_iso()),
+            )
+
+    def fingerprints_near(self, length: float, tolerance: float,
+                          channel: str | None = None) -> list[dict]:
+        """Fingerprints of uploads within `tolerance` seconds of `length` (an index range scan)."""
+        sql = "SELECT * FROM fingerprints WHERE length BETWEEN ? AND ?"
+        args = [length - tolerance, length + tolerance]
+        if channel is not None:
+            sql += " AND channel = ?"
+            args.append(channel)
+        return [dict(r) for r in self._conn().execute(sql, args).fetchall()]
+
+    def earlier_job_for(self, msg_id: str, shortcode: str, channel: str = "default") -> dict | None:
+        """Another live job for the same reel — sent twice before either one uploaded.
+
+        A job whose download failed isn't live: it sits in 'queued' with an
+        error until a restart, and would otherwise hold back every later copy
+        of the reel. When it is retried, find_upload catches it if the later
+        copy went up in the meantime.
+        """
+        if not shortcode:
+            return None
+        row = self._conn().execute(
+            "SELECT * FROM jobs WHERE shortcode = ? AND channel = ? AND msg_id != ?"
+            " AND state != 'skipped' AND NOT (state = 'queued' AND error IS NOT NULL)"
+            " AND id < (SELECT id FROM jobs WHERE msg_id = ?)"
+            " ORDER BY id LIMIT 1",
+            (shortcode, channel, msg_id, msg_id),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def latest_slot(self, channel: str = "default") -> datetime | None:
+        """The latest publish slot any job on this channel has been given."""
+        row = self._conn().execute(
+            "SELECT MAX(slot) FROM jobs WHERE channel = ? AND slot IS NOT NULL", (channel,)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
@@ -0,0 +1,120 @@
+"""A small staged pipeline: per-stage worker pools joined by bounded queues.
+
+Each stage is a function that takes an item and returns the item to hand to
+the next stage, or None to drop it (skipped, failed, nothing left to do). The
+queues are bounded, so a slow stage pushes back on the ones before it instead
+of letting downloads pile up on disk behind a stalled upload.
+
+A stage with a `key` gets a separate pool per key (per channel, say): items
+are sorted into per-key lanes, each with `workers` threads, so a backlog for
+one key never holds up another. Lane queues are unbounded; the stage's own
+inbox still pushes back on the stage before it.
+
+Threads rather than processes: every stage here is waiting on the network or a
+human, not on the CPU.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import Callable
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable
+    workers: int = 1
+    queue_size: int = 4
+    # item -> lane name; None means one shared pool.
+    key: Callable | None = None
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=s.queue_size) for s in stages]
+        self.threads: list[list[threading.Thread]] = []
+
+    def start(self) -> "Pipeline":
+        for i, stage in enumerate(self.stages):
+            if stage.key is None:
+                pool = self._spawn(i, self.queues[i], stage.workers, stage.name)
+            else:
+                pool = self._spawn_dispatcher(i)
+            self.threads.append(pool)
+        return self
+
+    def _spawn(self, i: int, inbox: queue.Queue, count: int, label: str) -> list[threading.Thread]:
+        pool = []
+        for n in range(count):
+            t = threading.Thread(
+                target=self._work, args=(i, inbox), name=f"{label}-{n}", daemon=True
+            )
+            t.start()
+            pool.append(t)
+        return pool
+
+    def _spawn_dispatcher(self, i: int) -> list[threading.Thread]:
+        t = threading.Thread(
+            target=self._dispatch, args=(i,), name=f"{self.stages[i].name}-dispatch", daemon=True
+        )
+        t.start()
+        return [t]
+
+    def submit(self, item, stage: str | None = None) -> None:
+        """Feed the first stage, or the named one. Blocks while its queue is full."""
+        i = 0 if stage is None else [s.name for s in self.stages].index(stage)
+        self.queues[i].put(item)
+
+    def close(self) -> None:
+        """Drain every stage in order, then stop its workers."""
+        for i, pool in enumerate(self.threads):
+            for _ in pool:
+                self.queues[i].put(_STOP)
+            for t in pool:
+                t.join()
+
+    def _dispatch(self, i: int) -> None:
+        stage = self.stages[i]
+        lanes: dict[str, tuple[queue.Queue, list[threading.Thread]]] = {}
+        while True:
+            item = self.queues[i].get()
+            if item is _STOP:
+                break
+            try:
+                name = stage.key(item)
+            except Exception:
+                print(f"[{stage.name}] no lane for item:\n{traceback.format_exc()}")
+                continue
+            if name not in lanes:
+                inbox = queue.Queue()
+                lanes[name] = (inbox, self._spawn(i, inbox, stage.workers, f"{stage.name}[{name}]"))
+            lanes[name][0].put(item)
+        for inbox, pool in lanes.values():
+            for _ in pool:
+                inbox.put(_STOP)
+        for _, pool in lanes.values():
+            for t in pool:
+                t.join()
+
+    def _work(self, i: int, inbox: queue.Queue) -> None:
+        stage = self.stages[i]
+        outbox = self.queues[i + 1] if i + 1 < len(self.queues) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            try:
+                result = stage.fn(item)
+            except Exception:
+                # One bad clip must not take a worker down with it.
+                print(f"[{stage.name}] failed:\n{traceback.format_exc()}")
+                continue
+            if result is not None and outbox is not None:
+                outbox.put(result)
@@ -0,0 +1,249 @@
+"""Check a clip locally before it costs an upload.
+
+upload_video() only looked at the file extension. A landscape clip, one over
+the Shorts length limit, or one in a codec YouTube chokes on still cost the
+1600-unit insert and the upload bandwidth before YouTube rejected it or
+filed it as a regular video. Preflight reads the clip's metadata with ffprobe
+and turns away what can't be a Short. A file whose moov atom sits after the
+media data (no fast start) is remuxed with the atom moved to the front: a
+stream copy, no re-encode, which YouTube can start processing sooner.
+
+Results are cached by content hash, so checking the same file again (a
+resumed job, a clip fanned out to several channels) costs one hash. Only
+verdicts on the file are cached: an ffprobe that timed out or couldn't be
+started says nothing about the clip, which is checked again next time. The
+cache is a SQLite table, like the description cache, and drops the least
+recently used entries past its size limit instead of growing for ever.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+
+from sqlite_store import transaction
+
+PREFLIGHT_CACHE_FILE = "preflight_cache.sqlite3"
+PREFLIGHT_CACHE_MAX_ENTRIES = int(os.getenv("PREFLIGHT_CACHE_MAX_ENTRIES", "5000"))
+# YouTube counts square and vertical clips up to three minutes as Shorts.
+SHORTS_MAX_SECONDS = float(os.getenv("SHORTS_MAX_SECONDS", "180"))
+VIDEO_CODECS = {"h264", "hevc", "vp9", "av1", "mpeg4"}
+AUDIO_CODECS = {"aac", "mp3", "opus", "vorbis", "ac3", "eac3", "alac", "flac"}
+PROBE_TIMEOUT_S = 30
+REMUX_TIMEOUT_S = 120
+
+
+@dataclass
+class PreflightResult:
+    ok: bool
+    reasons: list[str] = field(default_factory=list)
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    video_codec: str = ""
+    audio_codec: str = ""
+    faststart: bool | None = None
+    remuxed: bool = False
+    # True when ffprobe wasn't available and nothing could be checked.
+    unchecked: bool = False
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def moov_before_mdat(path: str) -> bool | None:
+    """Walk the top-level MP4 boxes. None if the file isn't a readable MP4."""
+    with open(path, "rb") as file:
+        size_left = os.path.getsize(path)
+        while size_left >= 8:
+            header = file.read(8)
+            if len(header) < 8:
+                return None
+            size, kind = struct.unpack(">I4s", header)
+            header_len = 8
+            if size == 1:
+                size = struct.unpack(">Q", file.read(8))[0]
+                header_len = 16
+            elif size == 0:
+                size = size_left
+            if kind == b"moov":
+                return True
+            if kind == b"mdat":
+                return False
+            if size < header_len:
+                return None
+            file.seek(size - header_len, os.SEEK_CUR)
+            size_left -= size
+    return None
+
+
+def probe(path: str) -> dict | None:
+    """ffprobe's format and streams for the file, or None without ffprobe."""
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    out = subprocess.run(
+        [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path],
+        check=True, capture_output=True, timeout=PROBE_TIMEOUT_S,
+    )
+    return json.loads(out.stdout)
+
+
+def evaluate(info: dict, faststart: bool | None) -> PreflightResult:
+    """What the probe says about the clip being a Short YouTube will accept."""
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    result = PreflightResult(ok=True, faststart=faststart)
+    if video is None:
+        result.reasons.append("no video stream")
+    else:
+        result.width, result.height = int(video.get("width", 0)), int(video.get("height", 0))
+        # A rotated phone clip is stored landscape with a 90° display rotation.
+        rotation = abs(int(float(video.get("tags", {}).get("rotate", 0) or 0)))
+        for side in video.get("side_data_list", []):
+            rotation = abs(int(float(side.get("rotation", rotation) or 0)))
+        if rotation % 180 == 90:
+            result.width, result.height = result.height, result.width
+        result.video_codec = video.get("codec_name", "")
+        if result.video_codec not in VIDEO_CODECS:
+            result.reasons.append(f"video codec {result.video_codec or 'unknown'} not accepted")
+        if result.width > result.height:
+            result.reasons.append(f"landscape {result.width}x{result.height}; not a Short")
+    if audio is not None:
+        result.audio_codec = audio.get("codec_name", "")
+        if result.audio_codec not in AUDIO_CODECS:
+            result.reasons.append(f"audio codec {result.audio_codec or 'unknown'} not accepted")
+    result.duration = float(info.get("format", {}).get("duration", 0) or 0)
+    if result.duration <= 0:
+        result.reasons.append("no duration; file is truncated or not a video")
+    elif result.duration > SHORTS_MAX_SECONDS:
+        result.reasons.append(f"{result.duration:.0f}s is over the {SHORTS_MAX_SECONDS:.0f}s Shorts limit")
+    result.ok = not result.reasons
+    return result
+
+
+def remux_faststart(path: str) -> bool:
+    """Move the moov atom to the front with a stream copy, in place."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return False
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.faststart{ext}"
+    try:
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-i", path, "-map", "0",
+             "-c", "copy", "-movflags", "+faststart", tmp],
+            check=True, capture_output=True, timeout=REMUX_TIMEOUT_S,
+        )
+        os.replace(tmp, path)
+        return True
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"⚠️ Fast-start remux failed for {path}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    digest  TEXT PRIMARY KEY,
+    result  TEXT NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used_at);
+"""
+
+
+class PreflightCache:
+    """Content hash -> preflight result, least recently used evicted past `max_entries`."""
+
+    def __init__(self, path: str = PREFLIGHT_CACHE_FILE,
+                 max_entries: int = PREFLIGHT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return transaction(self.path)
+
+    def get(self, digest: str) -> PreflightResult | None:
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT result FROM results WHERE digest = ?", (digest,)).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE results SET used_at = ? WHERE digest = ?", (time.time(), digest))
+        return PreflightResult(**json.loads(row[0]))
+
+    def put(self, digest: str, result: PreflightResult) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (digest, result, used_at) VALUES (?, ?, ?)",
+                (digest, json.dumps(asdict(result)), time.time()),
+            )
+            conn.execute(
+                "DELETE FROM results WHERE digest IN ("
+                " SELECT digest FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_preflight_cache() -> PreflightCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PreflightCache()
+        return _cache
+
+
+def preflight(path: str, cache: PreflightCache | None = None) -> PreflightResult:
+    """
+    Check `path` and fix what can be fixed without re-encoding. The file may be
+    replaced by its fast-start remux. Without ffprobe, or when it times out or
+    can't be run, nothing is checked and the clip is let through, as before.
+    """
+    cache = cache or get_preflight_cache()
+    digest = file_hash(path)
+    result = cache.get(digest)
+    if result is None:
+        try:
+            info = probe(path)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            # ffprobe ran and couldn't make sense of the file: that won't change.
+            result = PreflightResult(ok=False, reasons=[f"ffprobe could not read the file: {e}"[:200]])
+            cache.put(digest, result)
+            return result
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ ffprobe failed on {path} ({e}); letting it through unchecked.")
+            return PreflightResult(ok=True, unchecked=True)
+        if info is None:
+            return PreflightResult(ok=True, unchecked=True)
+        is_mp4 = any(f in info.get("format", {}).get("format_name", "") for f in ("mp4", "mov"))
+        result = evaluate(info, moov_before_mdat(path) if is_mp4 else None)
+        cache.put(digest, result)
+
+    if result.ok and result.faststart is False and remux_faststart(path):
+        result.faststart = True
+        # The remuxed file is a different byte stream; remember it too. It is
+        # already fast-start, so a later check of it has nothing to rewrite.
+        cache.put(file_hash(path), result)
+        result = replace(result, remuxed=True)
+    return result
@@ -0,0 +1,166 @@
+"""YouTube Data API quota accounting.
+
+Every project gets 10,000 units a day, reset at midnight Pacific time, and the
+calls are not priced alike: videos.insert is 1600 units, search.list 100, a
+plain list 1. Nothing used to track this, so a category sweep paging through
+search.list could spend the day's budget and leave the scheduled uploads to
+fail with quotaExceeded.
+
+Every YouTube request now goes out through MeteredRequest (the services in
+token_manager and youtube_client are built with it), which charges its unit
+cost to the QuotaMeter. The meter keeps the day's spend per Cloud project in
+quota_usage.json, so it survives restarts and is shared by every script.
+Maintenance work asks `meter.affordable(units, LOW)` before each step and
+stops while the remaining budget is down to what the uploads need.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from googleapiclient.http import HttpRequest
+
+from state_store import update
+
+QUOTA_FILE = "quota_usage.json"
+DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+# Low-priority work never touches the last this-many units of the day.
+UPLOAD_RESERVE = int(os.getenv("YOUTUBE_UPLOAD_RESERVE", "3200"))
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+HIGH = "high"  # uploads and what they need
+LOW = "low"    # maintenance: category fixes, pinned comments, backfills
+
+# Units per call, by discovery method id. Anything not listed is priced as a
+# write (50) if it changes something, else as a read (1).
+UNIT_COSTS = {
+    "youtube.videos.insert": 1600,
+    "youtube.search.list": 100,
+    "youtube.captions.insert": 400,
+    "youtube.captions.update": 450,
+    "youtube.thumbnails.set": 50,
+    "youtube.videos.update": 50,
+    "youtube.videos.delete": 50,
+    "youtube.playlistItems.insert": 50,
+    "youtube.playlists.insert": 50,
+    "youtube.commentThreads.insert": 50,
+    "youtube.comments.setModerationStatus": 50,
+}
+_WRITE_VERBS = ("insert", "update", "delete", "set", "rate", "markAsSpam")
+
+
+def unit_cost(method_id: str) -> int:
+    if method_id in UNIT_COSTS:
+        return UNIT_COSTS[method_id]
+    verb = (method_id or "").rsplit(".", 1)[-1]
+    return 50 if verb.startswith(_WRITE_VERBS) else 1
+
+
+def quota_day(now: datetime | None = None) -> str:
+    return (now or datetime.now(QUOTA_TZ)).astimezone(QUOTA_TZ).date().isoformat()
+
+
+class QuotaMeter:
+    def __init__(self, path: str = QUOTA_FILE, daily: int = DAILY_QUOTA,
+                 reserve: int = UPLOAD_RESERVE):
+        self.path = path
+        self.daily = daily
+        self.reserve = reserve
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _today(self, data: dict, project: str) -> dict:
+        entry = data.get(project)
+        if not entry or entry.get("day") != quota_day():
+            entry = data[project] = {"day": quota_day(), "used": 0, "calls": {}}
+        return entry
+
+    def charge(self, method_id: str, count: int = 1, project: str = "default") -> int:
+        """Record `count` calls of a method. Returns the units charged."""
+        units = unit_cost(method_id) * count
+        def add(text):
+            try:
+                data = json.loads(text) if text else {}
+            except ValueError:
+                data = {}
+            entry = self._today(data, project)
+            entry["used"] += units
+            entry["calls"][method_id] = entry["calls"].get(method_id, 0) + count
+            return json.dumps(data, indent=2, sort_keys=True)
+
+        # Read-modify-write under the file lock, so another script's spend
+        # since our last write isn't lost.
+        with self._lock:
+            update(self.path, add)
+        return units
+
+    def used(self, project: str = "default") -> int:
+        with self._lock:
+            return self._today(self._load(), project)["used"]
+
+    def remaining(self, project: str = "default") -> int:
+        return max(0, self.daily - self.used(project))
+
+    def affordable(self, units: int, priority: str = HIGH, project: str = "default") -> bool:
+        """Can `units` be spent now? Low priority may not dip into the upload reserve."""
+        floor = self.reserve if priority == LOW else 0
+        return self.remaining(project) - units >= floor
+
+
+_meter = None
+_meter_lock = threading.Lock()
+
+
+def get_meter() -> QuotaMeter:
+    global _meter
+    with _meter_lock:
+        if _meter is None:
+            _meter = QuotaMeter()
+        return _meter
+
+
+def project_of(http) -> str:
+    """The Cloud project a transport (or service) bills to: its OAuth client id.
+
+    Quota belongs to the project, so every channel authorized through the same
+    credentials.json draws on the same budget.
+    """
+    http = getattr(http, "_http", http)
+    creds = getattr(http, "credentials", None)
+    return getattr(creds, "client_id", None) or "default"
+
+
+class MeteredRequest(HttpRequest):
+    """HttpRequest that charges the quota meter once per API call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._charged = False
+
+    def _charge(self):
+        if not self._charged:
+            self._charged = True
+            get_meter().charge(self.methodId, project=project_of(self.http))
+
+    def execute(self, http=None, num_retries=0):
+        self._charge()
+        return super().execute(http=http, num_retries=num_retries)
+
+    def next_chunk(self, http=None, num_retries=0):
+        # A request built to resume a saved upload session was paid for when
+        # that session started.
+        if self.resumable_uri is None:
+            self._charge()
+        return super().next_chunk(http=http, num_retries=num_retries)
@@ -0,0 +1,116 @@
+"""Batch review: contact sheets and a holding queue for downloaded clips.
+
+The old review played each clip in the system player and blocked on input()
+until the window was closed, so downloads and uploads sat idle behind one
+human per clip. In queue mode clips are downloaded ahead, a worker pool turns
+each into a contact sheet (keyframes from across the clip in one strip), and
+the clips wait here until there are enough for the operator to title a batch
+in one sitting.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from preflight import probe
+
+SHEET_FRAMES = 6
+SHEET_FRAME_WIDTH = 240
+SHEET_TIMEOUT_S = 60
+
+
+def _duration(video_path: str) -> float | None:
+    """The clip's length from ffprobe, or None if it can't be had."""
+    try:
+        info = probe(video_path)
+        return float(info["format"]["duration"]) if info else None
+    except (OSError, subprocess.SubprocessError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _seek_points(frames: int, duration: float | None) -> list[float]:
+    """The middle of each of `frames` equal spans of the clip; none if its length is unknown."""
+    if not duration or duration <= 0:
+        return []
+    return [duration * (i + 0.5) / frames for i in range(frames)]
+
+
+def make_contact_sheet(video_path: str, frames: int = SHEET_FRAMES,
+                       width: int = SHEET_FRAME_WIDTH, duration: float | None = None) -> str | None:
+    """
+    Tile `frames` keyframes from evenly spaced points across the whole clip
+    side by side into <video>.sheet.jpg. Each point is a seek to the nearest
+    keyframe and only keyframes are decoded, so this takes a fraction of a
+    second for a Short. `duration` is probed if not given. None if ffmpeg is
+    missing or fails; the clip can still be reviewed by playing it.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg or not os.path.exists(video_path):
+        return None
+    if duration is None:
+        duration = _duration(video_path)
+    sheet = video_path + ".sheet.jpg"
+    points = _seek_points(frames, duration)
+    if points:
+        inputs = []
+        for at in points:
+            inputs += ["-skip_frame", "nokey", "-ss", f"{at:.3f}", "-i", video_path]
+        if frames == 1:
+            graph = f"[0:v]scale={width}:-2"
+        else:
+            graph = "".join(f"[{i}:v]scale={width}:-2,setsar=1[f{i}];" for i in range(frames))
+            graph += "".join(f"[f{i}]" for i in range(frames)) + f"hstack=inputs={frames}"
+    else:
+        # Length unknown: the first keyframes are the best we can do.
+        inputs = ["-skip_frame", "nokey", "-i", video_path]
+        graph = f"[0:v]scale={width}:-2,tile={frames}x1"
+    cmd = [
+        ffmpeg, "-y", "-loglevel", "error",
+        *inputs,
+        "-filter_complex", graph,
+        "-frames:v", "1", "-q:v", "4",
+        sheet,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=SHEET_TIMEOUT_S)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"⚠️ No contact sheet for {video_path}: {e}")
+        return None
+    return sheet if os.path.exists(sheet) else None
+
+
+class ReviewQueue:
+    """Downloaded clips waiting for the operator, in arrival order."""
+
+    def __init__(self):
+        self._items = []
+        self._since = None
+        self._lock = threading.Lock()
+
+    def add(self, item) -> None:
+        with self._lock:
+            if not self._items:
+                self._since = time.monotonic()
+            self._items.append(item)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def ready(self, batch: int, max_wait_s: float) -> bool:
+        """A full batch is waiting, or the oldest clip has waited long enough."""
+        with self._lock:
+            if not self._items:
+                return False
+            return len(self._items) >= batch or time.monotonic() - self._since >= max_wait_s
+
+    def take(self, limit: int | None = None) -> list:
+        with self._lock:
+            taken = self._items[:limit] if limit else self._items[:]
+            self._items = self._items[len(taken):]
+            self._since = time.monotonic() if self._items else None
+            return taken
@@ -0,0 +1,122 @@
+"""Batch upload-slot scheduling.
+
+`calculate_next_upload_time()` answers "what is the one next slot?" and callers
+re-read and re-write last_upload_time.txt around every video. This answers
+"give me the next N slots" in one pass over the slot grid and writes the
+high-water mark once, at the end.
+
+The slots are the same ones calculate_next_upload_time() hands out one at a
+time: the first grid slot after the hour of the last upload, and never less
+than 15 minutes from now.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo
+
+from state_store import advance_timestamp, read_timestamp
+
+LAST_UPLOAD_FILE = "last_upload_time.txt"  # File to store the last upload time
+
+# Every 3 hours, local time: 12am, 3am, 6am, 9am, 12pm, 3pm, 6pm, 9pm
+PREFERRED_HOURS = [0, 3, 6, 9, 12, 15, 18, 21]
+MIN_LEAD = timedelta(minutes=15)
+
+
+class UploadScheduler:
+    """
+    Slot grid + timezone + high-water-mark file for one channel.
+
+    hours: the daily slot grid, in `tz` wall-clock time.
+    tz: a tzinfo or IANA name ("America/Los_Angeles"); default is the machine's.
+    state_file: where the last scheduled slot is kept.
+    """
+
+    def __init__(self, hours=None, tz: tzinfo | str | None = None,
+                 state_file: str = LAST_UPLOAD_FILE, min_lead: timedelta = MIN_LEAD):
+        self.hours = sorted(set(hours if hours is not None else PREFERRED_HOURS))
+        if not self.hours or not all(0 <= h < 24 for h in self.hours):
+            raise ValueError(f"slot hours must be 0-23, got {hours!r}")
+        if isinstance(tz, str):
+            tz = ZoneInfo(tz)
+        self.tz = tz or datetime.now().astimezone().tzinfo
+        self.state_file = state_file
+        self.min_lead = min_lead
+
+    @classmethod
+    def for_channel(cls, slug: str, hours=None, tz=None) -> "UploadScheduler":
+        """A scheduler with its own high-water mark, so channels don't share slots."""
+        return cls(hours, tz, state_file=f"last_upload_time.{slug}.txt")
+
+    def high_water_mark(self) -> datetime | None:
+        """The last slot handed out, or None if nothing has been scheduled yet."""
+        return read_timestamp(self.state_file, self.tz)
+
+    def _slot(self, day, index: int) -> datetime:
+        """The index-th grid slot counting from midnight of `day` (may run into later days)."""
+        days, i = divmod(index, len(self.hours))
+        d = day + timedelta(days=days)
+        return datetime(d.year, d.month, d.day, self.hours[i], 0, tzinfo=self.tz)
+
+    def _first_index_after(self, moment: datetime, inclusive: bool) -> tuple:
+        """(day, index) of the first grid slot after `moment` (or at it, if inclusive)."""
+        moment = moment.astimezone(self.tz)
+        day = moment.date()
+        for i, _ in enumerate(self.hours):
+            slot = self._slot(day, i)
+            if slot > moment or (inclusive and slot == moment):
+                return day, i
+        return day, len(self.hours)
+
+    def plan(self, n: int, after: datetime | None = None, now: datetime | None = None) -> list[datetime]:
+        """
+        The next n slots, in UTC, in order.
+
+        after: the last slot already used; defaults to the high-water mark.
+        Nothing is written — call commit() once the uploads are scheduled.
+        """
+        if n <= 0:
+            return []
+        if after is None:
+            after = self.high_water_mark()
+        now = now or datetime.now(timezone.utc)
+
+        # Earliest allowed: the next slot after the last upload's hour...
+        start = self._first_index_after(now + self.min_lead, inclusive=True)
+        if after is not None:
+            after = after if after.tzinfo else after.replace(tzinfo=self.tz)
+            hour_start = after.astimezone(self.tz).replace(minute=0, second=0, microsecond=0)
+            from_last = self._first_index_after(hour_start, inclusive=False)
+            # ...unless that is already too close to now.
+            if self._slot(*from_last) > self._slot(*start):
+                start = from_last
+
+        day, index = start
+        return [self._slot(day, index + k).astimezone(timezone.utc) for k in range(n)]
+
+    def reserve(self, after: datetime | None = None, now: datetime | None = None) -> datetime:
+        """
+        Claim the next slot by moving the high-water mark onto it, in UTC.
+
+        The move is a compare-and-swap: if another process claimed a slot
+        since the mark was read, the swap fails and the slot after theirs is
+        tried, so two processes sharing the file never get the same slot.
+        `after` is a slot this process already holds, if the file lags it.
+        """
+        while True:
+            mark = self.high_water_mark()
+            if after is not None and (mark is None or after > mark):
+                mark = after
+            slot = self.plan(1, after=mark, now=now)[0]
+            if advance_timestamp(self.state_file, slot, self.tz):
+                return slot
+
+    def commit(self, slots) -> None:
+        """Move the high-water mark to the latest of `slots` (never backwards)."""
+        slots = list(slots)
+        if not slots:
+            return
+        # Compare-and-swap, so another process committing a later slot in
+        # between isn't overwritten. Stored in local time for readability.
+        advance_timestamp(self.state_file, max(slots), self.tz)
@@ -0,0 +1,26 @@
+"""Short-lived SQLite connections for the on-disk caches.
+
+`with sqlite3.connect(path) as conn:` commits (or rolls back) on exit but
+leaves the connection open, so a cache that opens one per call leaks one per
+call. transaction() closes it as well.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+
+BUSY_TIMEOUT_S = 30
+
+
+@contextmanager
+def transaction(path: str, row_factory=None, timeout: float = BUSY_TIMEOUT_S):
+    """A connection for one transaction: committed (or rolled back) and closed on exit."""
+    conn = sqlite3.connect(path, timeout=timeout)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
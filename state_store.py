@@ -0,0 +1,182 @@
+"""Small state files that several processes can share.
+
+last_upload_time.txt, the token files and the other JSON state files were
+written in place with open(path, "w"). A reader that caught the file
+mid-write saw it empty or half written, and two processes doing
+read-modify-write on the same file could lose an update: two UploadVideo.py
+instances could each read the same high-water mark and hand out the same
+slot, and a channel refresh could run in the middle of an upload.
+
+This module provides three things:
+
+- atomic_write() writes a temp file in the same directory and renames it
+  over the target. Readers see the old file or the new one, never a torn
+  one.
+- locked() takes an advisory lock on <path>.lock. It uses flock on POSIX and
+  msvcrt on Windows, and serialises writers across processes.
+- compare_and_swap() replaces the contents only if they are still what the
+  caller read. advance_timestamp() builds on it to move a high-water mark
+  forward and never back, whichever process gets there first.
+
+The locks are advisory. Only code that goes through this module respects
+them.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, tzinfo
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+LOCK_TIMEOUT_S = 30
+_POLL_S = 0.05
+# Windows refuses to replace a file another process has open; retry briefly.
+_REPLACE_RETRIES = 20
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+def atomic_write(path: str, text: str) -> None:
+    """Write via a temp file in the same directory and rename over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    # The name ends in .tmp, so globs for the real files (tokens/*.json) never
+    # match one in flight or left behind by a crash.
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        for attempt in range(_REPLACE_RETRIES):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                if attempt == _REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(_POLL_S)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_text(path: str) -> str | None:
+    """The file's contents, or None if it doesn't exist."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if os.name == "nt":
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int) -> None:
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def locked(path: str, timeout: float = LOCK_TIMEOUT_S):
+    """
+    Hold the exclusive advisory lock for `path` (on <path>.lock, so the
+    target itself can still be renamed over). Raises LockTimeout if another
+    holder doesn't let go within `timeout` seconds.
+    """
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"{path} is locked by another process")
+            time.sleep(_POLL_S)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def locked_write(path: str, text: str, timeout: float = LOCK_TIMEOUT_S) -> None:
+    with locked(path, timeout):
+        atomic_write(path, text)
+
+
+def update(path: str, change, timeout: float = LOCK_TIMEOUT_S) -> str | None:
+    """
+    Read-modify-write under the lock. `change` gets the current text (None if
+    there is no file) and returns the new text, or None to leave it alone.
+    Returns what the file holds afterwards.
+    """
+    with locked(path, timeout):
+        current = read_text(path)
+        new = change(current)
+        if new is None or new == current:
+            return current
+        atomic_write(path, new)
+        return new
+
+
+def compare_and_swap(path: str, expected: str | None, new: str,
+                     timeout: float = LOCK_TIMEOUT_S) -> bool:
+    """Replace the contents with `new` only if they are still `expected` (None: no file)."""
+    with locked(path, timeout):
+        if read_text(path) != expected:
+            return False
+        atomic_write(path, new)
+        return True
+
+
+def _parse_timestamp(text: str | None, tz: tzinfo | None) -> datetime | None:
+    text = (text or "").strip()
+    if not text:
+        return None
+    value = datetime.fromisoformat(text)
+    return value if value.tzinfo or tz is None else value.replace(tzinfo=tz)
+
+
+def read_timestamp(path: str, tz: tzinfo | None = None) -> datetime | None:
+    """The ISO timestamp in `path`; a naive one is taken to be in `tz`."""
+    return _parse_timestamp(read_text(path), tz)
+
+
+def advance_timestamp(path: str, moment: datetime, tz: tzinfo | None = None) -> bool:
+    """
+    Move the timestamp in `path` forward to `moment`, never backwards. It is
+    stored in `tz` for readability, or in the moment's own zone when `tz` is
+    None. Returns False if the file already held `moment` or something later.
+    """
+    zone = tz or moment.tzinfo or datetime.now().astimezone().tzinfo
+    moment = moment if moment.tzinfo else moment.replace(tzinfo=zone)
+    text = moment.astimezone(zone).isoformat()
+    while True:
+        current = read_text(path)
+        stored = _parse_timestamp(current, zone)
+        if stored is not None and stored >= moment:
+            return False
+        if compare_and_swap(path, current, text):
+            return True
+        # Another process moved it between our read and the swap; look again.
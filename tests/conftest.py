@@ -0,0 +1,222 @@
+"""Fake Google API clients shared by the tests.
+
+FakeYouTube is one channel held in plain dicts, with just enough of the
+resources the repo calls (channels, playlists, playlistItems, videos,
+commentThreads, comments and batch requests) for the code under test to run
+against it unchanged. Every call is recorded in `calls` by method name.
+"""
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+PAGE_SIZE = 50
+
+
+class Call:
+    """A request object: execute() runs the fake's handler."""
+
+    def __init__(self, fn, **args):
+        self.fn = fn
+        self.args = args  # what list_next needs to ask for the next page
+
+    def execute(self):
+        return self.fn()
+
+
+class FakeBatch:
+    """new_batch_http_request(): runs each request in turn and reports to the callback."""
+
+    def __init__(self, callback, on_execute=None):
+        self.callback = callback
+        self.on_execute = on_execute
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        if self.on_execute:
+            self.on_execute(len(self.requests))
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.fn(), None)
+            except HttpError as e:
+                self.callback(request_id, None, e)
+
+
+def http_error(status, reason):
+    return HttpError(httplib2.Response({"status": status}), reason.encode())
+
+
+def _page(items, page_token, max_results):
+    page = items[page_token:page_token + max_results]
+    out = {"items": page}
+    if page_token + max_results < len(items):
+        out["nextPageToken"] = page_token + max_results
+    return out
+
+
+class FakeYouTube:
+    """
+    Channel UC1, whose uploads playlist UU1 lists `uploads` newest first.
+
+    videos: video id -> snippet, served by videos.list and changed by
+        videos.update. Ids in `uploads` but not here were deleted.
+    playlists: playlist id -> title, for playlists.list/insert; the items
+        added with playlistItems.insert land in `items`.
+    pinned: video id -> whether its top comment is pinned.
+    broken: video ids whose update, comment listing or playlist insert fails.
+    """
+
+    def __init__(self, videos=None, uploads=None, playlists=None, pinned=None):
+        self.channel_id = "UC1"  # None: the account has no channel
+        self.videos_by_id = {v: dict(snippet) for v, snippet in (videos or {}).items()}
+        self.uploads = list(self.videos_by_id if uploads is None else uploads)
+        self.playlists_by_id = dict(playlists or {})
+        self.items = []  # (playlist id, video id)
+        self.pinned = dict(pinned or {})
+        self.broken = set()
+        self.calls = []
+        self.updated = []  # video ids, in the order videos.update ran
+        self.thread_lists = []  # video ids, in the order commentThreads.list ran
+
+    def publish(self, video_id, **snippet):
+        """A new upload: first in the uploads playlist."""
+        self.videos_by_id[video_id] = snippet
+        self.uploads.insert(0, video_id)
+
+    def channels(self):
+        return _Channels(self)
+
+    def playlists(self):
+        return _Playlists(self)
+
+    def playlistItems(self):
+        return _PlaylistItems(self)
+
+    def videos(self):
+        return _Videos(self)
+
+    def commentThreads(self):
+        return _CommentThreads(self)
+
+    def comments(self):
+        return _Comments(self)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback, on_execute=lambda n: self.calls.append("batch"))
+
+
+class _Resource:
+    def __init__(self, fake):
+        self.fake = fake
+
+
+class _Channels(_Resource):
+    def list(self, part, mine):
+        self.fake.calls.append("channels.list")
+        channel_id = self.fake.channel_id
+        return Call(lambda: {"items": [{"id": channel_id, "contentDetails": {
+            "relatedPlaylists": {"uploads": "UU1"}}}] if channel_id else []})
+
+
+class _Playlists(_Resource):
+    def list(self, part, mine, maxResults, pageToken=0):
+        self.fake.calls.append("playlists.list")
+        items = [{"id": i, "snippet": {"title": t}} for i, t in self.fake.playlists_by_id.items()]
+        out = _page(items, pageToken, maxResults)
+        return Call(lambda: out, part=part, mine=mine, maxResults=maxResults)
+
+    def list_next(self, request, response):
+        if "nextPageToken" not in response:
+            return None
+        return self.list(**request.args, pageToken=response["nextPageToken"])
+
+    def insert(self, part, body):
+        self.fake.calls.append("playlists.insert")
+        new_id = f"PL{len(self.fake.playlists_by_id)}"
+        self.fake.playlists_by_id[new_id] = body["snippet"]["title"]
+        return Call(lambda: {"id": new_id})
+
+
+class _PlaylistItems(_Resource):
+    def list(self, part, playlistId, maxResults, pageToken=0):
+        assert playlistId == "UU1"
+        self.fake.calls.append("playlistItems.list")
+        items = [{"contentDetails": {"videoId": v}} for v in self.fake.uploads]
+        out = _page(items, pageToken, maxResults)
+        return Call(lambda: out, part=part, playlistId=playlistId, maxResults=maxResults)
+
+    def list_next(self, request, response):
+        if "nextPageToken" not in response:
+            return None
+        return self.list(**request.args, pageToken=response["nextPageToken"])
+
+    def insert(self, part, body):
+        self.fake.calls.append("playlistItems.insert")
+        playlist_id = body["snippet"]["playlistId"]
+        video_id = body["snippet"]["resourceId"]["videoId"]
+
+        def run():
+            if playlist_id not in self.fake.playlists_by_id:
+                raise http_error(404, "playlistNotFound")
+            if video_id in self.fake.broken:
+                raise http_error(403, "forbidden")
+            self.fake.items.append((playlist_id, video_id))
+            return {}
+
+        return Call(run)
+
+
+class _Videos(_Resource):
+    def list(self, part, id, maxResults):
+        ids = id.split(",")
+        assert len(ids) <= PAGE_SIZE
+        self.fake.calls.append("videos.list")
+        videos = self.fake.videos_by_id
+        return Call(lambda: {"items": [
+            {"id": v, "snippet": dict(videos[v]), "status": {"privacyStatus": "public"}}
+            for v in ids if v in videos
+        ]})
+
+    def update(self, part, body):
+        self.fake.calls.append("videos.update")
+
+        def run():
+            if body["id"] in self.fake.broken:
+                raise http_error(500, "backendError")
+            assert "thumbnails" not in body["snippet"]
+            self.fake.videos_by_id[body["id"]] = dict(body["snippet"])
+            self.fake.updated.append(body["id"])
+            return body
+
+        return Call(run)
+
+
+class _CommentThreads(_Resource):
+    def list(self, part, videoId, maxResults):
+        self.fake.calls.append("commentThreads.list")
+
+        def run():
+            self.fake.thread_lists.append(videoId)
+            if videoId in self.fake.broken:
+                raise http_error(403, "commentsDisabled")
+            pinned = self.fake.pinned[videoId]
+            return {"items": [{"snippet": {"topLevelComment": {"snippet": {"isPinned": pinned}}}}]}
+
+        return Call(run)
+
+    def insert(self, part, body):
+        self.fake.calls.append("commentThreads.insert")
+        return Call(lambda: {"id": body["snippet"]["videoId"] + ":c"})
+
+
+class _Comments(_Resource):
+    def setModerationStatus(self, id, moderationStatus, banAuthor):
+        self.fake.calls.append("comments.setModerationStatus")
+
+        def run():
+            self.fake.pinned[id.split(":")[0]] = True
+            return {}
+
+        return Call(run)
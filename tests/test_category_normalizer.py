@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import quota
+from category_normalizer import normalize_categories
+from conftest import FakeYouTube
+from quota import QuotaMeter
+
+
+@pytest.fixture(autouse=True)
+def meter(tmp_path, monkeypatch):
+    meter = QuotaMeter(str(tmp_path / "quota.json"))
+    monkeypatch.setattr(quota, "_meter", meter)
+    return meter
+
+
+def _channel(n, wrong_every=10):
+    return FakeYouTube({f"v{i}": {"title": f"v{i}", "thumbnails": {},
+                                  "categoryId": "22" if i % wrong_every == 0 else "24"}
+                        for i in range(n)})
+
+
+def test_dry_run_changes_nothing(tmp_path):
+    youtube = _channel(120)
+    summary = normalize_categories(youtube, checkpoint=str(tmp_path / "cp.json"), dry_run=True)
+
+    assert summary["checked"] == 120 and summary["changed"] == 12
+    assert youtube.updated == []
+    assert youtube.calls.count("videos.list") == 3
+    assert not (tmp_path / "cp.json").exists()
+
+
+def test_only_wrong_videos_are_updated_and_checkpoint_skips_them_next_time(tmp_path):
+    youtube = _channel(120)
+    youtube.broken.add("v10")
+    checkpoint = str(tmp_path / "cp.json")
+
+    summary = normalize_categories(youtube, checkpoint=checkpoint)
+    assert summary["updated"] == 11 and summary["failed"] == 1
+    assert len(youtube.updated) == 11
+
+    youtube.broken.clear()
+    youtube.calls.clear()
+    summary = normalize_categories(youtube, checkpoint=checkpoint)
+
+    # Only the failed video is read again.
+    assert summary["checked"] == 1 and summary["updated"] == 1
+    assert youtube.calls.count("videos.list") == 1
+
+
+def test_stops_at_the_upload_reserve(tmp_path, meter):
+    meter.daily = meter.reserve + 120  # room for two updates and the reads
+    youtube = _channel(50)
+
+    summary = normalize_categories(youtube, checkpoint=str(tmp_path / "cp.json"))
+
+    assert summary["updated"] == 2
+    assert summary["deferred"] == 3
+
+
+def test_no_walk_without_budget_for_a_batch(tmp_path, meter):
+    meter.daily = meter.reserve + 10  # less than a single update
+    youtube = _channel(50)
+
+    summary = normalize_categories(youtube, checkpoint=str(tmp_path / "cp.json"))
+
+    assert summary["checked"] == 0 and summary["updated"] == 0
+    assert youtube.calls == ["channels.list"]
+
+
+def test_checkpoint_keeps_other_channels(tmp_path):
+    checkpoint = tmp_path / "cp.json"
+    checkpoint.write_text(json.dumps({"UC9:24": ["x1"]}))
+
+    normalize_categories(_channel(20), checkpoint=str(checkpoint))
+
+    saved = json.loads(checkpoint.read_text())
+    assert saved["UC9:24"] == ["x1"]
+    assert len(saved["UC1:24"]) == 20
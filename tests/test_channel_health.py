@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import channel_auth
+
+
+def _token(tmp_path, slug, minutes_left):
+    expiry = datetime.now(timezone.utc) + timedelta(minutes=minutes_left)
+    (tmp_path / f"{slug}.json").write_text(json.dumps({
+        "token": "t", "refresh_token": "r", "client_id": "c", "client_secret": "s",
+        "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "_channel": {"title": slug},
+    }))
+
+
+def test_refresh_is_skipped_while_the_token_has_time_left(tmp_path, monkeypatch):
+    monkeypatch.setattr(channel_auth, "TOKEN_DIR", tmp_path)
+    refreshed = []
+    monkeypatch.setattr(channel_auth.Credentials, "refresh",
+                        lambda self, request: refreshed.append(self))
+    _token(tmp_path, "fresh", 50)
+    _token(tmp_path, "closing", 5)
+
+    rows = channel_auth.health_all(["closing", "fresh"], margin_min=10)
+
+    assert [(r["slug"], r["state"]) for r in rows] == [("closing", "refreshed"), ("fresh", "valid")]
+    assert len(refreshed) == 1
+
+
+def test_a_hung_token_times_out_without_holding_up_the_rest(monkeypatch):
+    release = threading.Event()
+
+    def fake_health(slug, margin_min, http_timeout=None):
+        if slug == "hung":
+            release.wait(5)
+        return {"slug": slug, "ok": True, "state": "valid"}
+
+    monkeypatch.setattr(channel_auth, "health", fake_health)
+    rows = channel_auth.health_all(["a", "hung", "b"], workers=3, timeout=0.2)
+    release.set()
+
+    assert [r["state"] for r in rows] == ["valid", "timeout", "valid"]
+    assert not rows[1]["ok"]
+
+
+def test_temp_files_from_token_writes_are_not_channels(tmp_path, monkeypatch):
+    monkeypatch.setattr(channel_auth, "TOKEN_DIR", tmp_path)
+    _token(tmp_path, "main", 50)
+    (tmp_path / ".tmp-abc123main.json").write_text("{")  # left by an older version
+    creds, meta = channel_auth.load("main")
+    channel_auth._write("main", creds, meta)
+
+    assert channel_auth._all_slugs() == ["main"]
+
+
+def test_timeout_runs_per_token_and_queued_ones_are_not_checked(monkeypatch):
+    release = threading.Event()
+
+    def fake_health(slug, margin_min, http_timeout=None):
+        if slug.startswith("hung"):
+            release.wait(5)
+        else:
+            time.sleep(0.15)
+        return {"slug": slug, "ok": True, "state": "valid"}
+
+    monkeypatch.setattr(channel_auth, "health", fake_health)
+    # One worker, 0.2s each: "b" and "c" start late in the sweep but each
+    # still gets its own 0.2s.
+    rows = channel_auth.health_all(["a", "b", "c"], workers=1, timeout=0.2)
+    assert [r["state"] for r in rows] == ["valid", "valid", "valid"]
+
+    started = time.monotonic()
+    rows = channel_auth.health_all(["hung", "x"], workers=1, timeout=0.2)
+    release.set()
+    assert [r["state"] for r in rows] == ["timeout", channel_auth.NOT_CHECKED]
+    assert time.monotonic() - started < 1
@@ -0,0 +1,38 @@
+from channel_inventory import ChannelInventory, fetch_videos, sync_inventory
+from conftest import FakeYouTube
+
+
+def _snippet(v):
+    return {"title": f"t{v}", "categoryId": "22",
+            "publishedAt": f"2026-01-01T00:00:{int(v[1:]) % 60:02d}Z"}
+
+
+def _channel(ids):
+    # v3 was deleted: still in the uploads playlist, gone from videos.list.
+    return FakeYouTube({v: _snippet(v) for v in ids if v != "v3"}, uploads=ids)
+
+
+def test_full_then_incremental_sync(tmp_path):
+    youtube = _channel([f"v{i}" for i in range(120, 0, -1)])
+    inventory = ChannelInventory(str(tmp_path / "inv.sqlite3"))
+
+    new = sync_inventory(youtube, inventory)
+    assert len(new) == 119
+    assert youtube.calls.count("playlistItems.list") == 3
+    assert youtube.calls.count("videos.list") == 3
+
+    youtube.publish("v121", **_snippet("v121"))
+    youtube.publish("v122", **_snippet("v122"))
+    youtube.calls.clear()
+    new = sync_inventory(youtube, inventory)
+
+    assert [v["id"] for v in new] == ["v122", "v121"]
+    # Stopped on the first page at the first known video; channel id was cached.
+    assert youtube.calls == ["playlistItems.list", "videos.list"]
+    assert len(inventory.known_ids("UC1")) == 121
+
+
+def test_fetch_videos_keeps_input_order_and_drops_missing():
+    youtube = _channel(["v5", "v3", "v1"])
+    ids = ["v5", "v3", "v1"]
+    assert [v["id"] for v in fetch_videos(youtube, ids)] == ["v5", "v1"]
@@ -0,0 +1,70 @@
+import json
+
+from channel_router import Route, UploadRouter, load_routes
+from job_ledger import JobLedger, email_id, job_id
+
+
+def test_rules_pick_channels_and_fan_out(tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({
+        "default": "main",
+        "routes": [
+            {"subject": "^carousel", "channels": ["carousel"]},
+            {"sender": "friend@example.com", "channels": ["main", "carousel"]},
+        ],
+    }))
+    router = UploadRouter(*load_routes(str(path)))
+
+    assert router.channels_for("Carousel drop", "me@example.com") == ["carousel"]
+    assert router.channels_for("carousel", "Friend <FRIEND@example.com>") == ["carousel", "main"]
+    assert router.channels_for("Viral", "me@example.com") == ["main"]
+
+
+def test_no_routes_file_means_the_legacy_channel(tmp_path):
+    router = UploadRouter(*load_routes(str(tmp_path / "missing.json")))
+    assert router.channels_for("anything") == ["default"]
+
+
+def test_rule_needs_both_parts_when_given_both():
+    route = Route(channels=["x"], subject="memes", sender="a@b.c")
+    assert route.matches("memes", "a@b.c")
+    assert not route.matches("memes", "other@b.c")
+
+
+def test_each_channel_gets_its_own_lane(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    made = []
+
+    class FakeClient:
+        def __init__(self, slug):
+            made.append(slug)
+
+        def close(self):
+            pass
+
+    router = UploadRouter(make_client=FakeClient,
+                          make_slots=lambda slug, scheduler: scheduler.state_file)
+
+    a, b = router.lane("alpha"), router.lane("beta")
+    assert router.lane("alpha") is a
+    assert made == ["alpha", "beta"]
+    assert b is not a and b.client is not a.client
+    assert a.slots == "last_upload_time.alpha.txt"
+    assert b.slots == "last_upload_time.beta.txt"
+    assert router.lane("default").slots == "last_upload_time.txt"
+
+
+def test_fanned_out_email_settles_when_every_channel_is_done(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    for channel in ["main", "carousel"]:
+        ledger.enqueue(job_id("m1", channel, True), "url", "Viral", channel=channel)
+    ledger.enqueue("m10", "url", "Viral")
+
+    jobs = ledger.jobs_for_email("m1")
+    assert [j["channel"] for j in jobs] == ["main", "carousel"]
+    assert email_id(jobs[1]["msg_id"]) == "m1"
+
+    ledger.advance("m1@main", "cleaned")
+    assert not ledger.email_settled("m1")
+    ledger.advance("m1@carousel", "skipped")
+    assert ledger.email_settled("m1")
@@ -0,0 +1,56 @@
+import pytest
+
+import quota
+from channel_inventory import ChannelInventory
+from comment_sweeper import ALREADY_PINNED, ERROR, PINNED, sweep_pinned_comments
+from conftest import FakeYouTube
+from quota import QuotaMeter
+from youtube_client import YouTubeClient
+
+
+def _snippet(v):
+    return {"publishedAt": f"2026-01-{int(v[1:]) + 1:02d}"}
+
+
+def _channel(pinned):
+    return FakeYouTube({v: _snippet(v) for v in pinned}, pinned=pinned)
+
+
+@pytest.fixture(autouse=True)
+def meter(tmp_path, monkeypatch):
+    monkeypatch.setattr(quota, "_meter", QuotaMeter(str(tmp_path / "quota.json")))
+
+
+def test_second_sweep_only_visits_new_and_failed_videos(tmp_path):
+    youtube = _channel({"v1": True, "v2": False, "v3": False})
+    youtube.broken.add("v3")
+    inventory = ChannelInventory(str(tmp_path / "inv.sqlite3"))
+    record = str(tmp_path / "pinned.json")
+
+    summary = sweep_pinned_comments(youtube, inventory=inventory, record=record)
+    assert summary["counts"] == {ALREADY_PINNED: 1, PINNED: 1, ERROR: 1}
+    assert summary["errors"][0]["video_id"] == "v3"
+    assert summary["latency"]["max"] >= 0
+
+    youtube.publish("v4", **_snippet("v4"))
+    youtube.pinned["v4"] = False
+    youtube.broken.clear()
+    youtube.thread_lists.clear()
+    summary = sweep_pinned_comments(youtube, inventory=inventory, record=record)
+
+    assert sorted(youtube.thread_lists) == ["v3", "v4"]
+    assert summary["counts"] == {PINNED: 2}
+    assert summary["skipped"] == 2
+
+
+def test_concurrent_sweep_through_a_client(tmp_path):
+    youtube = _channel({f"v{i}": False for i in range(20)})
+    client = YouTubeClient(workers=4, service_factory=lambda: youtube)
+
+    summary = sweep_pinned_comments(youtube, client=client,
+                                    inventory=ChannelInventory(str(tmp_path / "inv.sqlite3")),
+                                    record=str(tmp_path / "pinned.json"))
+    client.close()
+
+    assert summary["counts"] == {PINNED: 20}
+    assert all(youtube.pinned.values())
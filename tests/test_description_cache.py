@@ -0,0 +1,91 @@
+import YoutubeUpload
+import description_cache
+from description_cache import DescriptionCache, cache_key
+
+
+def test_same_title_hits_regardless_of_case_and_spacing(tmp_path):
+    cache = DescriptionCache(str(tmp_path / "c.sqlite3"))
+    cache.put(cache_key("LeBron  Dunk", "1", "axon/deep", "mlr"), "LeBron  Dunk", "desc")
+
+    assert cache.get(cache_key("lebron dunk", "1", "axon/deep", "mlr")) == "desc"
+    assert cache.get(cache_key("lebron dunk", "2", "axon/deep", "mlr")) is None
+    assert cache.get(cache_key("lebron dunk", "1", "axon/fast", "mlr")) is None
+    assert cache.get(cache_key("lebron dunk", "1", "axon/deep", "other")) is None
+    assert cache.stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+
+
+def test_entries_expire(tmp_path, monkeypatch):
+    cache = DescriptionCache(str(tmp_path / "c.sqlite3"), ttl_days=1)
+    cache.put("k", "t", "desc")
+
+    later = description_cache.time.time() + 2 * 86400
+    monkeypatch.setattr(description_cache.time, "time", lambda: later)
+
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_is_evicted(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(description_cache.time, "time", lambda: clock[0])
+    cache = DescriptionCache(str(tmp_path / "c.sqlite3"), max_entries=2)
+
+    for key in ["a", "b"]:
+        clock[0] += 1
+        cache.put(key, key, key.upper())
+    clock[0] += 1
+    cache.get("a")  # "b" is now the least recently used
+    clock[0] += 1
+    cache.put("c", "c", "C")
+
+    assert cache.get("a") == "A"
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+
+
+def test_batch_generation_packs_titles_and_falls_back_per_item(tmp_path, monkeypatch):
+    cache = DescriptionCache(str(tmp_path / "c.sqlite3"))
+    monkeypatch.setattr(YoutubeUpload, "get_description_cache", lambda: cache)
+    monkeypatch.setattr(YoutubeUpload, "DESCRIPTION_BATCH_SIZE", 2)
+    model = YoutubeUpload.os.getenv("SHORTS_DESC_MODEL", "axon/deep")
+    cache.put(cache_key("Cached", YoutubeUpload.DESCRIPTION_BATCH_PROMPT_VERSION, model,
+                        YoutubeUpload.DESCRIPTION_VOICE), "Cached", "from cache")
+    # A single-title answer for "A" is not reused by the batch prompt.
+    cache.put(cache_key("A", YoutubeUpload.DESCRIPTION_PROMPT_VERSION, model,
+                        YoutubeUpload.DESCRIPTION_VOICE), "A", "single prompt")
+    prompts = []
+
+    def fake_write(prompt, model):
+        prompts.append(prompt)
+        if "1. A\n2. B" in prompt:
+            # The model skipped title 2.
+            return "=== 1 ===\nAbout A\n\n#a"
+        raise RuntimeError("gateway down")
+
+    monkeypatch.setattr(YoutubeUpload, "_write_descriptions", fake_write)
+
+    out = YoutubeUpload.generate_descriptions(["A", "Cached", "B", "C"])
+
+    assert len(prompts) == 2
+    assert out[0] == YoutubeUpload._clean_description("About A\n\n#a")
+    assert out[1] == "from cache"
+    assert out[2] == out[3] == YoutubeUpload.STATIC_DESCRIPTION
+    assert YoutubeUpload.generate_descriptions(["A"]) == [out[0]]
+    assert len(prompts) == 2
+
+
+def test_async_batch_answers_each_title_from_one_request(tmp_path, monkeypatch):
+    cache = DescriptionCache(str(tmp_path / "c.sqlite3"))
+    monkeypatch.setattr(YoutubeUpload, "get_description_cache", lambda: cache)
+    prompts = []
+
+    def fake_write(prompt, model):
+        prompts.append(prompt)
+        return "=== 1 ===\nOne\ncta\n#one\n=== 2 ===\nTwo\ncta\n#two"
+
+    monkeypatch.setattr(YoutubeUpload, "_write_descriptions", fake_write)
+
+    futures = YoutubeUpload.generate_descriptions_async(["First", "Second"])
+
+    assert [f.result(timeout=5) for f in futures] == ["One\ncta\n#one", "Two\ncta\n#two"]
+    assert len(prompts) == 1
+    assert YoutubeUpload.generate_descriptions_async([]) == []
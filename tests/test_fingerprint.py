@@ -0,0 +1,32 @@
+from fingerprint import Fingerprint, dhash, find_duplicate
+from job_ledger import JobLedger
+
+
+def _frame(shift=0):
+    # 9x8 gray ramp; `shift` darkens a band so a few comparisons flip.
+    return bytes(min(255, max(0, col * 20 - (40 if row < shift else 0) * (col % 2)))
+                 for row in range(8) for col in range(9))
+
+
+def test_dhash_is_stable_and_close_for_similar_frames():
+    base = dhash(_frame())
+    assert base == dhash(_frame())
+    assert bin(base ^ dhash(_frame(shift=1))).count("1") <= 8
+    assert dhash(bytes(72)) == 0
+
+
+def test_lookup_matches_reencode_on_same_channel_only(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    original = Fingerprint(31.2, tuple(dhash(_frame()) for _ in range(8)))
+    ledger.record_fingerprint("vid1", "default", original.length, original.frames_hex(), "ABC")
+    # A different clip of the same length, and one of a different length.
+    other = Fingerprint(31.3, tuple(~f & (2**64 - 1) for f in original.frames))
+    ledger.record_fingerprint("vid2", "default", other.length, other.frames_hex(), "DEF")
+    ledger.record_fingerprint("vid3", "default", 12.0, original.frames_hex(), "GHI")
+
+    reshared = Fingerprint(31.25, tuple(f ^ 0b101 for f in original.frames))
+    match = find_duplicate(ledger, reshared, "default")
+    assert match["video_id"] == "vid1"
+    assert find_duplicate(ledger, reshared, "gaming") is None
+    assert find_duplicate(ledger, Fingerprint(60.0, original.frames), "default") is None
+    assert find_duplicate(ledger, None, "default") is None
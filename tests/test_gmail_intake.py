@@ -0,0 +1,213 @@
+from conftest import Call, FakeBatch, http_error
+from gmail_intake import fetch_messages, poll_new_message_ids, read_history_id, write_history_id
+
+
+class FakeGmail:
+    """Just enough of users().messages()/history()/getProfile() for the intake."""
+
+    def __init__(self, history_id=100):
+        self.history_id = history_id
+        self.inbox = []  # (id, sender, unread, history_id), oldest first
+        self.expired = False
+        self.calls = []
+        self.fail_once = set()  # ids whose next get fails, as on a 5xx
+
+    def deliver(self, msg_id, sender, unread=True):
+        self.history_id += 1
+        self.inbox.append((msg_id, sender, unread, self.history_id))
+
+    # service.users()
+    def users(self):
+        return self
+
+    def getProfile(self, userId):
+        self.calls.append("getProfile")
+        return Call(lambda: {"historyId": str(self.history_id)})
+
+    def messages(self):
+        return _Messages(self)
+
+    def history(self):
+        return _History(self)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback, on_execute=lambda n: self.calls.append(f"batch[{n}]"))
+
+
+class _Messages:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def list(self, userId, q):
+        self.fake.calls.append("messages.list")
+        sender = q.split()[0][len("from:"):]
+        hits = [{"id": m[0]} for m in reversed(self.fake.inbox) if m[1] == sender and m[2]]
+        return Call(lambda: {"messages": hits} if hits else {})
+
+    def list_next(self, request, response):
+        return None
+
+    def get(self, userId, id, format):
+        def run():
+            if not any(m[0] == id for m in self.fake.inbox):
+                raise http_error(404, "not found")
+            if id in self.fake.fail_once:
+                self.fake.fail_once.discard(id)
+                raise http_error(503, "backend error")
+            return {"id": id, "payload": {"headers": [], "body": {}}}
+
+        return Call(run)
+
+    def batchModify(self, userId, body):
+        self.fake.calls.append("batchModify")
+
+        def run():
+            self.fake.inbox = [
+                (m[0], m[1], m[2] and m[0] not in body["ids"], m[3]) for m in self.fake.inbox
+            ]
+            return {}
+
+        return Call(run)
+
+
+class _History:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def list(self, userId, startHistoryId, historyTypes, labelId):
+        self.fake.calls.append("history.list")
+
+        def run():
+            if self.fake.expired:
+                raise http_error(404, "history expired")
+            start = int(startHistoryId)
+            records = [
+                {"id": str(m[3]), "messagesAdded": [{"message": {"id": m[0]}}]}
+                for m in self.fake.inbox if m[3] > start
+            ]
+            out = {"historyId": str(self.fake.history_id)}
+            if records:
+                out["history"] = records
+            return out
+
+        return Call(run)
+
+    def list_next(self, request, response):
+        return None
+
+
+def _poll(gmail, sender, cursor):
+    """Poll, then store the cursor as the caller does once the ids are recorded."""
+    ids, latest = poll_new_message_ids(gmail, sender, cursor)
+    write_history_id(latest, cursor)
+    return ids
+
+
+def test_first_poll_does_full_sync_oldest_first(tmp_path):
+    cursor = str(tmp_path / "history.txt")
+    gmail = FakeGmail()
+    gmail.deliver("a", "me@x.com")
+    gmail.deliver("b", "me@x.com")
+    gmail.deliver("spam", "other@x.com")
+
+    assert _poll(gmail, "me@x.com", cursor) == ["a", "b"]
+    assert read_history_id(cursor) == "103"
+
+
+def test_idle_poll_is_one_history_call(tmp_path):
+    cursor = str(tmp_path / "history.txt")
+    gmail = FakeGmail()
+    _poll(gmail, "me@x.com", cursor)
+    gmail.calls.clear()
+
+    assert _poll(gmail, "me@x.com", cursor) == []
+    assert gmail.calls == ["history.list"]
+
+
+def test_poll_returns_every_new_message(tmp_path):
+    cursor = str(tmp_path / "history.txt")
+    gmail = FakeGmail()
+    _poll(gmail, "me@x.com", cursor)
+
+    for i in range(5):
+        gmail.deliver(f"clip{i}", "me@x.com")
+    gmail.deliver("spam", "other@x.com")
+
+    assert _poll(gmail, "me@x.com", cursor) == [f"clip{i}" for i in range(5)]
+    assert _poll(gmail, "me@x.com", cursor) == []
+
+
+def test_expired_cursor_falls_back_to_full_sync(tmp_path):
+    cursor = str(tmp_path / "history.txt")
+    gmail = FakeGmail()
+    _poll(gmail, "me@x.com", cursor)
+    gmail.deliver("late", "me@x.com")
+    gmail.expired = True
+
+    assert _poll(gmail, "me@x.com", cursor) == ["late"]
+    assert read_history_id(cursor) == str(gmail.history_id)
+
+
+def test_cursor_only_moves_when_the_caller_stores_it(tmp_path):
+    cursor = str(tmp_path / "history.txt")
+    gmail = FakeGmail()
+    _poll(gmail, "me@x.com", cursor)
+    gmail.deliver("a", "me@x.com")
+
+    ids, _ = poll_new_message_ids(gmail, "me@x.com", cursor)
+    # Crashed before recording "a": the next poll still returns it.
+    assert ids == ["a"]
+    assert _poll(gmail, "me@x.com", cursor) == ["a"]
+    assert _poll(gmail, "me@x.com", cursor) == []
+
+
+def test_fetch_messages_batches_gets_and_marks_read_once(tmp_path):
+    gmail = FakeGmail()
+    for i in range(60):
+        gmail.deliver(f"clip{i}", "me@x.com")
+
+    ids = [f"clip{i}" for i in range(60)] + ["gone"]
+    messages, failed = fetch_messages(gmail, ids)
+
+    assert [m["id"] for m in messages] == ids[:-1]
+    assert failed == ["gone"]
+    assert gmail.calls == ["batch[50]", "batch[11]", "batchModify"]
+    assert not any(m[2] for m in gmail.inbox)
+
+
+def test_a_failed_fetch_is_returned_again_on_the_next_poll(tmp_path, monkeypatch):
+    import UploadVideo
+
+    cursor = str(tmp_path / "history.txt")
+    monkeypatch.setattr(UploadVideo, "write_history_id", lambda h: write_history_id(h, cursor))
+    monkeypatch.setattr(UploadVideo, "poll_new_message_ids",
+                        lambda service, sender: poll_new_message_ids(service, sender, cursor))
+    gmail = FakeGmail()
+    _poll(gmail, "me@x.com", cursor)
+    gmail.deliver("a", "me@x.com")
+    gmail.deliver("b", "me@x.com")
+    gmail.fail_once.add("b")
+
+    assert [e[0] for e in UploadVideo.check_new_emails(gmail, "me@x.com")] == ["a"]
+    assert [e[0] for e in UploadVideo.check_new_emails(gmail, "me@x.com")] == ["b"]
+    assert UploadVideo.check_new_emails(gmail, "me@x.com") == []
+
+
+def test_a_redelivered_email_is_not_returned_twice(tmp_path, monkeypatch):
+    import UploadVideo
+    from job_ledger import JobLedger
+
+    cursor = str(tmp_path / "history.txt")
+    monkeypatch.setattr(UploadVideo, "write_history_id", lambda h: write_history_id(h, cursor))
+    monkeypatch.setattr(UploadVideo, "poll_new_message_ids",
+                        lambda service, sender: poll_new_message_ids(service, sender, cursor))
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    gmail = FakeGmail()
+    _poll(gmail, "me@x.com", cursor)
+    gmail.deliver("a", "me@x.com")
+    assert [e[0] for e in UploadVideo.check_new_emails(gmail, "me@x.com", ledger)] == ["a"]
+
+    # Gmail reports the same message again (a label change, a restored cursor).
+    write_history_id("100", cursor)
+    assert UploadVideo.check_new_emails(gmail, "me@x.com", ledger) == []
+    assert [j["msg_id"] for j in ledger.jobs_for_email("a")] == ["a"]
@@ -0,0 +1,150 @@
+import threading
+from datetime import datetime, timezone
+
+from job_ledger import JobLedger, state_reached
+
+
+def test_jobs_move_forward_and_resume_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    ledger = JobLedger(path)
+    assert ledger.enqueue("m1", "https://www.instagram.com/reel/AAA/", "Viral")
+    assert ledger.enqueue("m2", "https://www.instagram.com/reel/BBB/", "Viral")
+    assert not ledger.enqueue("m1", "https://www.instagram.com/reel/AAA/", "Viral")
+
+    ledger.advance("m1", "downloaded", path="a.mp4", shortcode="AAA")
+    ledger.advance("m2", "downloaded", path="b.mp4", shortcode="BBB")
+    ledger.advance("m2", "described", description="desc")
+    ledger.advance("m2", "cleaned")
+
+    # A fresh process sees only what is still in flight.
+    reopened = JobLedger(path)
+    unfinished = reopened.unfinished()
+    assert [j["msg_id"] for j in unfinished] == ["m1"]
+    assert unfinished[0]["state"] == "downloaded"
+    assert unfinished[0]["path"] == "a.mp4"
+    assert reopened.get("m2")["description"] == "desc"
+
+
+def test_failure_keeps_the_job_for_retry(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "url", "Viral")
+    ledger.fail("m1", "upload failed")
+
+    job = ledger.get("m1")
+    assert job["state"] == "queued"
+    assert job["error"] == "upload failed"
+    assert ledger.unfinished()[0]["msg_id"] == "m1"
+
+
+def test_latest_slot_per_channel(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    for i, hour in enumerate([9, 21, 12]):
+        ledger.enqueue(f"m{i}", "url", "Viral")
+        ledger.update(f"m{i}", slot=datetime(2026, 6, 22, hour, tzinfo=timezone.utc).isoformat())
+
+    assert ledger.latest_slot() == datetime(2026, 6, 22, 21, tzinfo=timezone.utc)
+    assert ledger.latest_slot("other-channel") is None
+
+
+def test_concurrent_writers(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+
+    def worker(n):
+        for i in range(25):
+            ledger.enqueue(f"{n}-{i}", "url", "Viral")
+            ledger.advance(f"{n}-{i}", "downloaded")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(ledger.unfinished()) == 100
+
+
+def test_state_reached():
+    assert state_reached("uploaded", "described")
+    assert not state_reached("downloaded", "uploaded")
+    assert state_reached("skipped", "uploaded")
+
+
+def test_upload_index_is_per_reel_and_channel(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    assert ledger.find_upload("AAA") is None
+
+    ledger.record_upload("AAA", "vid1")
+
+    assert ledger.find_upload("AAA")["video_id"] == "vid1"
+    assert ledger.find_upload("AAA", channel="second-channel") is None
+    assert ledger.find_upload(None) is None
+
+
+def test_same_reel_sent_twice_before_upload(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "https://www.instagram.com/reel/AAA/", "Viral", shortcode="AAA")
+    ledger.enqueue("m2", "https://www.instagram.com/reel/AAA/", "Viral", shortcode="AAA")
+
+    assert ledger.earlier_job_for("m1", "AAA") is None
+    assert ledger.earlier_job_for("m2", "AAA")["msg_id"] == "m1"
+
+    ledger.advance("m1", "skipped")
+    assert ledger.earlier_job_for("m2", "AAA") is None
+
+
+def test_failed_download_does_not_hold_back_a_later_copy(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "https://www.instagram.com/reel/AAA/", "Viral", shortcode="AAA")
+    ledger.enqueue("m2", "https://www.instagram.com/reel/AAA/", "Viral", shortcode="AAA")
+    ledger.fail("m1", "download failed")
+
+    assert ledger.earlier_job_for("m2", "AAA") is None
+
+
+def test_resumed_job_is_not_a_duplicate_of_its_own_upload(tmp_path):
+    from UploadVideo import already_uploaded
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "https://www.instagram.com/reel/AAA/", "Viral", shortcode="AAA")
+    ledger.enqueue("m2", "https://www.instagram.com/reel/AAA/", "Viral", shortcode="AAA")
+    ledger.advance("m1", "uploaded", video_id="vid1")
+    ledger.record_upload("AAA", "vid1")
+
+    assert already_uploaded(ledger, "AAA", "m1") is None
+    assert "vid1" in already_uploaded(ledger, "AAA", "m2")
+
+
+def test_advance_checks_fields_before_touching_state(tmp_path):
+    import pytest
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "url", "Viral")
+    with pytest.raises(ValueError):
+        ledger.advance("m1", "downloaded", nonsense=1)
+    assert ledger.get("m1")["state"] == "queued"
+
+
+def test_resumed_job_past_upload_skips_download(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    import UploadVideo
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "https://www.instagram.com/reel/X/", "Viral")
+    # The file was cleaned up before the crash that left the job here.
+    ledger.advance("m1", "playlisted", path=str(tmp_path / "gone.mp4"), title="t",
+                   video_id="vid1")
+
+    downloads = []
+    monkeypatch.setattr(UploadVideo, "download_instagram_reel",
+                        lambda *a: downloads.append(a) or None)
+    monkeypatch.setattr(UploadVideo, "trash_email", lambda service, msg_id: None)
+    monkeypatch.setattr(UploadVideo, "_thread_gmail", lambda: None)
+    router = SimpleNamespace(lane=lambda slug: None)
+
+    pipeline = UploadVideo.build_pipeline(router, ledger).start()
+    pipeline.submit(UploadVideo.ClipJob.from_row(ledger.unfinished()[0]))
+    pipeline.close()
+
+    assert downloads == []
+    assert ledger.get("m1")["state"] == "cleaned"
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from pipeline import Pipeline, Stage
+
+
+def test_every_item_reaches_the_last_stage():
+    done = []
+    lock = threading.Lock()
+
+    def record(item):
+        with lock:
+            done.append(item)
+
+    pipeline = Pipeline([
+        Stage("double", lambda x: x * 2, workers=3),
+        Stage("drop_odd_input", lambda x: x if x % 4 else None, workers=2),
+        Stage("record", record),
+    ]).start()
+    for i in range(20):
+        pipeline.submit(i)
+    pipeline.close()
+
+    assert sorted(done) == [i * 2 for i in range(20) if i % 2]
+
+
+def test_slow_stage_overlaps_with_the_one_before_it():
+    def slow_upload(item):
+        time.sleep(0.2)
+
+    pipeline = Pipeline([
+        Stage("download", lambda x: x, workers=1),
+        Stage("upload", slow_upload, workers=4),
+    ]).start()
+    t0 = time.monotonic()
+    for i in range(4):
+        pipeline.submit(i)
+    pipeline.close()
+
+    # Four 0.2s uploads across four workers finish in roughly one upload's time.
+    assert time.monotonic() - t0 < 0.6
+
+
+def test_a_failing_item_does_not_stop_the_worker():
+    done = []
+
+    def boom(x):
+        if x == 1:
+            raise ValueError("bad clip")
+        return x
+
+    pipeline = Pipeline([Stage("boom", boom), Stage("record", done.append)]).start()
+    for i in range(3):
+        pipeline.submit(i)
+    pipeline.close()
+
+    assert done == [0, 2]
+
+
+def test_keyed_stage_gives_each_key_its_own_pool():
+    gate = threading.Event()
+    done = []
+    lock = threading.Lock()
+
+    def upload(item):
+        channel, n = item
+        if channel == "busy":
+            gate.wait(5)
+        with lock:
+            done.append(item)
+        return item
+
+    pipeline = Pipeline([
+        Stage("upload", upload, workers=1, key=lambda item: item[0]),
+        Stage("record", lambda item: None),
+    ]).start()
+    for n in range(3):
+        pipeline.submit(("busy", n))
+    pipeline.submit(("idle", 0))
+
+    # The idle channel's clip is not stuck behind the busy channel's backlog.
+    deadline = time.monotonic() + 2
+    while ("idle", 0) not in done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert done == [("idle", 0)]
+
+    gate.set()
+    pipeline.close()
+    assert sorted(done) == [("busy", 0), ("busy", 1), ("busy", 2), ("idle", 0)]
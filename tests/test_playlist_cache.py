@@ -0,0 +1,141 @@
+import pytest
+
+import YoutubeUpload
+from conftest import FakeYouTube
+from YoutubeUpload import add_to_playlist, add_videos_to_playlist, resolve_playlist_id
+
+
+@pytest.fixture(autouse=True)
+def _cache_in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_finds_playlist_past_the_first_page():
+    playlists = {f"PLold{i}": f"old {i}" for i in range(120)}
+    playlists["PLtarget"] = "college culture"
+    yt = FakeYouTube(playlists=playlists)
+
+    assert resolve_playlist_id(yt, "college culture") == "PLtarget"
+    assert yt.calls.count("playlists.list") == 3
+    assert "playlists.insert" not in yt.calls
+
+
+def test_second_upload_costs_only_the_insert():
+    yt = FakeYouTube(playlists={"PL1": "shorts"})
+    add_to_playlist(yt, "shorts", "v1")
+    yt.calls.clear()
+
+    add_to_playlist(yt, "shorts", "v2")
+
+    assert yt.calls == ["playlistItems.insert"]
+    assert yt.items == [("PL1", "v1"), ("PL1", "v2")]
+
+
+def test_deleted_playlist_is_refreshed_on_404():
+    yt = FakeYouTube(playlists={"PL1": "shorts"})
+    add_to_playlist(yt, "shorts", "v1")
+    # Someone deletes the playlist on YouTube and makes a new one with the same title.
+    del yt.playlists_by_id["PL1"]
+    yt.playlists_by_id["PL2"] = "shorts"
+
+    add_to_playlist(yt, "shorts", "v2")
+
+    assert yt.items[-1] == ("PL2", "v2")
+    assert YoutubeUpload._load_playlist_cache()["UC1"]["shorts"] == "PL2"
+
+
+def test_several_videos_go_in_one_batch():
+    yt = FakeYouTube(playlists={"PL1": "shorts"})
+
+    added = add_videos_to_playlist(yt, "shorts", ["a", "b", "c"])
+
+    assert added == ["a", "b", "c"]
+    assert yt.calls.count("batch") == 1
+
+
+def test_account_without_a_channel_is_not_cached_as_unknown():
+    yt = FakeYouTube(playlists={"PL1": "shorts"})
+    yt.channel_id = None
+
+    with pytest.raises(RuntimeError):
+        resolve_playlist_id(yt, "shorts")
+    assert YoutubeUpload._load_playlist_cache() == {}
+
+
+def test_pipeline_sends_a_channels_playlist_inserts_as_one_batch(tmp_path):
+    from types import SimpleNamespace
+
+    import UploadVideo
+    from job_ledger import JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    yt = FakeYouTube(playlists={"PL1": UploadVideo.PLAYLIST_NAME})
+    lane = SimpleNamespace(client=SimpleNamespace(service=lambda: yt))
+    router = SimpleNamespace(lane=lambda slug: lane)
+    batch = UploadVideo.PlaylistBatch(size=3, max_wait_s=3600)
+    pipeline = UploadVideo.build_pipeline(router, ledger, playlist_batch=batch).start()
+
+    for n in range(3):
+        ledger.enqueue(f"m{n}", "https://www.instagram.com/reel/X/", "Viral")
+        ledger.advance(f"m{n}", "uploaded", title="t", video_id=f"v{n}")
+        pipeline.submit(UploadVideo.ClipJob.from_row(ledger.get(f"m{n}")), stage="playlist")
+    pipeline.close()
+    due = batch.due()
+
+    assert [[job.msg_id for job in jobs] for jobs in due] == [["m0", "m1", "m2"]]
+    done = UploadVideo.flush_playlist(router, ledger, due[0])
+    assert len(done) == 3
+    assert yt.calls.count("batch") == 1 and "playlistItems.insert" in yt.calls
+    assert [v for _, v in yt.items] == ["v0", "v1", "v2"]
+    assert all(ledger.get(f"m{n}")["state"] == "playlisted" for n in range(3))
+
+
+def test_a_refused_insert_is_not_retried_and_the_rest_go_in(tmp_path):
+    from types import SimpleNamespace
+
+    import UploadVideo
+    from job_ledger import JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    yt = FakeYouTube(playlists={"PL1": UploadVideo.PLAYLIST_NAME})
+    yt.broken.add("v1")
+    lane = SimpleNamespace(client=SimpleNamespace(service=lambda: yt))
+    router = SimpleNamespace(lane=lambda slug: lane)
+    jobs = []
+    for n in range(3):
+        ledger.enqueue(f"m{n}", "https://www.instagram.com/reel/X/", "Viral")
+        ledger.advance(f"m{n}", "uploaded", title="t", video_id=f"v{n}")
+        jobs.append(UploadVideo.ClipJob.from_row(ledger.get(f"m{n}")))
+
+    done = UploadVideo.flush_playlist(router, ledger, jobs)
+
+    assert [job.msg_id for job in done] == ["m0", "m2"]
+    assert yt.calls.count("playlistItems.insert") == 3  # no retry of the 403
+    assert [v for _, v in yt.items] == ["v0", "v2"]
+    assert ledger.get("m0")["state"] == ledger.get("m2")["state"] == "playlisted"
+    assert ledger.get("m1")["state"] == "uploaded"
+    assert ledger.get("m1")["error"] == "playlist insert failed"
+
+
+def test_single_refused_insert_raises():
+    yt = FakeYouTube(playlists={"PL1": "shorts"})
+    yt.broken.add("v1")
+
+    with pytest.raises(RuntimeError):
+        add_to_playlist(yt, "shorts", "v1")
+
+
+def test_cache_write_keeps_another_channels_entry(monkeypatch):
+    yt = FakeYouTube(playlists={"PL1": "shorts"})
+    list_all = YoutubeUpload._list_all_playlists
+
+    def listed_while_another_process_writes(youtube):
+        YoutubeUpload._save_playlist_cache("UCother", {"clips": "PL9"})
+        return list_all(youtube)
+
+    monkeypatch.setattr(YoutubeUpload, "_list_all_playlists", listed_while_another_process_writes)
+
+    resolve_playlist_id(yt, "shorts")
+
+    cache = YoutubeUpload._load_playlist_cache()
+    assert cache == {"UCother": {"clips": "PL9"}, "UC1": {"shorts": "PL1"}}
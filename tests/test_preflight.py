@@ -0,0 +1,132 @@
+import struct
+
+import preflight as pf
+from preflight import PreflightCache, evaluate, moov_before_mdat, preflight
+
+
+def _box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _probe(width=1080, height=1920, duration="42.5", vcodec="h264", acodec="aac", rotate=None):
+    video = {"codec_type": "video", "codec_name": vcodec, "width": width, "height": height}
+    if rotate is not None:
+        video["side_data_list"] = [{"rotation": rotate}]
+    return {"format": {"duration": duration, "format_name": "mov,mp4,m4a,3gp,3g2,mj2"},
+            "streams": [video, {"codec_type": "audio", "codec_name": acodec}]}
+
+
+def test_moov_position(tmp_path):
+    fast = tmp_path / "fast.mp4"
+    fast.write_bytes(_box(b"ftyp", b"isom") + _box(b"moov", b"x" * 20) + _box(b"mdat", b"y" * 50))
+    slow = tmp_path / "slow.mp4"
+    slow.write_bytes(_box(b"ftyp", b"isom") + _box(b"mdat", b"y" * 50) + _box(b"moov", b"x" * 20))
+    junk = tmp_path / "junk.mp4"
+    junk.write_bytes(b"not a video")
+
+    assert moov_before_mdat(str(fast)) is True
+    assert moov_before_mdat(str(slow)) is False
+    assert moov_before_mdat(str(junk)) is None
+
+
+def test_rules():
+    assert evaluate(_probe(), True).ok
+    assert evaluate(_probe(width=1920, height=1080, rotate=-90), True).ok
+    assert "landscape" in evaluate(_probe(width=1920, height=1080), True).reasons[0]
+    assert "Shorts limit" in evaluate(_probe(duration="200"), True).reasons[0]
+    assert "video codec" in evaluate(_probe(vcodec="prores"), True).reasons[0]
+
+
+def test_result_is_cached_by_content_and_slow_start_is_remuxed(tmp_path, monkeypatch):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(_box(b"ftyp", b"isom") + _box(b"mdat", b"y" * 50) + _box(b"moov", b"x" * 20))
+    probes, remuxes = [], []
+
+    def fake_probe(path):
+        probes.append(path)
+        return _probe()
+
+    def fake_remux(path):
+        remuxes.append(path)
+        with open(path, "wb") as file:
+            file.write(_box(b"ftyp", b"isom") + _box(b"moov", b"x" * 20) + _box(b"mdat", b"y" * 50))
+        return True
+
+    monkeypatch.setattr(pf, "probe", fake_probe)
+    monkeypatch.setattr(pf, "remux_faststart", fake_remux)
+    cache = PreflightCache(str(tmp_path / "cache.sqlite3"))
+
+    first = preflight(str(clip), cache)
+    again = preflight(str(clip), cache)  # now the remuxed bytes
+
+    assert first.ok and first.remuxed
+    assert again.ok and again.faststart
+    assert len(probes) == 1
+    assert len(remuxes) == 1
+
+
+def test_remuxed_file_is_not_reported_as_remuxed_again(tmp_path, monkeypatch):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(_box(b"ftyp", b"isom") + _box(b"mdat", b"y" * 50) + _box(b"moov", b"x" * 20))
+    remuxes = []
+
+    def fake_remux(path):
+        remuxes.append(path)
+        with open(path, "wb") as file:
+            file.write(_box(b"ftyp", b"isom") + _box(b"moov", b"x" * 20) + _box(b"mdat", b"y" * 50))
+        return True
+
+    monkeypatch.setattr(pf, "probe", lambda path: _probe())
+    monkeypatch.setattr(pf, "remux_faststart", fake_remux)
+    cache = PreflightCache(str(tmp_path / "cache.sqlite3"))
+
+    assert preflight(str(clip), cache).remuxed
+    second = preflight(str(clip), cache)
+    third = preflight(str(clip), cache)
+
+    assert not second.remuxed and second.faststart
+    assert not third.remuxed and third.faststart
+    assert len(remuxes) == 1
+
+
+def test_without_ffprobe_the_clip_goes_through_unchecked(tmp_path, monkeypatch):
+    monkeypatch.setattr(pf.shutil, "which", lambda name: None)
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"x")
+    result = preflight(str(clip), PreflightCache(str(tmp_path / "cache.sqlite3")))
+    assert result.ok and result.unchecked
+
+
+def test_a_timed_out_probe_is_not_cached(tmp_path, monkeypatch):
+    import subprocess
+
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(_box(b"ftyp", b"isom") + _box(b"moov", b"x" * 20) + _box(b"mdat", b"y" * 50))
+    answers = [subprocess.TimeoutExpired("ffprobe", 30), _probe()]
+
+    def fake_probe(path):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(pf, "probe", fake_probe)
+    cache = PreflightCache(str(tmp_path / "cache.sqlite3"))
+
+    first = preflight(str(clip), cache)
+    second = preflight(str(clip), cache)
+
+    assert first.ok and first.unchecked
+    assert second.ok and not second.unchecked
+    assert answers == []
+
+
+def test_cache_keeps_only_the_most_recently_used(tmp_path):
+    cache = PreflightCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for digest in ("a", "b"):
+        cache.put(digest, pf.PreflightResult(ok=True))
+    cache.get("a")
+    cache.put("c", pf.PreflightResult(ok=True))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
@@ -0,0 +1,151 @@
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import HttpMockSequence
+
+import quota
+from quota import LOW, MeteredRequest, QuotaMeter, unit_cost
+from token_manager import discovery_document
+
+
+def test_unit_costs():
+    assert unit_cost("youtube.videos.insert") == 1600
+    assert unit_cost("youtube.search.list") == 100
+    assert unit_cost("youtube.playlistItems.list") == 1
+    assert unit_cost("youtube.playlistItems.delete") == 50
+
+
+def test_spend_persists_per_project_and_day(tmp_path, monkeypatch):
+    path = str(tmp_path / "quota.json")
+    meter = QuotaMeter(path, daily=10000, reserve=3200)
+    meter.charge("youtube.videos.insert", project="p1")
+    meter.charge("youtube.search.list", count=3, project="p1")
+
+    reopened = QuotaMeter(path, daily=10000, reserve=3200)
+    assert reopened.remaining("p1") == 10000 - 1600 - 300
+    assert reopened.remaining("p2") == 10000
+
+    monkeypatch.setattr(quota, "quota_day", lambda now=None: "2999-01-01")
+    assert reopened.remaining("p1") == 10000
+
+
+def test_low_priority_work_leaves_the_upload_reserve(tmp_path):
+    meter = QuotaMeter(str(tmp_path / "quota.json"), daily=5000, reserve=3200)
+    meter.charge("youtube.search.list", count=17)  # 1700 spent, 3300 left
+
+    assert meter.affordable(100, LOW)
+    assert not meter.affordable(101, LOW)
+    assert meter.affordable(1600)
+
+
+def test_metered_requests_charge_the_meter(tmp_path, monkeypatch):
+    meter = QuotaMeter(str(tmp_path / "quota.json"))
+    monkeypatch.setattr(quota, "_meter", meter)
+    http = HttpMockSequence([({"status": "200"}, "{}"), ({"status": "200"}, "{}")])
+    youtube = build_from_document(discovery_document("youtube", "v3"), http=http,
+                                  requestBuilder=MeteredRequest)
+
+    youtube.search().list(part="id", forMine=True, type="video").execute()
+    youtube.videos().list(part="snippet", id="abc").execute()
+
+    assert meter.used() == 101
+
+
+def test_held_upload_goes_up_once_the_quota_resets(tmp_path, monkeypatch):
+    import time
+    from datetime import datetime, timezone
+    from types import SimpleNamespace
+
+    import UploadVideo
+    from job_ledger import JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "https://www.instagram.com/reel/X/", "Viral")
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"x")
+    slot = datetime(2026, 6, 22, 9, tzinfo=timezone.utc)
+    ledger.advance("m1", "described", path=str(clip), title="t", description="d",
+                   slot=slot.isoformat())
+
+    spent = [True]
+    day = ["2026-06-22"]
+    monkeypatch.setattr(UploadVideo, "get_meter",
+                        lambda: SimpleNamespace(affordable=lambda units, project=None: not spent[0]))
+    monkeypatch.setattr(UploadVideo, "quota_day", lambda: day[0])
+    uploads = []
+    monkeypatch.setattr(UploadVideo, "upload_video",
+                        lambda *a, **k: uploads.append(a[2]) or {"id": "vid1"})
+    monkeypatch.setattr(UploadVideo, "add_to_playlist", lambda *a: None)
+    monkeypatch.setattr(UploadVideo, "trash_email", lambda service, msg_id: None)
+    monkeypatch.setattr(UploadVideo, "_thread_gmail", lambda: None)
+    lane = SimpleNamespace(client=SimpleNamespace(service=lambda: object()),
+                           slots=SimpleNamespace(next=lambda: slot, commit=lambda s: None))
+    router = SimpleNamespace(lane=lambda slug: lane)
+
+    hold = UploadVideo.QuotaHold(recheck_s=3600)
+    pipeline = UploadVideo.build_pipeline(router, ledger, quota_hold=hold).start()
+    pipeline.submit(UploadVideo.ClipJob.from_row(ledger.get("m1")), stage="upload")
+    deadline = time.monotonic() + 5
+    while not len(hold) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(hold) == 1 and uploads == []
+    assert hold.due() == []  # same quota day, recheck not due yet
+
+    spent[0] = False
+    day[0] = "2026-06-23"
+    for job in hold.due():
+        pipeline.submit(job, stage="upload")
+    pipeline.close()
+
+    assert uploads == ["t"]
+    assert ledger.get("m1")["state"] == "cleaned"
+    assert ledger.get("m1")["video_id"] == "vid1"
+
+
+def test_held_upload_takes_a_fresh_slot_once_its_own_has_passed(tmp_path, monkeypatch):
+    import time
+    from datetime import datetime, timedelta, timezone
+    from types import SimpleNamespace
+
+    import UploadVideo
+    from job_ledger import JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    ledger.enqueue("m1", "https://www.instagram.com/reel/X/", "Viral")
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"x")
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(hours=6)   # reserved at review, before the hold
+    fresh = now + timedelta(hours=3)
+    ledger.advance("m1", "described", path=str(clip), title="t", description="d",
+                   slot=stale.isoformat())
+
+    spent = [True]
+    monkeypatch.setattr(UploadVideo, "get_meter",
+                        lambda: SimpleNamespace(affordable=lambda units, project=None: not spent[0]))
+    published = []
+    monkeypatch.setattr(UploadVideo, "upload_video",
+                        lambda *a, **k: published.append(a[5]) or {"id": "vid1"})
+    monkeypatch.setattr(UploadVideo, "add_to_playlist", lambda *a: None)
+    monkeypatch.setattr(UploadVideo, "trash_email", lambda service, msg_id: None)
+    monkeypatch.setattr(UploadVideo, "_thread_gmail", lambda: None)
+    committed = []
+    lane = SimpleNamespace(client=SimpleNamespace(service=lambda: object()),
+                           slots=SimpleNamespace(next=lambda: fresh, commit=committed.append))
+    router = SimpleNamespace(lane=lambda slug: lane)
+
+    hold = UploadVideo.QuotaHold(recheck_s=0)
+    pipeline = UploadVideo.build_pipeline(router, ledger, quota_hold=hold).start()
+    pipeline.submit(UploadVideo.ClipJob.from_row(ledger.get("m1")), stage="upload")
+    deadline = time.monotonic() + 5
+    while not len(hold) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(hold) == 1 and published == []
+
+    spent[0] = False
+    for job in hold.due():
+        pipeline.submit(job, stage="upload")
+    pipeline.close()
+
+    assert published == [fresh]
+    assert committed == [fresh]
+    assert ledger.get("m1")["slot"] == fresh.isoformat()
+    assert ledger.get("m1")["state"] == "cleaned"
@@ -0,0 +1,31 @@
+import instagram_downloader
+from instagram_downloader import TokenBucket, extract_shortcode
+
+
+def test_burst_goes_through_without_waiting(monkeypatch):
+    slept = []
+    monkeypatch.setattr(instagram_downloader.time, "sleep", slept.append)
+    bucket = TokenBucket(rate_per_minute=12, burst=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert slept == []
+
+
+def test_waits_only_once_the_budget_is_spent(monkeypatch):
+    slept = []
+    monkeypatch.setattr(instagram_downloader.time, "sleep", slept.append)
+    bucket = TokenBucket(rate_per_minute=12, burst=1)
+
+    bucket.acquire()
+    waited = bucket.acquire()
+
+    # 12/min is one token every 5s, plus up to 0.5s of jitter.
+    assert 4.9 < waited <= 5.5
+    assert slept == [waited]
+
+
+def test_extract_shortcode():
+    assert extract_shortcode("https://www.instagram.com/reel/C8abc_12/?igsh=x") == "C8abc_12"
+    assert extract_shortcode("https://www.instagram.com/p/XYZ/") == "XYZ"
+    assert extract_shortcode("https://example.com/video") is None
+    assert extract_shortcode(None) is None
@@ -0,0 +1,178 @@
+import json
+import socket
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaUploadProgress
+
+import YoutubeUpload
+from instagram_downloader import GrowingFileUpload
+from YoutubeUpload import resumable_upload, upload_video
+
+
+class FakeInsert:
+    """Stands in for a resumable videos.insert HttpRequest."""
+
+    def __init__(self, total, chunk, failures=()):
+        self.total = total
+        self.chunk = chunk
+        self.failures = list(failures)  # exceptions to raise, one per call, before succeeding
+        self.resumable_uri = None
+        self.resumable_progress = 0
+        self._in_error_state = False
+        self.server_progress = 0
+        self.calls = 0
+        self.expired = False
+        # Session status queries go out through request.http.
+        self.http = self
+        self.resumable = SimpleNamespace(size=lambda: total)
+        self.postproc = lambda resp, content: json.loads(content)
+
+    def next_chunk(self):
+        self.calls += 1
+        if self.resumable_uri is None:
+            self.resumable_uri = "https://upload.example/session/1"
+        if self._in_error_state:
+            self.resumable_progress = self.server_progress
+            self._in_error_state = False
+        if self.failures:
+            self._in_error_state = True
+            raise self.failures.pop(0)
+        self.resumable_progress = min(self.resumable_progress + self.chunk, self.total)
+        self.server_progress = self.resumable_progress
+        if self.resumable_progress == self.total:
+            return None, {"id": "vid123"}
+        return MediaUploadProgress(self.resumable_progress, self.total), None
+
+    def request(self, uri, method="GET", body=None, headers=None):
+        assert (uri, method) == (self.resumable_uri, "PUT")
+        assert headers["Content-Range"] == f"bytes */{self.total}"
+        if self.expired:
+            return httplib2.Response({"status": 404}), b"session expired"
+        if self.server_progress == self.total:
+            return httplib2.Response({"status": 200}), b'{"id": "vid123"}'
+        resp = httplib2.Response({"status": 308})
+        if self.server_progress:
+            resp["range"] = f"bytes=0-{self.server_progress - 1}"
+        return resp, b""
+
+
+@pytest.fixture
+def video(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(YoutubeUpload.time, "sleep", lambda s: None)
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"x" * 100)
+    return str(path)
+
+
+def test_retries_socket_errors_and_5xx_then_completes(video):
+    request = FakeInsert(100, 30, failures=[
+        socket.timeout("timed out"),
+        HttpError(httplib2.Response({"status": 503}), b"backend error"),
+    ])
+    chunks = []
+
+    response = resumable_upload(request, video, on_chunk=lambda sent, total, s: chunks.append(sent))
+
+    assert response == {"id": "vid123"}
+    assert chunks == [30, 60, 90]
+    # Finished uploads leave nothing behind to resume.
+    assert json.load(open(YoutubeUpload.UPLOAD_SESSIONS_FILE)) == {}
+
+
+def test_client_errors_are_not_retried(video):
+    request = FakeInsert(100, 30, failures=[HttpError(httplib2.Response({"status": 400}), b"bad")])
+
+    with pytest.raises(HttpError):
+        resumable_upload(request, video)
+    assert request.calls == 1
+
+
+def test_killed_upload_resumes_saved_session(video):
+    first = FakeInsert(100, 30)
+    first.next_chunk()
+    first.next_chunk()  # 60 bytes confirmed, then the process dies
+    YoutubeUpload._update_session(YoutubeUpload._session_key(video), first.resumable_uri)
+
+    second = FakeInsert(100, 30)
+    second.server_progress = 60
+    chunks = []
+    resumable_upload(second, video, on_chunk=lambda sent, total, s: chunks.append(sent))
+
+    assert second.resumable_uri == first.resumable_uri
+    assert chunks == [90]
+
+
+def test_local_file_errors_are_not_retried(video):
+    request = FakeInsert(100, 30, failures=[PermissionError("file is locked")])
+
+    with pytest.raises(PermissionError):
+        resumable_upload(request, video)
+    assert request.calls == 1
+
+
+def test_saved_session_is_not_resumed_with_different_metadata(video):
+    first = FakeInsert(100, 30)
+    first.next_chunk()
+    old = json.dumps({"snippet": {"title": "Old"}, "status": {"publishAt": "2026-06-22T09:00:00Z"}})
+    YoutubeUpload._update_session(YoutubeUpload._session_key(video, old), first.resumable_uri)
+
+    second = FakeInsert(100, 30)
+    second.resumable_uri = None
+    new = json.dumps({"snippet": {"title": "New"}, "status": {"publishAt": "2026-06-22T12:00:00Z"}})
+    chunks = []
+    resumable_upload(second, video, on_chunk=lambda sent, total, s: chunks.append(sent), metadata=new)
+
+    # A fresh upload from byte 0, and the stale session is forgotten.
+    assert chunks == [30, 60, 90]
+    assert json.load(open(YoutubeUpload.UPLOAD_SESSIONS_FILE)) == {}
+
+
+def test_expired_saved_session_starts_over(video):
+    first = FakeInsert(100, 30)
+    first.next_chunk()
+    YoutubeUpload._update_session(YoutubeUpload._session_key(video), first.resumable_uri)
+
+    second = FakeInsert(100, 30)
+    second.resumable_uri = None
+    second.expired = True
+    chunks = []
+    resumable_upload(second, video, on_chunk=lambda sent, total, s: chunks.append(sent))
+
+    assert chunks == [30, 60, 90]
+    assert json.load(open(YoutubeUpload.UPLOAD_SESSIONS_FILE)) == {}
+
+
+def test_upload_from_a_growing_file_needs_no_file_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    part = tmp_path / "clip.mp4.part"
+    part.write_bytes(b"0123456789")
+    tee = GrowingFileUpload(chunksize=4)
+    tee.start(str(part))
+    tee.finish(str(part))
+    received = []
+
+    class Insert:
+        resumable_uri = "https://upload.example/session/2"
+        resumable_progress = 0
+
+        def next_chunk(self):
+            data = tee.getbytes(self.resumable_progress, tee.chunksize())
+            received.append(data)
+            self.resumable_progress += len(data)
+            if len(data) < tee.chunksize():
+                return None, {"id": "vid456"}
+            return MediaUploadProgress(self.resumable_progress, None), None
+
+    youtube = SimpleNamespace(videos=lambda: SimpleNamespace(insert=lambda **kw: Insert()))
+
+    response = upload_video(youtube, None, "t", "d", [], datetime(2026, 6, 22, 9, tzinfo=timezone.utc),
+                            None, delete_after_upload=False, media_body=tee)
+
+    assert response == {"id": "vid456"}
+    assert b"".join(received) == b"0123456789"
+    assert not (tmp_path / YoutubeUpload.UPLOAD_SESSIONS_FILE).exists()
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import review_queue
+import UploadVideo
+from job_ledger import JobLedger
+from review_queue import ReviewQueue, make_contact_sheet
+
+
+def test_ready_on_a_full_batch_or_after_the_wait(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(review_queue.time, "monotonic", lambda: clock[0])
+    queue = ReviewQueue()
+    assert not queue.ready(batch=3, max_wait_s=60)
+
+    queue.add("a")
+    queue.add("b")
+    assert not queue.ready(batch=3, max_wait_s=60)
+    clock[0] += 61
+    assert queue.ready(batch=3, max_wait_s=60)
+
+    assert queue.take() == ["a", "b"]
+    assert len(queue) == 0
+    for item in "cde":
+        queue.add(item)
+    assert queue.ready(batch=3, max_wait_s=60)
+
+
+def test_no_sheet_without_ffmpeg(monkeypatch, tmp_path):
+    monkeypatch.setattr(review_queue.shutil, "which", lambda name: None)
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"x")
+    assert make_contact_sheet(str(clip)) is None
+
+
+def test_sheet_frames_come_from_across_the_whole_clip(monkeypatch, tmp_path):
+    monkeypatch.setattr(review_queue.shutil, "which", lambda name: "/usr/bin/" + name)
+    monkeypatch.setattr(review_queue, "probe", lambda path: {"format": {"duration": "60.0"}})
+    commands = []
+    monkeypatch.setattr(review_queue.subprocess, "run", lambda cmd, **kw: commands.append(cmd))
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"x")
+
+    make_contact_sheet(str(clip), frames=6)
+
+    cmd = commands[0]
+    seeks = [float(cmd[i + 1]) for i, arg in enumerate(cmd) if arg == "-ss"]
+    assert seeks == [5.0, 15.0, 25.0, 35.0, 45.0, 55.0]
+    assert cmd.count("-i") == 6
+    assert "hstack=inputs=6" in cmd[cmd.index("-filter_complex") + 1]
+
+
+def test_batch_review_feeds_approved_clips_to_describe(monkeypatch, tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    queue = ReviewQueue()
+    for n in range(3):
+        ledger.enqueue(f"m{n}", "https://www.instagram.com/reel/X/", "Viral")
+        clip = tmp_path / f"clip{n}.mp4"
+        clip.write_bytes(b"x")
+        job = UploadVideo.ClipJob.from_row(ledger.get(f"m{n}"))
+        job.path = str(clip)
+        queue.add(job)
+
+    answers = iter(["first", "play", "delete", "third"])
+    played, trashed, submitted = [], [], []
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    monkeypatch.setattr(UploadVideo, "play_video_then_wait", played.append)
+    described = []
+    monkeypatch.setattr(UploadVideo, "generate_descriptions_async",
+                        lambda titles: described.append(titles) or [f"future:{t}" for t in titles])
+    monkeypatch.setattr(UploadVideo, "trash_email", lambda service, msg_id: trashed.append(msg_id))
+    monkeypatch.setattr(UploadVideo, "_thread_gmail", lambda: None)
+    slots = iter([datetime(2026, 6, 22, h, tzinfo=timezone.utc) for h in (9, 12)])
+    router = SimpleNamespace(lane=lambda slug: SimpleNamespace(slots=SimpleNamespace(next=lambda: next(slots))))
+    pipeline = SimpleNamespace(submit=lambda job, stage: submitted.append((job.title, stage)))
+
+    UploadVideo.review_batch(queue, pipeline, router, ledger)
+
+    assert submitted == [("first", "describe"), ("third", "describe")]
+    # The sitting's titles are described together, in one request.
+    assert described == [["first", "third"]]
+    assert played == [str(tmp_path / "clip1.mp4")]
+    assert ledger.get("m1")["state"] == "skipped"
+    assert trashed == ["m1"]
+    assert not (tmp_path / "clip1.mp4").exists()
+    assert ledger.get("m2")["slot"] == "2026-06-22T12:00:00+00:00"
@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from scheduler import UploadScheduler
+
+LA = ZoneInfo("America/Los_Angeles")
+
+
+def _local(slots, tz=LA):
+    return [s.astimezone(tz).strftime("%m-%d %H:%M") for s in slots]
+
+
+def test_batch_continues_the_grid_after_the_last_upload(tmp_path):
+    sched = UploadScheduler(tz=LA, state_file=str(tmp_path / "last.txt"))
+    last = datetime(2026, 6, 22, 18, 0, tzinfo=LA)
+    now = datetime(2026, 6, 22, 10, 0, tzinfo=LA)
+
+    slots = sched.plan(4, after=last, now=now)
+
+    assert _local(slots) == ["06-22 21:00", "06-23 00:00", "06-23 03:00", "06-23 06:00"]
+    assert all(s.tzinfo == timezone.utc for s in slots)
+
+
+def test_off_grid_last_upload_rounds_to_the_next_slot(tmp_path):
+    sched = UploadScheduler(tz=LA, state_file=str(tmp_path / "last.txt"))
+    last = datetime(2026, 6, 22, 10, 30, tzinfo=LA)
+    now = datetime(2026, 6, 22, 8, 0, tzinfo=LA)
+
+    assert _local(sched.plan(1, after=last, now=now)) == ["06-22 12:00"]
+
+
+def test_stale_last_upload_starts_at_least_15_minutes_out(tmp_path):
+    sched = UploadScheduler(tz=LA, state_file=str(tmp_path / "last.txt"))
+    last = datetime(2026, 6, 1, 9, 0, tzinfo=LA)
+    now = datetime(2026, 6, 22, 11, 50, tzinfo=LA)
+
+    assert _local(sched.plan(2, after=last, now=now)) == ["06-22 15:00", "06-22 18:00"]
+
+
+def test_per_channel_grid_and_timezone(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sched = UploadScheduler.for_channel("night-owl", hours=[23, 1], tz="Europe/London")
+    now = datetime(2026, 6, 22, 12, 0, tzinfo=timezone.utc)
+
+    slots = sched.plan(3, now=now)
+
+    assert _local(slots, ZoneInfo("Europe/London")) == ["06-22 23:00", "06-23 01:00", "06-23 23:00"]
+    assert sched.state_file == "last_upload_time.night-owl.txt"
+
+
+def test_commit_writes_the_latest_slot_once_and_never_moves_back(tmp_path):
+    sched = UploadScheduler(tz=LA, state_file=str(tmp_path / "last.txt"))
+    now = datetime(2026, 6, 22, 10, 0, tzinfo=LA)
+    week = sched.plan(56, now=now)
+
+    sched.commit(week)
+    assert sched.high_water_mark() == week[-1]
+    assert sched.high_water_mark() - week[0] == timedelta(days=7) - timedelta(hours=3)
+
+    sched.commit(week[:3])
+    assert sched.high_water_mark() == week[-1]
+    assert sched.plan(1, now=now)[0] == week[-1] + timedelta(hours=3)
+
+
+def _reserve_many(state_file, n):
+    sched = UploadScheduler(tz="America/Los_Angeles", state_file=state_file)
+    return [sched.reserve() for _ in range(n)]
+
+
+def test_two_processes_never_reserve_the_same_slot(tmp_path):
+    state = str(tmp_path / "last.txt")
+    with ProcessPoolExecutor(2) as pool:
+        results = list(pool.map(_reserve_many, [state, state], [15, 15]))
+
+    slots = results[0] + results[1]
+    assert len(set(slots)) == 30
+    assert UploadScheduler(tz=LA, state_file=state).high_water_mark() == max(slots)
+
+
+def test_reserve_continues_after_a_slot_already_held(tmp_path):
+    sched = UploadScheduler(tz=LA, state_file=str(tmp_path / "last.txt"))
+    held = sched.reserve()
+    # The file lags what this process holds (e.g. it was edited back by hand).
+    (tmp_path / "last.txt").write_text("")
+    assert sched.reserve(after=held) > held
@@ -0,0 +1,39 @@
+import json
+
+from google.oauth2.credentials import Credentials
+
+import token_manager
+from token_manager import TokenManager, cached_service
+
+
+def _token(path, token):
+    path.write_text(json.dumps({
+        "token": token, "refresh_token": "r", "client_id": "c", "client_secret": "s",
+        "expiry": "2999-01-01T00:00:00Z",
+    }))
+    return str(path)
+
+
+def test_service_is_built_once_per_token_file(tmp_path, monkeypatch):
+    built = []
+    real = token_manager.build_from_document
+    monkeypatch.setattr(token_manager, "build_from_document",
+                        lambda *a, **k: built.append(1) or real(*a, **k))
+    path = _token(tmp_path / "yt.json", "t1")
+
+    first = TokenManager(path, token_manager.YOUTUBE_SCOPES).build_service("youtube", "v3")
+    (tmp_path / "yt.json").unlink()  # a second call must not need the file
+    second = TokenManager(path, token_manager.YOUTUBE_SCOPES).build_service("youtube", "v3")
+
+    assert first is second
+    assert built == [1]
+
+
+def test_new_credentials_are_swapped_in_place():
+    a, b = Credentials("a"), Credentials("b")
+
+    first = cached_service("youtube", "v3", a, "swap-test")
+    second = cached_service("youtube", "v3", b, "swap-test")
+
+    assert first is second
+    assert second._http.credentials is b
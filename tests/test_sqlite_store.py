@@ -0,0 +1,31 @@
+import sqlite3
+
+import pytest
+
+from sqlite_store import transaction
+
+
+def test_commits_and_closes(tmp_path):
+    path = str(tmp_path / "t.sqlite3")
+    with transaction(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    with transaction(path, row_factory=sqlite3.Row) as conn:
+        assert [dict(r) for r in conn.execute("SELECT x FROM t")] == [{"x": 1}]
+
+
+def test_rolls_back_on_error(tmp_path):
+    path = str(tmp_path / "t.sqlite3")
+    with transaction(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+
+    with pytest.raises(RuntimeError):
+        with transaction(path) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+
+    with transaction(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
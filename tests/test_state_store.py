@@ -0,0 +1,56 @@
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from state_store import (LockTimeout, advance_timestamp, atomic_write, compare_and_swap, locked,
+                         read_text, read_timestamp, update)
+
+LA = ZoneInfo("America/Los_Angeles")
+
+
+def test_atomic_write_and_compare_and_swap(tmp_path):
+    path = str(tmp_path / "state.txt")
+    assert read_text(path) is None
+    assert compare_and_swap(path, None, "one")
+    assert not compare_and_swap(path, "stale", "two")
+    assert compare_and_swap(path, "one", "two")
+    atomic_write(path, "three")
+    assert read_text(path) == "three"
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_timestamp_only_moves_forward(tmp_path):
+    path = str(tmp_path / "last.txt")
+    t = datetime(2026, 6, 22, 18, 0, tzinfo=LA)
+    assert advance_timestamp(path, t, LA)
+    assert not advance_timestamp(path, t - timedelta(hours=3), LA)
+    assert advance_timestamp(path, t + timedelta(hours=3), LA)
+    assert read_timestamp(path, LA) == t + timedelta(hours=3)
+    # A naive value left by an old version is read in the given zone.
+    atomic_write(path, "2026-06-23T09:00:00")
+    assert not advance_timestamp(path, datetime(2026, 6, 23, 6, 0, tzinfo=LA), LA)
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / "counter.txt")
+
+    def bump():
+        for _ in range(25):
+            update(path, lambda text: str(int(text or 0) + 1))
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert read_text(path) == "100"
+
+
+def test_lock_times_out(tmp_path):
+    path = str(tmp_path / "token.json")
+    with locked(path):
+        with pytest.raises(LockTimeout):
+            with locked(path, timeout=0.1):
+                pass
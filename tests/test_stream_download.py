@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import instagram_downloader
+from instagram_downloader import GrowingFileUpload, ReelDownloader, TokenBucket
+
+VIDEO = bytes(range(256)) * 40  # 10 KiB
+
+
+class FakeResponse:
+    def __init__(self, status, body, drop_after=None):
+        self.status_code = status
+        self.body = body
+        self.drop_after = drop_after
+        self.headers = {"Content-Length": str(len(body))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), 1024):
+            if self.drop_after is not None and i >= self.drop_after:
+                raise requests.exceptions.ConnectionError("connection reset")
+            yield self.body[i:i + 1024]
+
+
+class FakeSession:
+    def __init__(self, drop_first_after=None):
+        self.drop_first_after = drop_first_after
+        self.ranges = []
+
+    def get(self, url, stream, headers, timeout):
+        rng = headers.get("Range")
+        self.ranges.append(rng)
+        start = int(rng[len("bytes="):-1]) if rng else 0
+        drop, self.drop_first_after = self.drop_first_after, None
+        return FakeResponse(206 if rng else 200, VIDEO[start:], drop)
+
+
+@pytest.fixture
+def downloader(monkeypatch):
+    monkeypatch.setattr(instagram_downloader.time, "sleep", lambda s: None)
+    post = SimpleNamespace(is_video=True, video_url="https://cdn.example/v.mp4")
+    monkeypatch.setattr(instagram_downloader.instaloader.Post, "from_shortcode",
+                        staticmethod(lambda ctx, code: post))
+    return ReelDownloader(size=1, session_users=[], limiter=TokenBucket(6000, 100))
+
+
+def _use_session(d, session):
+    loader = d.pool.get()
+    loader.context._session = session
+    d.pool.put(loader)
+
+
+def test_streams_to_destination_and_resumes_with_range(downloader, tmp_path):
+    session = FakeSession(drop_first_after=4096)
+    _use_session(downloader, session)
+
+    path = downloader.download("https://www.instagram.com/reel/ABC/", str(tmp_path), "clip")
+
+    assert path == str(tmp_path / "clip.mp4")
+    assert open(path, "rb").read() == VIDEO
+    assert session.ranges == [None, "bytes=4096-"]
+    assert not (tmp_path / "clip.mp4.part").exists()
+    assert not any(p.name.startswith("temp_") for p in tmp_path.iterdir())
+
+
+def test_tee_feeds_an_upload_while_downloading(downloader, tmp_path):
+    _use_session(downloader, FakeSession())
+    tee = GrowingFileUpload(chunksize=3000)
+    got = []
+
+    def upload():
+        begin = 0
+        while True:
+            data = tee.getbytes(begin, tee.chunksize())
+            got.append(data)
+            begin += len(data)
+            if len(data) < tee.chunksize():
+                return
+
+    reader = threading.Thread(target=upload)
+    reader.start()
+    downloader.download("https://www.instagram.com/reel/ABC/", str(tmp_path), "clip", tee=tee)
+    reader.join(timeout=5)
+
+    assert b"".join(got) == VIDEO
+    assert tee.size() == len(VIDEO)
+
+
+def test_tee_is_only_told_about_bytes_on_disk(downloader, tmp_path, monkeypatch):
+    _use_session(downloader, FakeSession())
+    tee = GrowingFileUpload(chunksize=3000)
+    announced = []
+    grew = tee.grew
+
+    def checked_grew(nbytes):
+        on_disk = os.path.getsize(tee._path) if os.path.exists(tee._path) else 0
+        announced.append((nbytes, on_disk))
+        grew(nbytes)
+
+    monkeypatch.setattr(tee, "grew", checked_grew)
+    downloader.download("https://www.instagram.com/reel/ABC/", str(tmp_path), "clip", tee=tee)
+
+    assert announced and all(on_disk >= nbytes for nbytes, on_disk in announced)
+
+
+def test_tee_read_waits_for_a_slow_writer(tmp_path):
+    part = tmp_path / "clip.mp4.part"
+    part.write_bytes(VIDEO[:1000])
+    tee = GrowingFileUpload(chunksize=3000)
+    tee.start(str(part))
+    # Announced before the bytes are readable: the interleaving that used to
+    # hand the upload an empty read.
+    tee.grew(3000)
+    got = []
+    reader = threading.Thread(target=lambda: got.append(tee.getbytes(0, 3000)))
+    reader.start()
+    time.sleep(0.2)
+    assert not got
+    with open(part, "ab") as f:
+        f.write(VIDEO[1000:])
+    final = tmp_path / "clip.mp4"
+    os.replace(part, final)
+    tee.finish(str(final))
+    reader.join(timeout=5)
+
+    assert got == [VIDEO[:3000]]
+    assert tee.getbytes(9000, 3000) == VIDEO[9000:]
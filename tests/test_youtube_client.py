@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from youtube_client import YouTubeClient
+
+
+def _client(built, workers=4):
+    def factory():
+        built.append(threading.current_thread().name)
+        return object()
+    return YouTubeClient(workers=workers, service_factory=factory)
+
+
+def test_calls_run_concurrently_on_per_thread_services():
+    built = []
+    client = _client(built)
+    seen = {}
+
+    def slow(youtube, n):
+        seen.setdefault(threading.current_thread().name, set()).add(id(youtube))
+        time.sleep(0.1)
+        return n * 2
+
+    start = time.monotonic()
+    assert client.map(slow, range(8)) == [0, 2, 4, 6, 8, 10, 12, 14]
+    assert time.monotonic() - start < 0.5  # 8 x 0.1s serially would be 0.8s
+    client.close()
+
+    # One service per worker thread, built once and reused.
+    assert len(built) == len(set(built)) <= 4
+    assert all(len(ids) == 1 for ids in seen.values())
+
+
+def test_failures_can_be_collected_instead_of_raised():
+    client = _client([])
+
+    def flaky(youtube, n):
+        if n == 1:
+            raise ValueError("bad video")
+        return n
+
+    with pytest.raises(ValueError):
+        client.map(flaky, [0, 1, 2])
+    result = client.map(flaky, [0, 1, 2], return_exceptions=True)
+    assert result[0] == 0 and result[2] == 2
+    assert isinstance(result[1], ValueError)
+    client.close()
+
+
+def test_async_gather():
+    client = _client([])
+    result = asyncio.run(client.gather(lambda youtube, n: n + 1, [1, 2, 3]))
+    assert result == [2, 3, 4]
+    client.close()
@@ -1,9 +1,63 @@
 import os
 import json
+import threading
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest
+
+from quota import MeteredRequest
+from state_store import locked_write
+
+# Discovery documents ship inside google-api-python-client, so building a
+# service never needs the network. Each one is read once per process.
+_discovery_docs = {}
+_discovery_lock = threading.Lock()
+
+# Built services, per thread (a service object is not thread-safe), keyed by
+# (api, version, token). Rebuilding one re-parses the whole discovery document.
+_local_services = threading.local()
+
+
+def discovery_document(api_name, api_version):
+    """The bundled discovery document for an API, cached for the process."""
+    key = (api_name, api_version)
+    with _discovery_lock:
+        if key not in _discovery_docs:
+            doc = get_static_doc(api_name, api_version)
+            if doc is None:
+                raise ValueError(f"no bundled discovery document for {api_name} {api_version}")
+            _discovery_docs[key] = doc
+        return _discovery_docs[key]
+
+
+def _thread_services():
+    if not hasattr(_local_services, "cache"):
+        _local_services.cache = {}
+    return _local_services.cache
+
+
+def cached_service(api_name, api_version, creds, key):
+    """
+    This thread's service for `key`, built once and then reused.
+
+    If it was built with different credentials (a re-authorized token, or
+    another channel's token checked through the same slot), they are swapped
+    into the existing service's transport instead of rebuilding it.
+    """
+    cache = _thread_services()
+    service = cache.get((api_name, api_version, key))
+    if service is None:
+        # YouTube calls are charged to the quota meter; other APIs go out as usual.
+        request_builder = MeteredRequest if api_name == "youtube" else HttpRequest
+        service = build_from_document(discovery_document(api_name, api_version),
+                                      credentials=creds, requestBuilder=request_builder)
+        cache[(api_name, api_version, key)] = service
+    elif service._http.credentials is not creds:
+        service._http.credentials = creds
+    return service
 
 class TokenManager:
     """A class to manage OAuth tokens for Google APIs."""
@@ -75,8 +129,9 @@ class TokenManager:
         """Save the token to file."""
         if self.creds:
             try:
-                with open(self.token_file, 'w') as token:
-                    token.write(self.creds.to_json())
+                # Atomic and locked: another process may be loading or
+                # refreshing the same token file right now.
+                locked_write(self.token_file, self.creds.to_json())
                 print(f"Token saved to {self.token_file}")
             except Exception as e:
                 print(f"Error saving token to {self.token_file}: {e}")
@@ -92,21 +147,36 @@ class TokenManager:
         return self.creds
     
     def build_service(self, api_name, api_version):
-        """Build and return a service for the specified API."""
+        """
+        Return a service for the specified API.
+
+        Repeat calls for the same token file get the same service back. Its
+        credentials are refreshed in place, so the token file is only read
+        the first time.
+        """
+        key = os.path.abspath(self.token_file)
+        existing = _thread_services().get((api_name, api_version, key))
+        if existing is not None and self.creds is None:
+            self.creds = existing._http.credentials
         creds = self.get_credentials()
-        return build(api_name, api_version, credentials=creds)
+        return cached_service(api_name, api_version, creds, key)
 
 
 # Utility functions for common APIs
+YOUTUBE_SCOPES = [
+    "https://www.googleapis.com/auth/youtube.upload",
+    "https://www.googleapis.com/auth/youtube"
+]
+
 def get_youtube_service():
     """Get authenticated YouTube service."""
-    scopes = [
-        "https://www.googleapis.com/auth/youtube.upload",
-        "https://www.googleapis.com/auth/youtube"
-    ]
-    token_manager = TokenManager("youtube_token.json", scopes)
+    token_manager = TokenManager("youtube_token.json", YOUTUBE_SCOPES)
     return token_manager.build_service("youtube", "v3")
 
+def get_youtube_credentials():
+    """Get valid YouTube credentials, for callers that build their own services."""
+    return TokenManager("youtube_token.json", YOUTUBE_SCOPES).get_credentials()
+
 def get_gmail_service(full_access=False):
     """
     Get authenticated Gmail service.
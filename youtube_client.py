@@ -0,0 +1,130 @@
+"""Concurrent access to the YouTube Data API.
+
+googleapiclient is blocking and its service objects are not thread-safe: they
+share one httplib2.Http, which is one socket. So every bulk job (category
+fixes, comment sweeps, playlist backfills) ran one request at a time, each
+paying a full round trip, and was bounded by latency long before quota.
+
+YouTubeClient keeps a fixed pool of worker threads. Each thread builds its own
+service once, on its own AuthorizedHttp, and reuses that keep-alive connection
+for every call it runs; all threads share one set of OAuth credentials, so
+there is one token refresh rather than one per thread. Work is handed over as
+a function of the service:
+
+    client = get_client()
+    videos = client.map(lambda yt, vid: yt.videos().list(part="snippet", id=vid).execute(), ids)
+
+and asyncio code can await the same calls with `await client.call(fn, ...)`
+or `await client.gather(fn, items)`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import google_auth_httplib2
+import httplib2
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build_from_document
+
+from quota import MeteredRequest
+from token_manager import discovery_document, get_youtube_credentials
+
+CLIENT_WORKERS = int(os.getenv("YOUTUBE_CLIENT_WORKERS", "8"))
+HTTP_TIMEOUT = 120
+
+
+class YouTubeClient:
+    def __init__(self, credentials=None, workers: int = CLIENT_WORKERS, service_factory=None):
+        """
+        Args:
+            credentials: google.oauth2 credentials shared by every worker. Loaded
+                from the YouTube token file when omitted.
+            workers: how many calls may be in flight at once.
+            service_factory: builds one thread's service; for tests and for
+                callers that already have a way to build one.
+        """
+        if service_factory is None:
+            if credentials is None:
+                credentials = get_youtube_credentials()
+            service_factory = lambda: _build_service(credentials)
+        self.credentials = credentials
+        self.workers = workers
+        self._factory = service_factory
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="youtube")
+
+    def service(self):
+        """This thread's service, built on first use."""
+        youtube = getattr(self._local, "youtube", None)
+        if youtube is None:
+            youtube = self._local.youtube = self._factory()
+        return youtube
+
+    def _run(self, fn, args, kwargs):
+        self._ensure_fresh()
+        return fn(self.service(), *args, **kwargs)
+
+    def _ensure_fresh(self):
+        # Refresh once under a lock; otherwise every worker that sees the token
+        # expire at the same moment sends its own refresh.
+        creds = self.credentials
+        if creds is None or creds.valid:
+            return
+        with self._refresh_lock:
+            if not creds.valid and creds.refresh_token:
+                creds.refresh(Request())
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(service, *args, **kwargs) on a worker; returns a Future."""
+        return self._pool.submit(self._run, fn, args, kwargs)
+
+    def map(self, fn, items, return_exceptions: bool = False) -> list:
+        """fn(service, item) for every item, concurrently; results in input order.
+
+        With return_exceptions, a failed item yields its exception instead of
+        aborting the rest, so one bad video doesn't sink a bulk job.
+        """
+        futures = [self.submit(fn, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    async def call(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def gather(self, fn, items, return_exceptions: bool = False) -> list:
+        return await asyncio.gather(*(self.call(fn, item) for item in items),
+                                    return_exceptions=return_exceptions)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+def _build_service(credentials):
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    return build_from_document(discovery_document("youtube", "v3"), http=http,
+                               requestBuilder=MeteredRequest)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> YouTubeClient:
+    """The process-wide client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = YouTubeClient()
+        return _client